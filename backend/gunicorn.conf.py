@@ -0,0 +1,19 @@
+"""
+Gunicorn settings, picked up automatically when gunicorn starts in this directory.
+
+SERVER_INTERFACE selects how Django is served:
+
+- wsgi (default): moonbase.wsgi with sync workers, one request per worker at a time
+- asgi: moonbase.asgi with uvicorn workers; async views serve many concurrent
+  (and slow) clients per worker
+"""
+import os
+
+SERVER_INTERFACE = os.getenv('SERVER_INTERFACE', 'wsgi')
+
+if SERVER_INTERFACE == 'asgi':
+    wsgi_app = 'moonbase.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'moonbase.wsgi:application'
+    worker_class = 'sync'
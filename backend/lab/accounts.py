@@ -0,0 +1,112 @@
+"""
+Helpers for user accounts that are keyed by email.
+
+Emails are matched case-insensitively everywhere, backed by the unique index on
+lower(email) created in migration 0007.
+"""
+import re
+
+from django.db.models import F
+from django.db.models.functions import Lower
+
+# Leaves room for a numeric suffix within User.username's 150 characters
+USERNAME_BASE_MAX_LENGTH = 140
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+def users_by_email(UserModel, email):
+    """
+    Users whose email matches case-insensitively. The filter matches the
+    expression and predicate of the lower(email) index so PostgreSQL can
+    answer it with an index scan.
+    """
+    return UserModel.objects.annotate(email_lower=Lower('email')).filter(
+        email_lower=normalize_email(email)
+    ).exclude(email='')
+
+
+def username_base(email, max_length=USERNAME_BASE_MAX_LENGTH):
+    """
+    The part of an email before the '@', reduced to the characters
+    UnicodeUsernameValidator accepts and truncated so a numeric suffix still
+    fits in the 150 characters of User.username.
+    """
+    base = re.sub(r'[^\w.@+-]', '', email.split('@')[0])[:max_length]
+    return base or 'user'
+
+
+def next_free_username(UserModel, base):
+    """
+    Returns base if it is free, otherwise base followed by the number after the
+    highest suffix in use (john, john1, john2, ...). Uses a single query however
+    many usernames share the prefix.
+    """
+    return allocate_usernames(UserModel, [base])[0]
+
+
+def allocate_usernames(UserModel, bases):
+    """
+    Returns one free username per base (in order) with a single query.
+    Repeated bases get consecutive suffixes.
+    """
+    unique_bases = sorted(set(bases))
+    if not unique_bases:
+        return []
+    pattern = '|'.join(re.escape(base) for base in unique_bases)
+    taken = UserModel.objects.filter(
+        username__regex=rf'^({pattern})[0-9]*$'
+    ).values_list('username', flat=True)
+
+    # Highest suffix in use per base: -1 if free, 0 if only the bare base is taken
+    highest = {base: -1 for base in unique_bases}
+    for username in taken:
+        # A username can match several bases (e.g. 'ann1' for 'ann' and 'ann1')
+        for base in unique_bases:
+            suffix = username[len(base):]
+            if username.startswith(base) and (suffix == '' or suffix.isdigit()):
+                highest[base] = max(highest[base], int(suffix) if suffix else 0)
+
+    usernames = []
+    handed_out = set()
+    for base in bases:
+        # Skip names already handed out to another base in this call
+        while True:
+            highest[base] += 1
+            username = base if highest[base] == 0 else f"{base}{highest[base]}"
+            if username not in handed_out:
+                break
+        handed_out.add(username)
+        usernames.append(username)
+    return usernames
+
+
+def find_duplicate_emails(UserModel):
+    """
+    Returns {lowercased email: [users]} for emails used by more than one user.
+    Users are ordered so the one to keep comes first: most recent login,
+    then oldest account.
+    """
+    users = UserModel.objects.exclude(email='').annotate(email_lower=Lower('email')).order_by(
+        'email_lower', F('last_login').desc(nulls_last=True), 'id'
+    ).only('id', 'email', 'username', 'last_login')
+
+    groups = {}
+    for user in users:
+        groups.setdefault(user.email_lower, []).append(user)
+    return {email: group for email, group in groups.items() if len(group) > 1}
+
+
+def deduplicate_emails(UserModel, dry_run=False):
+    """
+    Clears the email of every duplicate account except the one kept per email.
+    Those users can still log in with their username.
+    Returns the duplicates as found by find_duplicate_emails().
+    """
+    duplicates = find_duplicate_emails(UserModel)
+    if not dry_run:
+        cleared = [user.id for group in duplicates.values() for user in group[1:]]
+        UserModel.objects.filter(id__in=cleared).update(email='')
+    return duplicates
@@ -1,7 +1,7 @@
 from django.contrib import admin
 
 # Register your models here.
-from .models import Classrooms, ClassroomUsers, Exercises, Tests, ClassroomExercises, Submissions, ExerciseTests
+from .models import Classrooms, ClassroomUsers, Exercises, Tests, ClassroomExercises, Submissions, ExerciseTests, SubmissionResults, SubmissionTestResults, GradingCache, ClassroomDeletionJobs, CodeBlobs, SubmissionVersions, IdempotencyKeys
 
 admin.site.register(Classrooms)
 admin.site.register(ClassroomUsers)
@@ -9,4 +9,11 @@ admin.site.register(Exercises)
 admin.site.register(Tests)
 admin.site.register(ClassroomExercises)
 admin.site.register(Submissions)
-admin.site.register(ExerciseTests)
\ No newline at end of file
+admin.site.register(ExerciseTests)
+admin.site.register(SubmissionResults)
+admin.site.register(SubmissionTestResults)
+admin.site.register(GradingCache)
+admin.site.register(ClassroomDeletionJobs)
+admin.site.register(CodeBlobs)
+admin.site.register(SubmissionVersions)
+admin.site.register(IdempotencyKeys)
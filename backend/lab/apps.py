@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class LabConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'lab'
+
+    def ready(self):
+        # Connect signal receivers
+        from . import signals  # noqa: F401
+        from .shared_cache import warn_if_not_shared
+        warn_if_not_shared()
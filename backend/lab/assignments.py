@@ -0,0 +1,71 @@
+"""
+Materialized assignments.
+
+Assigning an exercise to a classroom can create an 'assigned_to_student'
+submission for every member up front, so teachers see who hasn't started yet
+instead of only the students who opened the exercise. Rows are inserted in
+bulk and existing (student, exercise) pairs are skipped by the database
+(ON CONFLICT DO NOTHING), so assigning again or backfilling is always safe.
+"""
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ClassroomExercises, ClassroomUsers, Submissions
+
+BATCH_SIZE = 1000
+
+
+def parse_due_date(value):
+    """
+    Parses an ISO 8601 due date; naive values are taken as server time.
+    Returns None for an empty value and raises ValueError for invalid ones.
+    """
+    if not value:
+        return None
+    due_date = parse_datetime(value) if isinstance(value, str) else None
+    if due_date is None:
+        raise ValueError('due_date must be an ISO 8601 date and time')
+    if timezone.is_naive(due_date):
+        due_date = timezone.make_aware(due_date)
+    return due_date
+
+
+def _create_submissions(pairs):
+    submissions = [
+        Submissions(student_id=student_id, exercise_id=exercise_id, due_date=due_date)
+        for student_id, exercise_id, due_date in pairs
+    ]
+    Submissions.objects.bulk_create(submissions, ignore_conflicts=True, batch_size=BATCH_SIZE)
+    return len(submissions)
+
+
+def assign_exercise(classroom_exercise):
+    """
+    Creates the missing submissions of an assigned exercise for every member
+    of its classroom. Returns the number of members it was assigned to.
+    """
+    student_ids = ClassroomUsers.objects.filter(
+        classroom_id=classroom_exercise.classroom_id
+    ).values_list('user_id', flat=True)
+    return _create_submissions(
+        (student_id, classroom_exercise.exercise_id, classroom_exercise.due_date)
+        for student_id in student_ids
+    )
+
+
+def backfill_assignments(classroom_id, student_ids):
+    """
+    Creates the missing submissions of a classroom's assigned exercises for
+    new members. Returns the number of (student, exercise) pairs considered.
+    """
+    student_ids = list(student_ids)
+    if not student_ids:
+        return 0
+    assigned = list(ClassroomExercises.objects.filter(
+        classroom_id=classroom_id, assigned=True
+    ).values_list('exercise_id', 'due_date'))
+    return _create_submissions(
+        (student_id, exercise_id, due_date)
+        for exercise_id, due_date in assigned
+        for student_id in student_ids
+    )
@@ -0,0 +1,69 @@
+"""
+Async API views.
+
+DRF 3.14 only runs sync views, so under ASGI every @api_view request holds a
+thread until its response is sent. Read-heavy endpoints are plain async Django
+views instead, decorated with @async_api_view, which authenticates the same
+way DRF does (REST_FRAMEWORK's DEFAULT_AUTHENTICATION_CLASSES) and requires an
+authenticated user like IsAuthenticated. Queries go through Django's async ORM
+(aget, afirst, async for, ...).
+
+The views keep working under WSGI, where Django runs them with async_to_sync.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .serializers import FastJsonResponse
+
+
+def _authenticators():
+    return [authenticator() for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+
+
+def _error_response(exc, authenticators):
+    response = FastJsonResponse({'detail': str(exc.detail)}, status=exc.status_code)
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        # Same as DRF: 401 with a challenge if the first authenticator has one, else 403
+        header = authenticators[0].authenticate_header(None) if authenticators else None
+        if header:
+            response['WWW-Authenticate'] = header
+        else:
+            response.status_code = 403
+    return response
+
+
+def async_api_view(http_method_names):
+    """
+    Decorator for async views, the counterpart of
+    @api_view(http_method_names) + @permission_classes([IsAuthenticated]).
+    The view receives a DRF Request, so request.user and request.auth are set.
+    """
+    allowed = {method.upper() for method in http_method_names}
+    if 'GET' in allowed:
+        allowed.add('HEAD')
+
+    def decorator(view):
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            if request.method not in allowed:
+                return FastJsonResponse(
+                    {'detail': f'Method "{request.method}" not allowed.'}, status=405
+                )
+
+            authenticators = _authenticators()
+            request = Request(request, authenticators=authenticators)
+            try:
+                # Authenticators are sync (they may hit the cache or the database)
+                user = await sync_to_async(lambda: request.user)()
+                if not user or not user.is_authenticated:
+                    raise exceptions.NotAuthenticated()
+            except exceptions.APIException as exc:
+                return _error_response(exc, authenticators)
+
+            return await view(request, *args, **kwargs)
+        return inner
+    return decorator
@@ -1,30 +1,93 @@
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework.exceptions import AuthenticationFailed
 from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
 from django.http import HttpRequest
 from rest_framework.request import Request
 from rest_framework import HTTP_HEADER_ENCODING
 import logging
+import random
 from drf_spectacular.extensions import OpenApiAuthenticationExtension
 
+from .shared_cache import cache_is_shared
+
 logger = logging.getLogger(__name__)
 
+# Columns kept in the user cache. The password hash is left out on purpose:
+# it stays deferred on cached users, and save() on such a user only writes
+# the loaded columns.
+USER_CACHE_FIELDS = [
+    'id', 'username', 'first_name', 'last_name', 'email',
+    'is_active', 'is_staff', 'is_superuser', 'date_joined', 'last_login',
+]
+
+USER_CACHE_DEFAULTS = {
+    'TTL': 60,  # Seconds a user stays cached
+    'LOG_SAMPLE_RATE': 0.01,  # Share of requests whose auth details are logged at DEBUG level
+}
+
+
+def user_cache_setting(name):
+    return getattr(settings, 'AUTH_USER_CACHE', {}).get(name, USER_CACHE_DEFAULTS[name])
+
+
+def _user_cache_key(user_id):
+    return f'lab:user:{user_id}'
+
+
+def _cached_field_names():
+    # Model.from_db() expects values in the model's column order
+    return [
+        field.attname for field in get_user_model()._meta.concrete_fields
+        if field.attname in USER_CACHE_FIELDS
+    ]
+
+
+def get_cached_user(user_id):
+    if not cache_is_shared():
+        # Changes made through other processes would never invalidate it
+        return None
+    values = cache.get(_user_cache_key(user_id))
+    if values is None:
+        return None
+    return get_user_model().from_db(DEFAULT_DB_ALIAS, _cached_field_names(), values)
+
+
+def cache_user(user):
+    if not cache_is_shared():
+        return
+    values = [getattr(user, field) for field in _cached_field_names()]
+    cache.set(_user_cache_key(user.pk), values, user_cache_setting('TTL'))
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(_user_cache_key(user_id))
+
+
 class CookieJWTAuthentication(JWTAuthentication):
     def authenticate(self, request: Request):
-        logger.info("Request URL: %s", request.get_full_path())
-        logger.info("Origin: %s", request.headers.get('Origin'))
-        logger.info("Available cookies: %s", list(request.COOKIES.keys()))
+        log_request = logger.isEnabledFor(logging.DEBUG) and random.random() < user_cache_setting('LOG_SAMPLE_RATE')
+        if log_request:
+            logger.debug("Request URL: %s", request.get_full_path())
+            logger.debug("Origin: %s", request.headers.get('Origin'))
+            logger.debug("Available cookies: %s", list(request.COOKIES.keys()))
         
         raw_token = request.COOKIES.get(settings.SIMPLE_JWT['AUTH_COOKIE'])
         
         if not raw_token:
-            logger.warning("No access_token cookie found. Available cookies: %s", list(request.COOKIES.keys()))
+            if log_request:
+                logger.debug("No access_token cookie found. Available cookies: %s", list(request.COOKIES.keys()))
             return None
 
         try:
             validated_token = self.get_validated_token(raw_token)
             user = self.get_user(validated_token)
-            logger.info("Auth successful: %s", user.username)
+            if log_request:
+                logger.debug("Auth successful: %s", user.username)
             return user, validated_token
         except TokenError as e:
             logger.error("Token error: %s", str(e))
@@ -33,6 +96,25 @@ class CookieJWTAuthentication(JWTAuthentication):
             logger.error("Auth error: %s", str(e))
             return None
 
+    def get_user(self, validated_token):
+        """
+        Returns the token's user from the short-TTL user cache, falling back to
+        the database. Cached entries are dropped when a user is saved or deleted
+        (see lab/signals.py).
+        """
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        user = get_cached_user(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache_user(user)
+        elif not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return user
+
 class CookieJWTAuthenticationScheme(OpenApiAuthenticationExtension):
     target_class = 'lab.authentication.CookieJWTAuthentication'
     name = 'Cookie JWT'
@@ -43,4 +125,4 @@ class CookieJWTAuthenticationScheme(OpenApiAuthenticationExtension):
             'in': 'cookie',
             'name': settings.SIMPLE_JWT['AUTH_COOKIE'],
             'description': 'JWT authentication using cookies'
-        } 
\ No newline at end of file
+        }
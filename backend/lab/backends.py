@@ -1,16 +1,22 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
 
+from .accounts import users_by_email
+
 class EmailBackend(ModelBackend):
     def authenticate(self, request, username=None, password=None, **kwargs):
+        if not username or password is None or '@' not in username:
+            # Not an email, leave it to ModelBackend
+            return None
         UserModel = get_user_model()
         try:
-            # Use filter().first() instead of get() to handle multiple users case
-            user = UserModel.objects.filter(email=username).first()
-            if user and user.check_password(password):
-                return user
-        except Exception as e:
-            # Log any unexpected errors
-            print(f"Authentication error: {str(e)}")
+            # Index lookup on lower(email), which is unique
+            user = users_by_email(UserModel, username).get()
+        except UserModel.DoesNotExist:
+            # Run the password hasher once to reduce the timing difference
+            # between an existing and a nonexistent email (same as ModelBackend)
+            UserModel().set_password(password)
             return None
-        return None 
\ No newline at end of file
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
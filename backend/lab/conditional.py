@@ -0,0 +1,121 @@
+"""
+Conditional GET (ETag / Last-Modified) for polled endpoints.
+
+Each endpoint has a version function that runs one cheap query (max(updated_at),
+row counts, ...) instead of building the response. The ETag is a hash of that
+version, the requesting user and the query string, so a client repeating a
+request with If-None-Match gets a 304 without the view running at all.
+
+Last-Modified is only sent by endpoints whose version is a single row's
+updated_at. For lists and per-user data, deletions and membership changes
+don't move any timestamp, so only the ETag can detect them.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from django.db.models import Count, Exists, Max, OuterRef
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .models import Classrooms, ClassroomUsers, Exercises, ExerciseTests, Tests
+
+
+def make_etag(request, version):
+    source = json.dumps(
+        [request.path, request.GET.urlencode(), request.user.id, version],
+        default=str,
+    )
+    return quote_etag(hashlib.sha256(source.encode('utf-8')).hexdigest()[:32])
+
+
+def conditional(version_func):
+    """
+    Decorator for async GET views (below @async_api_view) answering 304 Not
+    Modified when the client's validators still match.
+
+    The coroutine version_func(request, **kwargs) returns (version, last_modified), where
+    version is any JSON-serializable value that changes whenever the response
+    would and last_modified is a datetime or None. It returns None when the
+    object doesn't exist, leaving the 404 to the view. The view finds the
+    version in request.conditional_version (None if there was none).
+    """
+    def decorator(view):
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return await view(request, *args, **kwargs)
+
+            result = await version_func(request, *args, **kwargs)
+            if result is None:
+                return await view(request, *args, **kwargs)
+
+            version, last_modified = result
+            request.conditional_version = version
+            etag = make_etag(request, version)
+            # HTTP dates have a resolution of one second
+            last_modified = int(last_modified.timestamp()) if last_modified else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            # Responses depend on the user: keep them out of shared caches and
+            # have browsers revalidate every time
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return inner
+    return decorator
+
+
+async def classroom_version(request, slug):
+    row = await Classrooms.objects.filter(slug=slug).values(
+        'id', 'updated_at', 'creator_user__username'
+    ).annotate(
+        is_member=Exists(ClassroomUsers.objects.filter(classroom=OuterRef('pk'), user=request.user))
+    ).afirst()
+    if row is None:
+        return None
+    return list(row.values()), None
+
+
+async def exercise_version(request, exercise_id):
+    row = await Exercises.objects.filter(id=exercise_id).values(
+        'updated_at', 'creator_user__username', 'creator_user__first_name', 'creator_user__last_name'
+    ).afirst()
+    if row is None:
+        return None
+    return list(row.values()), row['updated_at']
+
+
+async def test_version(request, test_id):
+    updated_at = await Tests.objects.filter(id=test_id).values_list('updated_at', flat=True).afirst()
+    if updated_at is None:
+        return None
+    return [updated_at], updated_at
+
+
+async def exercise_list_version(request, classroom_slug):
+    row = await Classrooms.objects.filter(slug=classroom_slug).aaggregate(
+        id=Max('id'),
+        count=Count('classroomexercises'),
+        links_updated_at=Max('classroomexercises__updated_at'),
+        exercises_updated_at=Max('classroomexercises__exercise__updated_at'),
+    )
+    if row['id'] is None:
+        return None
+    return list(row.values()), None
+
+
+async def tests_list_version(request, exercise_id):
+    row = await ExerciseTests.objects.filter(exercise_id=exercise_id).aaggregate(
+        count=Count('id'),
+        links_updated_at=Max('updated_at'),
+        tests_updated_at=Max('test__updated_at'),
+    )
+    return list(row.values()), None
@@ -0,0 +1,154 @@
+"""
+PostgreSQL backend that borrows connections from a psycopg_pool pool.
+
+The stock backend of Django 5.0 opens a connection for every request, a TCP
+and authentication handshake with the server each time. Persistent
+connections (CONN_MAX_AGE) don't help under ASGI, where requests don't
+reliably run on the same thread and every thread keeps its own connection.
+
+With OPTIONS['pool'] set, connections come from a pool shared by all threads
+of the process. Closing one at the end of a request hands it back open, so
+the next request skips the handshake. Statements psycopg prepared on it stay
+prepared too: with server-side binding and a prepare_threshold, the queries
+the lab views run over and over are parsed and planned once per connection.
+
+    DATABASES = {'default': {
+        'ENGINE': 'lab.db.postgresql_pool',
+        ...
+        'CONN_HEALTH_CHECKS': True,  # Check a connection when it leaves the pool
+        'OPTIONS': {
+            'pool': {'min_size': 2, 'max_size': 10},  # psycopg_pool.ConnectionPool arguments, or True
+            'server_side_binding': True,
+            'prepare_threshold': 2,  # Prepare a query the second time a connection runs it
+            'prepared_max': 100,  # Prepared statements kept per connection
+        },
+    }}
+
+Without OPTIONS['pool'] this is the stock backend (prepared_max still
+applies). The options follow the pooling built into Django 5.1, so upgrading
+only means switching ENGINE back to django.db.backends.postgresql.
+"""
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base, creation
+from django.db.backends.postgresql.psycopg_any import IsolationLevel, register_tzloader
+from django.utils.asyncio import async_unsafe
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    # The test runner switches NAME between the database and the test
+    # database; a pool left open would keep connecting to the old one, and
+    # its idle connections would keep the test database from being dropped
+
+    def create_test_db(self, *args, **kwargs):
+        self.connection.close_pool()
+        return super().create_test_db(*args, **kwargs)
+
+    def destroy_test_db(self, *args, **kwargs):
+        self.connection.close_pool()
+        return super().destroy_test_db(*args, **kwargs)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    # Pools by alias, shared by the wrappers of all threads
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        options = self.settings_dict['OPTIONS'].get('pool')
+        if self.alias == NO_DB_ALIAS or not options:
+            return None
+        if self.alias not in self._pools:
+            with self._pools_lock:
+                if self.alias not in self._pools:
+                    self._pools[self.alias] = self._create_pool({} if options is True else options)
+        return self._pools[self.alias]
+
+    def close_pool(self):
+        self.close()
+        with self._pools_lock:
+            pool = self._pools.pop(self.alias, None)
+        if pool is not None:
+            pool.close()
+
+    def _create_pool(self, options):
+        if self.settings_dict['CONN_MAX_AGE'] != 0:
+            raise ImproperlyConfigured(
+                'Pooled connections go back to the pool after every request, set CONN_MAX_AGE to 0'
+            )
+        try:
+            from psycopg_pool import ConnectionPool
+        except ImportError as e:
+            raise ImproperlyConfigured("OPTIONS['pool'] needs the psycopg-pool package") from e
+
+        params = self.get_connection_params()
+        # Django turns autocommit off itself when it needs to
+        params['autocommit'] = True
+        return ConnectionPool(
+            kwargs=params,
+            open=True,
+            name=self.alias,
+            configure=self._configure_connection,
+            **{
+                'check': ConnectionPool.check_connection if self.settings_dict['CONN_HEALTH_CHECKS'] else None,
+                **options,
+            },
+        )
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pool', None)
+        params.pop('prepared_max', None)
+        return params
+
+    def _configure_connection(self, connection):
+        prepared_max = self.settings_dict['OPTIONS'].get('prepared_max')
+        if prepared_max is not None:
+            connection.prepared_max = prepared_max
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            connection = super().get_new_connection(conn_params)
+            self._configure_connection(connection)
+            return connection
+
+        # As in the stock backend, the isolation level is set before Django
+        # switches autocommit
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        try:
+            self.isolation_level = IsolationLevel(
+                IsolationLevel.READ_COMMITTED if isolation_level is None else isolation_level
+            )
+        except ValueError:
+            raise ImproperlyConfigured(
+                f"Invalid transaction isolation level {isolation_level} "
+                f"specified. Use one of the psycopg.IsolationLevel values."
+            )
+        connection = pool.getconn()
+        if isolation_level is not None:
+            connection.isolation_level = self.isolation_level
+        # The pool connected with the parameters of the wrapper that created
+        # it; give the connection what the stock backend would connect with
+        # now (settings such as USE_TZ and TIME_ZONE can have changed since)
+        register_tzloader(self.timezone, connection)
+        connection.cursor_factory = conn_params['cursor_factory']
+        connection.prepare_threshold = conn_params['prepare_threshold']
+        return connection
+
+    def _close(self):
+        pool = self.pool
+        if self.connection is None or pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            # Back to the pool, still open; psycopg_pool rolls back a
+            # transaction left open on it
+            pool.putconn(self.connection)
+        # Not ours any more, even inside an atomic block
+        self.connection = None
@@ -0,0 +1,220 @@
+"""
+Read replicas for read-heavy views.
+
+Writes always go to the primary ('default'). Reads go to a replica only
+inside views decorated with @read_replica, and only when:
+
+- the request hasn't written anything yet (request-scoped read-your-writes);
+- the client hasn't written anything in the last STICKY_SECONDS. After a
+  request that writes, ReplicaStickinessMiddleware sets a cookie that keeps
+  the client's reads on the primary until its writes have reached the
+  replicas;
+- no transaction is open on the primary.
+
+A request sticks to one replica, picked at random from ALIASES, so its reads
+see a single point in time.
+
+Don't opt in views whose responses are cached for everyone (lab/payload_cache.py):
+a lagging replica could refill the cache with stale data right after an
+invalidation. Views that poll for progress made by someone else (deletion
+jobs) stay on the primary too.
+
+    DATABASE_ROUTERS = ['lab.db.routers.ReplicaRouter']
+    READ_REPLICAS = {'ALIASES': ['replica1'], 'STICKY_SECONDS': 5}
+
+Without ALIASES every read goes to the primary.
+"""
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+DEFAULTS = {
+    'ALIASES': [],
+    'STICKY_SECONDS': 5,  # Seconds a client reads from the primary after writing
+    'COOKIE_NAME': 'read_primary_until',
+}
+
+# The replica reads of the running view go to, or None for the primary
+_replica = ContextVar('replica', default=None)
+# _RequestState of the running request, set by ReplicaStickinessMiddleware
+_request_state = ContextVar('replica_request_state', default=None)
+
+
+def replica_setting(name):
+    return getattr(settings, 'READ_REPLICAS', {}).get(name, DEFAULTS[name])
+
+
+class _RequestState:
+    """
+    Mutable, so writes made in threads running the request's sync code (which
+    get a copy of the context) are seen by the middleware.
+    """
+
+    def __init__(self, pinned):
+        self.pinned = pinned  # The client wrote recently
+        self.wrote = False  # This request wrote
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _replica.get()
+        if alias is None:
+            return None
+        state = _request_state.get()
+        if state is not None and state.wrote:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+        # Explicitly, or instances read from a replica would be saved there
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_setting('ALIASES')}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get the schema from the primary
+        if db in replica_setting('ALIASES'):
+            return False
+        return None
+
+
+def _choose_replica():
+    aliases = replica_setting('ALIASES')
+    state = _request_state.get()
+    if not aliases or (state is not None and state.pinned):
+        return None
+    return random.choice(aliases)
+
+
+def _stream(chunks, alias):
+    # Streamed responses query the database after the view has returned
+    chunks = iter(chunks)
+    while True:
+        token = _replica.set(alias)
+        try:
+            chunk = next(chunks, None)
+        finally:
+            _replica.reset(token)
+        if chunk is None:
+            return
+        yield chunk
+
+
+async def _astream(chunks, alias):
+    chunks = aiter(chunks)
+    while True:
+        token = _replica.set(alias)
+        try:
+            chunk = await anext(chunks, None)
+        finally:
+            _replica.reset(token)
+        if chunk is None:
+            return
+        yield chunk
+
+
+def _stream_from(response, alias):
+    if alias is not None and response.streaming:
+        if response.is_async:
+            response.streaming_content = _astream(response.streaming_content, alias)
+        else:
+            response.streaming_content = _stream(response.streaming_content, alias)
+    return response
+
+
+def read_replica(view):
+    """
+    Decorator letting a view's reads go to a replica; see the module
+    docstring. Works on sync and async views, below @api_view or
+    @async_api_view.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            alias = _choose_replica()
+            token = _replica.set(alias)
+            try:
+                response = await view(request, *args, **kwargs)
+            finally:
+                _replica.reset(token)
+            return _stream_from(response, alias)
+    else:
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            alias = _choose_replica()
+            token = _replica.set(alias)
+            try:
+                response = view(request, *args, **kwargs)
+            finally:
+                _replica.reset(token)
+            return _stream_from(response, alias)
+    return inner
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Tracks whether a request writes and keeps clients that wrote reading from
+    the primary for STICKY_SECONDS, through a cookie.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = self.request_state(request)
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        return self.process_response(state, response)
+
+    async def __acall__(self, request):
+        state = self.request_state(request)
+        token = _request_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        return self.process_response(state, response)
+
+    def request_state(self, request):
+        try:
+            pinned = float(request.COOKIES.get(replica_setting('COOKIE_NAME'), 0)) > time.time()
+        except ValueError:
+            pinned = False
+        return _RequestState(pinned)
+
+    def process_response(self, state, response):
+        if state.wrote and replica_setting('ALIASES'):
+            sticky_seconds = replica_setting('STICKY_SECONDS')
+            response.set_cookie(
+                replica_setting('COOKIE_NAME'),
+                f'{time.time() + sticky_seconds:.3f}',
+                max_age=sticky_seconds,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite=settings.SESSION_COOKIE_SAMESITE,
+            )
+        return response
@@ -0,0 +1,255 @@
+"""
+Set-based deletion of classrooms.
+
+Deleting model instances one by one makes Django's collector load every
+dependent row into memory to cascade and send signals. Here each table is
+cleared with a single DELETE ... WHERE ... IN (subquery), children before
+parents, so the cost is one statement per table no matter how many
+submissions a classroom has. The only delete signals in these tables release
+code blob references, which is done here with one statement per distinct
+reference count instead.
+
+Classrooms with many submissions are deleted by a background job instead,
+a batch of exercises per transaction, so the request returns right away and
+the job's progress can be polled. The runner renews a heartbeat on the job
+with every batch; a job whose heartbeat is older than LEASE_SECONDS is
+considered abandoned and can be resumed (run_classroom_deletions --resume).
+"""
+import logging
+import threading
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, Exists, OuterRef, Q
+from django.utils import timezone
+
+from . import payload_cache
+from .models import (
+    ClassroomDeletionJobs, ClassroomExercises, ClassroomUsers, Classrooms, CodeBlobs, Exercises,
+    ExerciseTests, SubmissionResults, SubmissionTestResults, Submissions, SubmissionVersions, Tests,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BACKGROUND_THRESHOLD': 5000,
+    'BATCH_EXERCISES': 20,
+    'LEASE_SECONDS': 10 * 60,  # A running job without a heartbeat for this long can be resumed
+}
+
+
+def deletion_setting(name):
+    return getattr(settings, 'CLASSROOM_DELETION', {}).get(name, DEFAULTS[name])
+
+
+def _raw_delete(queryset):
+    # Skips the collector: no rows are fetched and no signals are sent
+    return queryset._raw_delete(queryset.db)
+
+
+def classroom_exercise_ids(classroom_id):
+    return list(
+        ClassroomExercises.objects.filter(classroom_id=classroom_id)
+        .order_by('exercise_id')
+        .values_list('exercise_id', flat=True)
+        .distinct()
+    )
+
+
+def delete_exercises(exercise_ids):
+    """
+    Deletes exercises with their submissions, results, links and the tests
+    no other exercise uses. Call inside a transaction.
+    Returns the number of deleted rows per table.
+    """
+    exercise_ids = list(exercise_ids)
+    if not exercise_ids:
+        return {}
+
+    # Tests only linked to the deleted exercises
+    orphan_test_ids = list(
+        Tests.objects.filter(exercisetests__exercise_id__in=exercise_ids).filter(
+            ~Exists(ExerciseTests.objects.filter(test=OuterRef('pk')).exclude(exercise_id__in=exercise_ids))
+        ).values_list('id', flat=True).distinct()
+    )
+    submissions = Submissions.objects.filter(exercise_id__in=exercise_ids).values('id')
+
+    # Raw deletes send no signals, so cached payloads are dropped here
+    classroom_ids = list(
+        ClassroomExercises.objects.filter(exercise_id__in=exercise_ids).values_list('classroom_id', flat=True).distinct()
+    )
+    transaction.on_commit(lambda: _invalidate_payloads(exercise_ids, classroom_ids))
+
+    released_code_blobs = _code_blob_counts(
+        Submissions.objects.filter(exercise_id__in=exercise_ids), 'submitted_code_blob'
+    ) + _code_blob_counts(Exercises.objects.filter(id__in=exercise_ids), 'code_blob')
+
+    deleted = {
+        'submission_test_results': _raw_delete(SubmissionTestResults.objects.filter(
+            Q(submission_id__in=submissions) | Q(test_id__in=orphan_test_ids)
+        )),
+        'submission_results': _raw_delete(SubmissionResults.objects.filter(submission_id__in=submissions)),
+        'submission_versions': _raw_delete(SubmissionVersions.objects.filter(submission_id__in=submissions)),
+        'submissions': _raw_delete(Submissions.objects.filter(exercise_id__in=exercise_ids)),
+        'exercise_tests': _raw_delete(ExerciseTests.objects.filter(exercise_id__in=exercise_ids)),
+        'tests': _raw_delete(Tests.objects.filter(id__in=orphan_test_ids)),
+        'classroom_exercises': _raw_delete(ClassroomExercises.objects.filter(exercise_id__in=exercise_ids)),
+        'exercises': _raw_delete(Exercises.objects.filter(id__in=exercise_ids)),
+    }
+    CodeBlobs.release(released_code_blobs)
+    return deleted
+
+
+def _code_blob_counts(queryset, field):
+    return Counter(dict(
+        queryset.exclude(**{field: None}).values_list(field).annotate(count=Count('pk')).order_by()
+    ))
+
+
+def _invalidate_payloads(exercise_ids, classroom_ids):
+    payload_cache.invalidate_exercise_details(exercise_ids)
+    payload_cache.invalidate_tests_lists(exercise_ids)
+    payload_cache.invalidate_exercise_lists(classroom_ids)
+
+
+def _delete_classroom_rows(classroom_id):
+    return {
+        'classroom_exercises': _raw_delete(ClassroomExercises.objects.filter(classroom_id=classroom_id)),
+        'classroom_users': _raw_delete(ClassroomUsers.objects.filter(classroom_id=classroom_id)),
+        'classrooms': _raw_delete(Classrooms.objects.filter(id=classroom_id)),
+    }
+
+
+def delete_classroom(classroom_id):
+    """
+    Deletes a classroom, its exercises and everything that depends on them
+    in one transaction. Returns the number of deleted rows per table.
+    """
+    with transaction.atomic():
+        deleted = delete_exercises(classroom_exercise_ids(classroom_id))
+        for table, count in _delete_classroom_rows(classroom_id).items():
+            deleted[table] = deleted.get(table, 0) + count
+    return deleted
+
+
+def needs_background_deletion(classroom_id):
+    """
+    True if the classroom has more submissions than one request should delete.
+    """
+    threshold = deletion_setting('BACKGROUND_THRESHOLD')
+    submissions = Submissions.objects.filter(
+        exercise_id__in=ClassroomExercises.objects.filter(classroom_id=classroom_id).values('exercise_id')
+    )
+    return submissions[threshold:threshold + 1].exists()
+
+
+def start_deletion_job(classroom, user):
+    """
+    Queues the deletion of a classroom and runs it in a background thread once
+    the current transaction commits. A classroom already being deleted returns
+    its existing job.
+    """
+    job = ClassroomDeletionJobs.objects.filter(
+        classroom_id=classroom.id, status__in=['queued', 'running']
+    ).first()
+    if job is not None:
+        return job
+
+    job = ClassroomDeletionJobs.objects.create(
+        classroom_id=classroom.id,
+        classroom_slug=classroom.slug,
+        requested_by=user,
+        total_exercises=len(classroom_exercise_ids(classroom.id)),
+    )
+    transaction.on_commit(lambda: threading.Thread(
+        target=_run_in_thread, args=(job.id,), name=f'delete-classroom-{classroom.id}', daemon=True
+    ).start())
+    return job
+
+
+def _run_in_thread(job_id):
+    close_old_connections()
+    try:
+        run_deletion_job(job_id)
+    finally:
+        connection.close()
+
+
+def _claim_job(job_id, resume):
+    """
+    Marks a queued job (or, with resume, an abandoned running one) as running
+    by the caller. Returns the heartbeat it was claimed with, or None if the
+    job isn't available.
+    """
+    claimable = Q(status='queued')
+    if resume:
+        expired = timezone.now() - timedelta(seconds=deletion_setting('LEASE_SECONDS'))
+        claimable |= Q(status='running') & (Q(heartbeat_at__lt=expired) | Q(heartbeat_at=None))
+    with transaction.atomic():
+        # A job locked by another claim is skipped rather than waited for
+        job = ClassroomDeletionJobs.objects.select_for_update(skip_locked=True).filter(
+            claimable, id=job_id
+        ).first()
+        if job is None:
+            return None
+        heartbeat = timezone.now()
+        ClassroomDeletionJobs.objects.filter(id=job_id).update(status='running', heartbeat_at=heartbeat)
+    return heartbeat
+
+
+def run_deletion_job(job_id, resume=False):
+    """
+    Deletes a queued classroom a batch of exercises at a time, recording
+    progress on the job after each batch. With resume=True a running job whose
+    heartbeat expired (e.g. its server was restarted) is picked up as well.
+    Returns False if the job was already taken by another runner.
+    """
+    heartbeat = _claim_job(job_id, resume)
+    if heartbeat is None:
+        return False
+
+    job = ClassroomDeletionJobs.objects.get(id=job_id)
+    batch_size = deletion_setting('BATCH_EXERCISES')
+    try:
+        while True:
+            with transaction.atomic():
+                # Renew the heartbeat, unless another runner took the job over
+                # after it expired; the row stays locked until the batch commits
+                previous, heartbeat = heartbeat, timezone.now()
+                if not ClassroomDeletionJobs.objects.filter(id=job_id, heartbeat_at=previous).update(
+                    heartbeat_at=heartbeat
+                ):
+                    logger.warning("Deletion of classroom %s was taken over by another runner", job.classroom_slug)
+                    return True
+                batch = classroom_exercise_ids(job.classroom_id)[:batch_size]
+                if not batch:
+                    _delete_classroom_rows(job.classroom_id)
+                    job.status = 'done'
+                    job.save(update_fields=['status', 'updated_at'])
+                    break
+                delete_exercises(batch)
+                job.deleted_exercises += len(batch)
+                job.save(update_fields=['deleted_exercises', 'updated_at'])
+    except Exception as e:
+        logger.exception("Deleting classroom %s failed", job.classroom_slug)
+        ClassroomDeletionJobs.objects.filter(id=job_id).update(status='failed', error=str(e))
+        return True
+
+    logger.info("Deleted classroom %s (%s exercises)", job.classroom_slug, job.deleted_exercises)
+    return True
+
+
+def job_payload(job):
+    return {
+        'id': str(job.id),
+        'classroom_slug': job.classroom_slug,
+        'status': job.status,
+        'total_exercises': job.total_exercises,
+        'deleted_exercises': job.deleted_exercises,
+        'progress': job.deleted_exercises / job.total_exercises if job.total_exercises else float(job.status == 'done'),
+        'error': job.error,
+        'created_at': job.created_at.isoformat(),
+        'updated_at': job.updated_at.isoformat(),
+    }
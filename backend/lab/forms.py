@@ -2,6 +2,11 @@ from django import forms
 from .models import Classrooms, Exercises
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import Group
+from django.db import IntegrityError, transaction
+from .accounts import users_by_email, next_free_username, username_base
+
+# Attempts to save a new user when a concurrent signup takes the same username
+USERNAME_RETRIES = 3
 
 
 class ClassroomForm(forms.ModelForm):
@@ -60,8 +65,8 @@ class EmailSignUpForm(UserCreationForm):
     def clean_email(self):
         email = self.cleaned_data.get('email')
         if email:
-            # Check if any user exists with this email
-            if self._meta.model.objects.filter(email=email).exists():
+            # Check if any user exists with this email (case-insensitive, like login)
+            if users_by_email(self._meta.model, email).exists():
                 raise forms.ValidationError('A user with this email already exists.')
         return email
 
@@ -70,15 +75,8 @@ class EmailSignUpForm(UserCreationForm):
         email = cleaned_data.get('email')
         
         if email:
-            # Generate username from email
-            username = email.split('@')[0]
-            base_username = username
-            counter = 1
-            
-            # Ensure unique username
-            while self._meta.model.objects.filter(username=username).exists():
-                username = f"{base_username}{counter}"
-                counter += 1
+            # Generate a unique username from the email (one query, see lab/accounts.py)
+            username = next_free_username(self._meta.model, username_base(email))
             
             # Set both the form field and cleaned_data
             self.instance.username = username  # Set it on the instance
@@ -93,10 +91,23 @@ class EmailSignUpForm(UserCreationForm):
         user.email = self.cleaned_data['email']
         
         if commit:
-            user.save()
             # Assign user to appropriate group based on role
             role = self.cleaned_data['role']
             group_name = 'Teachers' if role == 'teacher' else 'Students'
             group = Group.objects.get(name=group_name)
-            user.groups.add(group)
+            
+            for attempt in range(USERNAME_RETRIES):
+                try:
+                    with transaction.atomic():
+                        user.save()
+                        user.groups.add(group)
+                    break
+                except IntegrityError:
+                    # Retry with the next free username if a concurrent signup took this one
+                    base_username = username_base(self.cleaned_data['email'])
+                    if attempt == USERNAME_RETRIES - 1 or not self._meta.model.objects.filter(username=user.username).exists():
+                        raise
+                    user.pk = None
+                    user.username = next_free_username(self._meta.model, base_username)
+                    self.cleaned_data['username'] = user.username
         return user
\ No newline at end of file
@@ -0,0 +1,376 @@
+"""
+Server-side grading of submissions.
+
+Submitted code runs in a pool of pre-started sandbox workers (see
+lab/grading_worker.py). Each worker is a plain Python process that forks a
+fresh, rlimit-constrained child per run, so a run only pays for a fork instead
+of a full interpreter start-up. The captured output is then checked against the
+exercise's tests with the same rules the browser uses in
+frontend/services/pyodide.ts.
+
+Workers get an environment holding nothing but PATH, and every run executes as
+SANDBOX_USER without network access, in an empty read-only directory, with
+HIDDEN_PATHS (the project's code and settings, temporary directories) replaced
+by empty ones. That needs the server to run as root (or with CAP_SYS_ADMIN and
+CAP_SETUID); where the sandbox can't be set up, grading raises
+GraderUnavailable instead of running code unconfined.
+"""
+import atexit
+import hashlib
+import json
+import logging
+import os
+import pwd
+import queue
+import select
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+
+from . import grading_cache
+from .models import Tests, ExerciseTests, SubmissionResults, SubmissionTestResults
+
+logger = logging.getLogger(__name__)
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'grading_worker.py')
+
+DEFAULTS = {
+    'POOL_SIZE': 4,
+    'CPU_SECONDS': 2,
+    'WALL_SECONDS': 5,
+    'MEMORY_MB': 256,
+    'MAX_OUTPUT_BYTES': 64 * 1024,
+    'SANDBOX_USER': 'nobody',
+    'HIDDEN_PATHS': [str(settings.BASE_DIR), '/home', '/run', '/var/tmp', '/dev/shm'],
+}
+
+# Empty, read-only working directory of every run
+SANDBOX_WORKDIR = '/tmp'
+
+# The only environment variable workers get
+WORKER_ENV = {'PATH': os.defpath}
+
+# Extra time the pool waits for a worker reply on top of the wall limit
+REPLY_GRACE_SECONDS = 5
+
+# Submissions handled per query/upsert when regrading
+REGRADE_BATCH_SIZE = 500
+
+
+def grading_setting(name):
+    return getattr(settings, 'GRADING', {}).get(name, DEFAULTS[name])
+
+
+def code_hash(code):
+    return hashlib.sha256(code.encode('utf-8')).hexdigest()
+
+
+def check_output(test_type, expected_output, output):
+    """
+    Returns True if the output passes a test.
+    Mirrors the checks done in the browser by frontend/services/pyodide.ts.
+    """
+    if test_type == 'exact':
+        return output.strip() == expected_output.strip()
+    return expected_output in output
+
+
+class GraderUnavailable(Exception):
+    pass
+
+
+def sandbox_config():
+    try:
+        user = pwd.getpwnam(grading_setting('SANDBOX_USER'))
+    except KeyError:
+        raise GraderUnavailable(f"Sandbox user {grading_setting('SANDBOX_USER')!r} does not exist")
+    if user.pw_uid == 0:
+        raise GraderUnavailable('The sandbox user must not be root')
+    return {
+        'uid': user.pw_uid,
+        'gid': user.pw_gid,
+        'workdir': SANDBOX_WORKDIR,
+        'hidden_paths': list(grading_setting('HIDDEN_PATHS')),
+    }
+
+
+class _Worker:
+    def __init__(self, sandbox):
+        self.process = subprocess.Popen(
+            [sys.executable, '-I', '-S', WORKER_SCRIPT, json.dumps(sandbox)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            close_fds=True,
+            start_new_session=True,
+            env=WORKER_ENV,
+            cwd='/',
+        )
+        self._buffer = b''
+        # The worker first reports whether runs can be sandboxed
+        try:
+            reason = json.loads(self._read_line(REPLY_GRACE_SECONDS))['sandbox_error']
+        except (GraderUnavailable, OSError, ValueError, KeyError) as e:
+            self.kill()
+            raise GraderUnavailable(f'Grading worker failed to start: {e}')
+        if reason is not None:
+            self.kill()
+            raise GraderUnavailable(f'Grading sandbox unavailable: {reason}')
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def run(self, job, timeout):
+        self.process.stdin.write(json.dumps(job).encode('utf-8') + b'\n')
+        self.process.stdin.flush()
+        return json.loads(self._read_line(timeout))
+
+    def _read_line(self, timeout):
+        fd = self.process.stdout.fileno()
+        deadline = time.monotonic() + timeout
+        while b'\n' not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise GraderUnavailable('Grading worker did not respond in time')
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                continue
+            data = os.read(fd, 65536)
+            if not data:
+                raise GraderUnavailable('Grading worker exited unexpectedly')
+            self._buffer += data
+        line, self._buffer = self._buffer.split(b'\n', 1)
+        return line
+
+    def kill(self):
+        try:
+            self.process.kill()
+            self.process.wait(timeout=1)
+        except Exception:
+            pass
+
+
+class GradingPool:
+    """
+    A fixed-size pool of sandbox workers shared by all threads of a process.
+    """
+
+    def __init__(self, size=None):
+        self.size = size or grading_setting('POOL_SIZE')
+        self.pid = os.getpid()
+        self.sandbox = sandbox_config()
+        # LIFO so the most recently used (warmest) worker is handed out first
+        self._idle = queue.LifoQueue()
+        try:
+            for _ in range(self.size):
+                self._idle.put(_Worker(self.sandbox))
+        except GraderUnavailable:
+            self.close()
+            raise
+
+    def _job(self, code):
+        return {
+            'code': code,
+            'cpu_seconds': grading_setting('CPU_SECONDS'),
+            'wall_seconds': grading_setting('WALL_SECONDS'),
+            'memory_bytes': grading_setting('MEMORY_MB') * 1024 * 1024,
+            'max_output': grading_setting('MAX_OUTPUT_BYTES'),
+        }
+
+    def run(self, code):
+        """
+        Runs code in a sandbox and returns {'output': str, 'error': str, 'finished': bool}.
+        'finished' is false when the run was cut short by the wall clock.
+        Raises GraderUnavailable if the code can't be sandboxed or the worker fails.
+        """
+        worker = self._idle.get()
+        try:
+            if not worker.alive():
+                # Raises GraderUnavailable if the sandbox stopped working
+                worker = _Worker(self.sandbox)
+            timeout = grading_setting('WALL_SECONDS') + REPLY_GRACE_SECONDS
+            result = worker.run(self._job(code), timeout)
+        except (GraderUnavailable, OSError, ValueError) as e:
+            # The worker is in an unknown state, it's replaced on next use
+            logger.error("Grading worker failed: %s", str(e))
+            worker.kill()
+            raise GraderUnavailable(f'Grading worker failed: {e}')
+        finally:
+            self._idle.put(worker)
+        if 'sandbox_error' in result:
+            raise GraderUnavailable(f"Grading sandbox unavailable: {result['sandbox_error']}")
+        return result
+
+    def run_many(self, codes):
+        """
+        Runs several pieces of code concurrently, one per idle worker.
+        """
+        codes = list(codes)
+        if len(codes) <= 1:
+            return [self.run(code) for code in codes]
+        with ThreadPoolExecutor(max_workers=min(self.size, len(codes))) as executor:
+            return list(executor.map(self.run, codes))
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().kill()
+            except queue.Empty:
+                break
+
+
+_pool = None
+_pool_error = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Returns the process-wide grading pool, starting it on first use.
+    Raises GraderUnavailable if the sandbox can't be set up in this process.
+    """
+    global _pool, _pool_error
+    with _pool_lock:
+        # Workers are not shared across a fork (e.g. gunicorn --preload)
+        if _pool is None or _pool.pid != os.getpid():
+            # Don't start workers again on every request once the sandbox failed
+            if _pool_error is not None and _pool_error[0] == os.getpid():
+                raise GraderUnavailable(_pool_error[1])
+            try:
+                _pool = GradingPool()
+            except GraderUnavailable as e:
+                _pool_error = (os.getpid(), str(e))
+                logger.error("Server-side grading disabled: %s", str(e))
+                raise
+        return _pool
+
+
+@atexit.register
+def _close_pool():
+    if _pool is not None and _pool.pid == os.getpid():
+        _pool.close()
+
+
+def get_exercise_tests(exercise_id):
+    return list(
+        Tests.objects.filter(exercisetests__exercise_id=exercise_id)
+        .only('id', 'name', 'test_type', 'expected_output')
+        .order_by('id')
+    )
+
+
+def save_results(submission, graded_hash, run, tests, passed):
+    """
+    Stores the run and per-test results of a submission, replacing earlier ones.
+    """
+    with transaction.atomic():
+        SubmissionResults.objects.update_or_create(
+            submission=submission,
+            defaults={
+                'code_hash': graded_hash,
+                'output': run['output'],
+                'error': run['error'],
+            }
+        )
+        SubmissionTestResults.objects.filter(submission=submission).exclude(
+            test_id__in=[test.id for test in tests]
+        ).delete()
+        SubmissionTestResults.objects.bulk_create(
+            [
+                SubmissionTestResults(submission=submission, test=test, passed=test_passed)
+                for test, test_passed in zip(tests, passed)
+            ],
+            update_conflicts=True,
+            unique_fields=['submission', 'test'],
+            update_fields=['passed', 'updated_at'],
+        )
+
+
+def results_payload(submission, run, tests, passed, cached=False):
+    return {
+        'submission_id': str(submission.id),
+        'passed': all(passed),
+        'passed_count': sum(passed),
+        'total_count': len(tests),
+        'tests': [
+            {'id': test.id, 'name': test.name, 'passed': test_passed}
+            for test, test_passed in zip(tests, passed)
+        ],
+        'output': run['output'],
+        'error': run['error'],
+        'cached': cached,
+    }
+
+
+def grade_submission(submission):
+    """
+    Runs a submission's code against its exercise's tests and stores the results.
+    Identical code graded against an unchanged suite is served from the grading cache.
+    Runs that didn't finish in the sandbox are returned but neither cached nor stored.
+    Raises GraderUnavailable if the code can't be run.
+    """
+    code = submission.submitted_code
+    graded_hash = code_hash(code)
+    tests = get_exercise_tests(submission.exercise_id)
+    suite = grading_cache.suite_hash(tests)
+
+    entry = grading_cache.lookup(graded_hash, suite)
+    if entry is not None:
+        run = {'output': entry.output, 'error': entry.error}
+        passed = entry.results
+    else:
+        run = get_pool().run(code)
+        passed = [
+            not run['error'] and check_output(test.test_type, test.expected_output, run['output'])
+            for test in tests
+        ]
+        if not run.get('finished'):
+            return results_payload(submission, run, tests, passed)
+        grading_cache.store(graded_hash, suite, run, passed)
+
+    save_results(submission, graded_hash, run, tests, passed)
+    return results_payload(submission, run, tests, passed, cached=entry is not None)
+
+
+def regrade_test(test):
+    """
+    Re-checks a single new or changed test for every graded submission of the
+    exercises it belongs to. Results of the other tests are left untouched.
+
+    Program output only depends on the code, so the test is checked against the
+    output stored when the submission was graded; nothing is executed again.
+    Returns the number of regraded submissions.
+    """
+    graded = SubmissionResults.objects.filter(
+        submission__exercise_id__in=ExerciseTests.objects.filter(test=test).values('exercise_id')
+    ).values_list('submission_id', 'output', 'error')
+
+    regraded = 0
+    batch = []
+    for submission_id, output, error in graded.iterator(chunk_size=REGRADE_BATCH_SIZE):
+        batch.append(SubmissionTestResults(
+            submission_id=submission_id,
+            test=test,
+            passed=not error and check_output(test.test_type, test.expected_output, output),
+        ))
+        if len(batch) >= REGRADE_BATCH_SIZE:
+            regraded += _save_test_results(batch)
+            batch = []
+    if batch:
+        regraded += _save_test_results(batch)
+    return regraded
+
+
+def _save_test_results(batch):
+    SubmissionTestResults.objects.bulk_create(
+        batch,
+        update_conflicts=True,
+        unique_fields=['submission', 'test'],
+        update_fields=['passed', 'updated_at'],
+    )
+    return len(batch)
@@ -0,0 +1,139 @@
+"""
+Content-addressed cache of grading results.
+
+Entries are keyed by (sha256 of the code, sha256 of the test suite), so the same
+code graded against an unchanged suite never runs twice, no matter which
+student submitted it. Entries are evicted by TTL and, above a size cap, least
+recently used first.
+
+Hit and miss counters are kept in Django's cache, so with a shared backend
+(CACHE_URL) they cover all server processes.
+"""
+import hashlib
+import json
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import GradingCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'CACHE_MAX_ENTRIES': 50000,
+    'CACHE_TTL_DAYS': 30,
+    'CACHE_PRUNE_EVERY': 100,  # Prune after this many stores in a process
+}
+
+STATS_KEY_PREFIX = 'lab:grading_cache:stats'
+
+_stores = 0
+_stores_lock = threading.Lock()
+
+
+def cache_setting(name):
+    return getattr(settings, 'GRADING', {}).get(name, DEFAULTS[name])
+
+
+def _count(name):
+    key = f'{STATS_KEY_PREFIX}:{name}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Missing counter; add() loses no increment if another process won the race
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def _count_store():
+    global _stores
+    with _stores_lock:
+        _stores += 1
+        return _stores
+
+
+def suite_hash(tests):
+    """
+    Hashes the parts of a test suite that decide pass/fail, in test id order.
+    """
+    suite = [[test.test_type, test.expected_output] for test in tests]
+    return hashlib.sha256(json.dumps(suite).encode('utf-8')).hexdigest()
+
+
+def lookup(code_hash, suite):
+    """
+    Returns the cached entry for (code_hash, suite) or None, and marks it as used.
+    """
+    entry = GradingCache.objects.filter(code_hash=code_hash, suite_hash=suite).only(
+        'id', 'output', 'error', 'results'
+    ).first()
+    if entry is None:
+        _count('misses')
+        return None
+
+    _count('hits')
+    GradingCache.objects.filter(id=entry.id).update(hits=F('hits') + 1, last_used_at=timezone.now())
+    return entry
+
+
+def store(code_hash, suite, run, passed):
+    GradingCache.objects.bulk_create(
+        [GradingCache(
+            code_hash=code_hash,
+            suite_hash=suite,
+            output=run['output'],
+            error=run['error'],
+            results=list(passed),
+        )],
+        ignore_conflicts=True,
+    )
+    if _count_store() % cache_setting('CACHE_PRUNE_EVERY') == 0:
+        prune()
+
+
+def prune():
+    """
+    Deletes expired entries, then the least recently used ones above the size cap.
+    Returns the number of deleted entries.
+    """
+    cutoff = timezone.now() - timedelta(days=cache_setting('CACHE_TTL_DAYS'))
+    deleted, _ = GradingCache.objects.filter(last_used_at__lt=cutoff).delete()
+
+    max_entries = cache_setting('CACHE_MAX_ENTRIES')
+    overflow = list(
+        GradingCache.objects.order_by('-last_used_at').values_list(
+            'last_used_at', flat=True
+        )[max_entries:max_entries + 1]
+    )
+    if overflow:
+        extra, _ = GradingCache.objects.filter(last_used_at__lte=overflow[0]).delete()
+        deleted += extra
+
+    if deleted:
+        logger.info("Pruned %s grading cache entries", deleted)
+    return deleted
+
+
+def stats():
+    """
+    Hit/miss counters of the lookups plus totals stored in the table.
+    """
+    hits = cache.get(f'{STATS_KEY_PREFIX}:hits', 0)
+    misses = cache.get(f'{STATS_KEY_PREFIX}:misses', 0)
+    totals = GradingCache.objects.aggregate(stored_hits=Sum('hits'))
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / (hits + misses) if hits + misses else 0.0,
+        'entries': GradingCache.objects.count(),
+        'stored_hits': totals['stored_hits'] or 0,
+    }
+
+
+def reset_stats():
+    cache.delete_many([f'{STATS_KEY_PREFIX}:hits', f'{STATS_KEY_PREFIX}:misses'])
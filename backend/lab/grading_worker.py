@@ -0,0 +1,242 @@
+"""
+Sandbox worker used by lab.grading.
+
+This file runs as a standalone script (it does not import Django). The pool
+starts it once per worker and then streams jobs to it as JSON lines on stdin.
+For every job the worker forks a child, isolates it (see _enter_sandbox),
+applies the per-run rlimits, runs the submitted code and sends the captured
+output back as one JSON line on stdout. Forking from an already-running interpreter is what makes a
+run cheap; the child is thrown away after each run so submitted code can never
+leave state behind for the next student.
+
+The sandbox settings arrive as a JSON argument. Before taking jobs the worker
+tries them once in a throwaway child and reports the outcome on its first
+line, so the pool refuses to grade when isolation isn't possible.
+"""
+import ctypes
+import json
+import os
+import resource
+import select
+import signal
+import sys
+import time
+import traceback
+
+CLONE_NEWNS = 0x00020000
+CLONE_NEWNET = 0x40000000
+MS_RDONLY = 0x1
+MS_NOSUID = 0x2
+MS_NODEV = 0x4
+MS_NOEXEC = 0x8
+MS_REC = 0x4000
+MS_PRIVATE = 0x40000
+
+# Exit status of a child that could not enter the sandbox
+SANDBOX_FAILED = 111
+
+_libc = ctypes.CDLL(None, use_errno=True)
+
+
+def _check(result, what):
+    if result != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, f'{what}: {os.strerror(errno)}')
+
+
+def _enter_sandbox(sandbox):
+    """
+    Isolates the calling process: no network, the hidden paths replaced by
+    empty read-only directories, an empty read-only working directory and an
+    unprivileged user. Needs to start as root; raises OSError otherwise.
+    """
+    # A new network namespace has nothing but a loopback interface that is down
+    _check(_libc.unshare(CLONE_NEWNS | CLONE_NEWNET), 'unshare')
+    # Keep the mounts below to this process
+    _check(_libc.mount(None, b'/', None, MS_REC | MS_PRIVATE, None), 'mount /')
+    for path in [sandbox['workdir'], *sandbox['hidden_paths']]:
+        if os.path.isdir(path):
+            _check(_libc.mount(
+                b'tmpfs', path.encode(), b'tmpfs',
+                MS_RDONLY | MS_NOSUID | MS_NODEV | MS_NOEXEC, b'size=4k,mode=555',
+            ), f'mount {path}')
+    os.chdir(sandbox['workdir'])
+    os.setgroups([])
+    os.setgid(sandbox['gid'])
+    os.setuid(sandbox['uid'])
+    if os.getuid() == 0 or os.geteuid() == 0:
+        raise OSError('Could not drop root privileges')
+
+
+def _limit(kind, value, hard_value=None):
+    # Never try to raise an existing hard limit, only tighten it
+    if hard_value is None:
+        hard_value = value
+    _, hard = resource.getrlimit(kind)
+    if hard != resource.RLIM_INFINITY:
+        value = min(value, hard)
+        hard_value = min(hard_value, hard)
+    resource.setrlimit(kind, (value, hard_value))
+
+
+def _run_child(code, sandbox, cpu_seconds, memory_bytes, write_fd):
+    # Child process: isolate, constrain, redirect and execute the submitted code
+    try:
+        try:
+            _enter_sandbox(sandbox)
+        except Exception as e:
+            os.write(write_fd, str(e).encode('utf-8', errors='replace'))
+            os._exit(SANDBOX_FAILED)
+        # Own process group, so anything the code spawns is killed with it
+        os.setpgid(0, 0)
+        # SIGXCPU at the soft limit, SIGKILL one second later
+        _limit(resource.RLIMIT_CPU, cpu_seconds, cpu_seconds + 1)
+        _limit(resource.RLIMIT_AS, memory_bytes)
+        _limit(resource.RLIMIT_NPROC, 0)
+        _limit(resource.RLIMIT_FSIZE, 0)
+        _limit(resource.RLIMIT_CORE, 0)
+
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(write_fd, 1)
+        os.dup2(write_fd, 2)
+        sys.stdin = open(0, 'r', closefd=False)
+        sys.stdout = open(1, 'w', buffering=1, closefd=False)
+        sys.stderr = sys.stdout
+
+        try:
+            exec(compile(code, '<submission>', 'exec'), {'__name__': '__main__'})
+        except MemoryError:
+            print('MemoryError: memory limit exceeded')
+        except BaseException:
+            # Skip this file's frame so students only see their own code
+            etype, value, tb = sys.exc_info()
+            traceback.print_exception(etype, value, tb.tb_next)
+        sys.stdout.flush()
+    finally:
+        os._exit(0)
+
+
+def _kill_and_wait(pid, force):
+    if force:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    result = os.waitpid(pid, 0)
+    # Clean up anything left behind in the child's process group
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+    return result
+
+
+def probe(sandbox):
+    """
+    Enters the sandbox in a throwaway child. Returns None if that works, or
+    the reason it doesn't.
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            _enter_sandbox(sandbox)
+        except BaseException as e:
+            os.write(write_fd, str(e).encode('utf-8', errors='replace'))
+            os._exit(SANDBOX_FAILED)
+        os._exit(0)
+    os.close(write_fd)
+    try:
+        with os.fdopen(read_fd, 'rb') as reader:
+            reason = reader.read().decode('utf-8', errors='replace')
+    finally:
+        _, status = os.waitpid(pid, 0)
+    if os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0:
+        return None
+    return reason or f'Sandbox probe failed with status {status}'
+
+
+def run_job(job, sandbox):
+    code = job.get('code', '')
+    cpu_seconds = int(job['cpu_seconds'])
+    wall_seconds = float(job['wall_seconds'])
+    memory_bytes = int(job['memory_bytes'])
+    max_output = int(job['max_output'])
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        _run_child(code, sandbox, cpu_seconds, memory_bytes, write_fd)
+    os.close(write_fd)
+
+    chunks = []
+    size = 0
+    timed_out = False
+    truncated = False
+    deadline = time.monotonic() + wall_seconds
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                timed_out = True
+                break
+            ready, _, _ = select.select([read_fd], [], [], remaining)
+            if not ready:
+                timed_out = True
+                break
+            data = os.read(read_fd, 65536)
+            if not data:
+                break
+            if size < max_output:
+                chunks.append(data[:max_output - size])
+            size += len(data)
+            if size > max_output:
+                truncated = True
+                break
+    finally:
+        os.close(read_fd)
+
+    _, status = _kill_and_wait(pid, force=timed_out or truncated)
+
+    if os.WIFEXITED(status) and os.WEXITSTATUS(status) == SANDBOX_FAILED:
+        reason = b''.join(chunks).decode('utf-8', errors='replace')
+        return {'output': '', 'error': 'Sandbox unavailable', 'sandbox_error': reason}
+
+    error = ''
+    if timed_out:
+        error = 'Time limit exceeded'
+    elif truncated:
+        error = 'Output limit exceeded'
+    elif os.WIFSIGNALED(status):
+        sig = os.WTERMSIG(status)
+        if sig in (signal.SIGXCPU, signal.SIGKILL):
+            error = 'CPU time limit exceeded'
+        else:
+            error = f'Process killed by signal {sig}'
+
+    return {
+        'output': b''.join(chunks).decode('utf-8', errors='replace'),
+        'error': error,
+        # A wall-clock timeout may come from server load rather than the code
+        'finished': not timed_out,
+    }
+
+
+def main():
+    sandbox = json.loads(sys.argv[1])
+    sys.stdout.write(json.dumps({'sandbox_error': probe(sandbox)}) + '\n')
+    sys.stdout.flush()
+    for line in sys.stdin:
+        try:
+            result = run_job(json.loads(line), sandbox)
+        except Exception as e:
+            result = {'output': '', 'error': f'Worker error: {e}'}
+        sys.stdout.write(json.dumps(result) + '\n')
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
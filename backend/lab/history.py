@@ -0,0 +1,153 @@
+"""
+Version history of submitted code, and autosave by delta.
+
+Every change to a submission's code bumps Submissions.version and appends a
+SubmissionVersions row. Most rows only store a delta against the previous
+version, a list of [start, end, text] edits (replace the previous text's
+characters start:end with text, in ascending order, offsets in Unicode code
+points). Every SNAPSHOT_INTERVAL versions, and whenever the delta would be
+larger than half the code, the full text is stored instead, so any version is
+rebuilt from one snapshot and fewer than SNAPSHOT_INTERVAL deltas, in a
+single query.
+
+The editor autosaves by sending a delta against the version it last saw;
+writes of the whole code (create_submission, update_submission) are diffed
+line by line into a delta here.
+"""
+import difflib
+import zlib
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Subquery
+
+from .models import CodeBlobs, Submissions, SubmissionVersions
+
+DEFAULTS = {
+    'SNAPSHOT_INTERVAL': 20,
+}
+
+
+class DeltaError(ValueError):
+    pass
+
+
+class VersionConflict(Exception):
+    """
+    The code changed since the version a delta was made against.
+    """
+
+    def __init__(self, version):
+        super().__init__(f'The submission is at version {version}')
+        self.version = version
+
+
+def history_setting(name):
+    return getattr(settings, 'SUBMISSION_HISTORY', {}).get(name, DEFAULTS[name])
+
+
+def apply_delta(text, delta):
+    """
+    Applies a [[start, end, text], ...] delta. Raises DeltaError if it is
+    malformed or doesn't fit the text.
+    """
+    if not isinstance(delta, list):
+        raise DeltaError('delta must be a list of [start, end, text] edits')
+    pieces = []
+    position = 0
+    for edit in delta:
+        if not (
+            isinstance(edit, list) and len(edit) == 3
+            and all(type(offset) is int for offset in edit[:2]) and isinstance(edit[2], str)
+        ):
+            raise DeltaError('delta must be a list of [start, end, text] edits')
+        start, end, insert = edit
+        if not position <= start <= end <= len(text):
+            raise DeltaError('delta edits must be in order and within the text')
+        pieces.append(text[position:start])
+        pieces.append(insert)
+        position = end
+    pieces.append(text[position:])
+    return ''.join(pieces)
+
+
+def diff(old, new):
+    """
+    The delta turning old into new, one edit per changed run of lines.
+    """
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    offsets = [0]
+    for line in old_lines:
+        offsets.append(offsets[-1] + len(line))
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    return [
+        [offsets[i1], offsets[i2], ''.join(new_lines[j1:j2])]
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal'
+    ]
+
+
+def save_code(submission, code=None, delta=None, base_version=None):
+    """
+    Stores a new version of a submission's code, given in full or as a delta
+    against base_version, and refreshes submission's code and version.
+    Returns the version, which stays the same if the code didn't change.
+
+    Raises VersionConflict if base_version isn't the current version and
+    DeltaError for a delta that doesn't apply.
+    """
+    with transaction.atomic():
+        # Versions are numbered under the row lock
+        current = Submissions.objects.select_for_update(of=('self',)).select_related(
+            'submitted_code_blob'
+        ).get(pk=submission.pk)
+        if base_version is not None and base_version != current.version:
+            raise VersionConflict(current.version)
+
+        previous = current.submitted_code
+        if delta is not None:
+            code = apply_delta(previous, delta)
+        if code == previous:
+            submission.refresh_from_db(fields=['submitted_code_blob', 'version'])
+            return current.version
+        if delta is None:
+            delta = diff(previous, code)
+
+        current.submitted_code = code
+        current.version += 1
+        current.save(update_fields=['submitted_code', 'version', 'updated_at'])
+
+        interval = history_setting('SNAPSHOT_INTERVAL')
+        snapshot = (
+            current.version % interval == 1 or interval == 1
+            or sum(len(edit[2]) for edit in delta) > len(code) // 2
+        )
+        SubmissionVersions.objects.create(
+            submission=current,
+            version=current.version,
+            snapshot=zlib.compress(code.encode('utf-8')) if snapshot else None,
+            delta=None if snapshot else delta,
+            code_sha256=CodeBlobs.key(code),
+        )
+
+    submission.refresh_from_db(fields=['submitted_code_blob', 'version', 'updated_at'])
+    return current.version
+
+
+def code_at(submission_id, version):
+    """
+    Rebuilds the code of a version. Returns (code, its SubmissionVersions
+    row), or None if there is no such version.
+    """
+    versions = SubmissionVersions.objects.filter(submission_id=submission_id)
+    last_snapshot = versions.filter(version__lte=version, snapshot__isnull=False).order_by('-version')
+    rows = list(versions.filter(
+        version__gte=Subquery(last_snapshot.values('version')[:1]), version__lte=version
+    ).order_by('version'))
+    if not rows or rows[-1].version != version:
+        return None
+
+    code = CodeBlobs.decompress(rows[0].snapshot)
+    for row in rows[1:]:
+        code = apply_delta(code, row.delta)
+    return code, rows[-1]
@@ -0,0 +1,152 @@
+"""
+Idempotency-Key support for POST endpoints.
+
+A client that may send the same request more than once (a retry after a
+timeout, a double click at the deadline) puts the same Idempotency-Key header
+on every attempt. The first attempt runs the view and its response is stored
+under (user, key); later attempts get that response back without the view
+running, marked with Idempotent-Replayed: true, in one indexed query.
+
+- A key reused with a different method, path or body is refused with 422.
+- An attempt arriving while the first one is still running gets 409 and
+  should retry shortly. A request holds its key for LEASE seconds; a key
+  still in flight after that was abandoned (the process running it was
+  killed, e.g. on a worker timeout), and the next attempt runs the view
+  again.
+- 5xx responses are not stored, so a retry after a server error runs again.
+- Keys expire after TTL seconds.
+
+Requests without the header behave as before.
+"""
+import hashlib
+import threading
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import timezone
+
+from .models import IdempotencyKeys
+from .serializers import FastJsonResponse
+
+DEFAULTS = {
+    'TTL': 24 * 60 * 60,  # Seconds a key and its response are kept
+    'LEASE': 60,  # Seconds before an unfinished request counts as abandoned; keep above the worker timeout
+    'PRUNE_EVERY': 100,  # Prune after this many keys are stored in a process
+}
+
+MAX_KEY_LENGTH = IdempotencyKeys._meta.get_field('key').max_length
+
+_stores = 0
+_stores_lock = threading.Lock()
+
+
+def idempotency_setting(name):
+    return getattr(settings, 'IDEMPOTENCY', {}).get(name, DEFAULTS[name])
+
+
+def request_hash(request):
+    digest = hashlib.sha256()
+    for part in (request.method.encode(), request.get_full_path().encode(), request.body):
+        digest.update(hashlib.sha256(part).digest())
+    return digest.hexdigest()
+
+
+def reserve(user, key, fingerprint):
+    """
+    Returns (the key's row, whether this request runs the view). An expired
+    row is replaced, and an abandoned one taken over.
+    """
+    record, created = IdempotencyKeys.objects.get_or_create(
+        user=user, key=key, defaults={'request_hash': fingerprint}
+    )
+    if created:
+        return record, True
+    now = timezone.now()
+    if record.created_at < now - timedelta(seconds=idempotency_setting('TTL')):
+        IdempotencyKeys.objects.filter(id=record.id).delete()
+        return IdempotencyKeys.objects.get_or_create(
+            user=user, key=key, defaults={'request_hash': fingerprint}
+        )
+    if (
+        record.status is None and record.request_hash == fingerprint
+        and record.started_at < now - timedelta(seconds=idempotency_setting('LEASE'))
+    ):
+        # Only one of several concurrent retries wins the takeover
+        if IdempotencyKeys.objects.filter(
+            id=record.id, status=None, started_at=record.started_at
+        ).update(started_at=now):
+            record.started_at = now
+            return record, True
+    return record, False
+
+
+def _owned(record):
+    # The row as long as this request holds it; a request that outlived its
+    # lease and was taken over leaves it to the newer one
+    return IdempotencyKeys.objects.filter(id=record.id, started_at=record.started_at)
+
+
+def store(record, response):
+    global _stores
+    _owned(record).update(status=response.status_code, response=response.content)
+    with _stores_lock:
+        _stores += 1
+        stores = _stores
+    if stores % idempotency_setting('PRUNE_EVERY') == 0:
+        prune()
+
+
+def prune():
+    """
+    Deletes expired keys. Returns the number of deleted keys.
+    """
+    cutoff = timezone.now() - timedelta(seconds=idempotency_setting('TTL'))
+    deleted, _ = IdempotencyKeys.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+def idempotent(view):
+    """
+    Decorator for sync JSON views (below @api_view and @permission_classes,
+    so request.user is authenticated) honouring the Idempotency-Key header.
+    """
+    @wraps(view)
+    def inner(request, *args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if key is None:
+            return view(request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return FastJsonResponse({
+                'error': f'Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters'
+            }, status=400)
+
+        fingerprint = request_hash(request)
+        record, created = reserve(request.user, key, fingerprint)
+        if not created:
+            if record.request_hash != fingerprint:
+                return FastJsonResponse({
+                    'error': 'This Idempotency-Key was already used for a different request'
+                }, status=422)
+            if record.status is None:
+                return FastJsonResponse({
+                    'error': 'A request with this Idempotency-Key is still being processed'
+                }, status=409)
+            response = HttpResponse(bytes(record.response), status=record.status, content_type='application/json')
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+
+        try:
+            response = view(request, *args, **kwargs)
+        except BaseException:
+            _owned(record).delete()
+            raise
+        if response.status_code >= 500 or response.streaming:
+            # Let a retry run the view again
+            _owned(record).delete()
+        else:
+            store(record, response)
+        return response
+
+    return inner
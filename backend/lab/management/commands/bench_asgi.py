@@ -0,0 +1,161 @@
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from lab.deletion import delete_classroom
+from lab.models import ClassroomExercises, Classrooms, Exercises, ExerciseTests, Tests
+from lab.roles import add_role_claim
+from rest_framework_simplejwt.tokens import RefreshToken
+
+BENCH_USERNAME = 'bench-asgi-teacher'
+BENCH_CLASSROOM = 'bench-asgi'
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare read throughput of the WSGI (sync workers) and ASGI (uvicorn workers) '
+        'deployment modes under concurrent, optionally slow, clients. '
+        'Benchmark data is written to the database and deleted afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default='wsgi,asgi', help='Comma-separated SERVER_INTERFACE values')
+        parser.add_argument('--workers', type=int, default=1, help='Gunicorn workers per server')
+        parser.add_argument('--concurrency', type=int, default=50, help='Concurrent clients')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per run')
+        parser.add_argument(
+            '--slow-ms', default='0,200',
+            help='Comma-separated mean delays between the two halves of each request, simulating slow clients',
+        )
+        parser.add_argument('--port', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        token, paths = self.create_data()
+        try:
+            self.stdout.write(
+                f"{options['workers']} worker(s), {options['concurrency']} clients, "
+                f"{options['duration']:g} s per run, paths: {', '.join(paths)}"
+            )
+            self.stdout.write(f"{'mode':<6}{'slow ms':>9}{'requests':>10}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}")
+            for mode in options['modes'].split(','):
+                server = self.start_server(mode, options['port'], options['workers'])
+                try:
+                    for slow_ms in options['slow_ms'].split(','):
+                        result = asyncio.run(self.load(
+                            options['port'], token, paths, options['concurrency'],
+                            options['duration'], int(slow_ms) / 1000,
+                        ))
+                        self.stdout.write(
+                            f"{mode:<6}{slow_ms:>9}{result['requests']:>10}{result['rate']:>9.1f}"
+                            f"{result['p50']:>9.1f}{result['p99']:>9.1f}{result['errors']:>8}"
+                        )
+                finally:
+                    server.terminate()
+                    server.wait(timeout=30)
+        finally:
+            self.delete_data()
+
+    def create_data(self):
+        self.delete_data()
+        user = User.objects.create(username=BENCH_USERNAME)
+        classroom = Classrooms.objects.create(name=BENCH_CLASSROOM, description='', creator_user=user)
+        exercises = []
+        for i in range(10):
+            exercise = Exercises.objects.create(
+                name=f'Exercise {i}', instructions='Print a greeting. ' * 20,
+                code='print("hello")\n' * 10, creator_user=user,
+            )
+            ClassroomExercises.objects.create(classroom=classroom, exercise=exercise)
+            for j in range(3):
+                test = Tests.objects.create(name=f'Test {j}', expected_output='hello')
+                ExerciseTests.objects.create(exercise=exercise, test=test)
+            exercises.append(exercise)
+
+        token = str(add_role_claim(RefreshToken.for_user(user), user).access_token)
+        paths = [
+            f'/api/exercises/{exercises[0].id}/',
+            f'/api/exercises/{exercises[0].id}/tests/',
+            f'/api/classrooms/{classroom.slug}/exercises/',
+        ]
+        return token, paths
+
+    def delete_data(self):
+        for classroom_id in Classrooms.objects.filter(name=BENCH_CLASSROOM).values_list('id', flat=True):
+            delete_classroom(classroom_id)
+        User.objects.filter(username=BENCH_USERNAME).delete()
+
+    def start_server(self, mode, port, workers, **env):
+        env = dict(os.environ, SERVER_INTERFACE=mode, WEB_CONCURRENCY=str(workers), **env)
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}', '--log-level', 'warning'],
+            cwd=settings.BASE_DIR,
+            env=env,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'{mode} server exited with code {server.returncode}')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return server
+            except OSError:
+                time.sleep(0.2)
+        server.kill()
+        raise CommandError(f'{mode} server did not start')
+
+    async def load(self, port, token, paths, concurrency, duration, slow):
+        deadline = time.monotonic() + duration
+        timings = []
+        errors = 0
+
+        async def client(index):
+            nonlocal errors
+            i = index
+            # Spread clients out so their slow requests don't arrive in lockstep
+            await asyncio.sleep(random.uniform(0, slow))
+            while time.monotonic() < deadline:
+                path = paths[i % len(paths)]
+                i += 1
+                start = time.perf_counter()
+                try:
+                    status = await self.request(port, path, token, slow)
+                except OSError:
+                    status = None
+                if status == 200:
+                    timings.append((time.perf_counter() - start) * 1000)
+                else:
+                    errors += 1
+
+        await asyncio.gather(*[client(index) for index in range(concurrency)])
+        timings.sort()
+        return {
+            'requests': len(timings),
+            'rate': len(timings) / duration,
+            'p50': statistics.median(timings) if timings else 0.0,
+            'p99': timings[min(len(timings) - 1, int(len(timings) * 0.99))] if timings else 0.0,
+            'errors': errors,
+        }
+
+    async def request(self, port, path, token, slow):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        try:
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\n'.encode('ascii'))
+            await writer.drain()
+            if slow:
+                # A slow client: the server waits for the rest of the request
+                await asyncio.sleep(random.uniform(0, 2 * slow))
+            writer.write(f'Cookie: access_token={token}\r\nConnection: close\r\n\r\n'.encode('ascii'))
+            await writer.drain()
+            response = await reader.read()
+        finally:
+            writer.close()
+        return int(response.split(b' ', 2)[1]) if response else None
@@ -0,0 +1,58 @@
+import asyncio
+
+from django.core.management.base import CommandError
+from django.db import connection
+
+from lab.management.commands.bench_asgi import Command as BenchAsgiCommand
+
+
+class Command(BenchAsgiCommand):
+    help = (
+        'Compare get_exercise_details latency with a new PostgreSQL connection per request '
+        '(DB_POOL=off) and with pooled connections and prepared statements (DB_POOL=on). '
+        'Benchmark data is written to the database and deleted afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pool', default='off,on', help='Comma-separated DB_POOL values')
+        parser.add_argument('--interface', default='asgi', help='SERVER_INTERFACE of the server')
+        parser.add_argument('--workers', type=int, default=1, help='Gunicorn workers')
+        parser.add_argument('--concurrency', type=int, default=10, help='Concurrent clients')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per run')
+        parser.add_argument('--warmup', type=float, default=2, help='Seconds of requests before each run')
+        parser.add_argument('--port', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('DB_POOL only applies to PostgreSQL')
+
+        token, paths = self.create_data()
+        # get_exercise_details
+        path = paths[0]
+        try:
+            self.stdout.write(
+                f"{options['interface']}, {options['workers']} worker(s), {options['concurrency']} clients, "
+                f"{options['duration']:g} s per run, path: {path}"
+            )
+            self.stdout.write(f"{'pool':<6}{'requests':>10}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}")
+            for pool in options['pool'].split(','):
+                server = self.start_server(
+                    options['interface'], options['port'], options['workers'], DB_POOL=pool
+                )
+                try:
+                    # Fills the pool and prepares the queries, or warms caches for the unpooled run
+                    asyncio.run(self.load(
+                        options['port'], token, [path], options['concurrency'], options['warmup'], 0
+                    ))
+                    result = asyncio.run(self.load(
+                        options['port'], token, [path], options['concurrency'], options['duration'], 0
+                    ))
+                    self.stdout.write(
+                        f"{pool:<6}{result['requests']:>10}{result['rate']:>9.1f}"
+                        f"{result['p50']:>9.1f}{result['p99']:>9.1f}{result['errors']:>8}"
+                    )
+                finally:
+                    server.terminate()
+                    server.wait(timeout=30)
+        finally:
+            self.delete_data()
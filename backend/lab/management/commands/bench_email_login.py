@@ -0,0 +1,76 @@
+import statistics
+import time
+
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from lab.accounts import users_by_email
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure email login latency as the user table grows. '
+        'Benchmark users are created in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000', help='Comma-separated user counts')
+        parser.add_argument('--attempts', type=int, default=200, help='Lookups per size')
+        parser.add_argument('--logins', type=int, default=5, help='Full logins (with password hashing) per size')
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        try:
+            with transaction.atomic():
+                self.run(sizes, options['attempts'], options['logins'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, sizes, attempts, logins):
+        UserModel = get_user_model()
+        # Hash once; every benchmark user shares it
+        password = 'bench-password'
+        hashed = make_password(password)
+
+        created = 0
+        for size in sizes:
+            UserModel.objects.bulk_create(
+                [
+                    UserModel(username=f'bench{i}', email=f'Bench{i}@Example.com', password=hashed)
+                    for i in range(created, size)
+                ],
+                batch_size=5000,
+            )
+            created = size
+
+            step = max(1, size // attempts)
+            known = [f'bench{i}@example.com' for i in range(0, size, step)][:attempts]
+            unknown = [f'missing{i}@example.com' for i in range(attempts)]
+
+            hit = self.time_each(known, lambda email: users_by_email(UserModel, email).get())
+            miss = self.time_each(unknown, lambda email: users_by_email(UserModel, email).first())
+            login = self.time_each(
+                known[:logins], lambda email: authenticate(None, username=email, password=password)
+            )
+            self.stdout.write(
+                f"{size:>8} users | lookup hit p50 {hit[0]:.2f} ms p99 {hit[1]:.2f} ms"
+                f" | lookup miss p50 {miss[0]:.2f} ms p99 {miss[1]:.2f} ms"
+                f" | full login p50 {login[0]:.1f} ms"
+            )
+
+    def time_each(self, items, func):
+        timings = []
+        for item in items:
+            start = time.perf_counter()
+            func(item)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        return statistics.median(timings), p99
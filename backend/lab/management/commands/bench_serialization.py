@@ -0,0 +1,90 @@
+import datetime
+import json
+import statistics
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from lab import serializers
+from lab.models import Submissions
+
+
+class Command(BaseCommand):
+    help = (
+        'Time encoding a page of submissions the old way (fields formatted by hand, json.dumps) '
+        'against the field maps with the standard library and with orjson. Nothing is written '
+        'to the database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--submissions', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        submissions = self.build(options['submissions'])
+
+        encoders = [('hand-built + json', self.encode_by_hand), ('field maps + json', self.encode_json)]
+        if serializers.orjson is not None:
+            encoders.append(('field maps + orjson', self.encode_orjson))
+        else:
+            self.stdout.write('orjson is not installed, skipping it')
+
+        self.stdout.write(f"{options['submissions']} submissions, best of {options['repeat']} runs")
+        self.stdout.write(f"{'encoder':<22}{'best ms':>9}{'median ms':>11}{'bytes':>10}")
+        for name, encode in encoders:
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                body = encode(submissions)
+                timings.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(f"{name:<22}{min(timings):>9.2f}{statistics.median(timings):>11.2f}{len(body):>10}")
+
+    def build(self, count):
+        now = timezone.now()
+        submissions = []
+        for i in range(count):
+            student = User(
+                id=i + 1, username=f'student{i}', first_name='Ada', last_name=f'Student {i}',
+                email=f'student{i}@example.com', date_joined=now - datetime.timedelta(days=30),
+                last_login=now if i % 2 else None,
+            )
+            submissions.append(Submissions(
+                id=uuid.uuid4(), student=student, exercise_id=uuid.uuid4(),
+                status='submitted_by_student', submitted_code='print("hello")\n' * 20,
+                feedback='Looks good', created_at=now, updated_at=now,
+            ))
+        return submissions
+
+    def encode_by_hand(self, submissions):
+        return json.dumps({'submissions': [{
+            'id': str(submission.id),
+            'student': {
+                'id': submission.student.id,
+                'username': submission.student.username,
+                'full_name': f"{submission.student.first_name} {submission.student.last_name}".strip(),
+                'email': submission.student.email,
+                'date_joined': submission.student.date_joined.isoformat(),
+                'last_login': submission.student.last_login.isoformat() if submission.student.last_login else None,
+            },
+            'exercise_id': str(submission.exercise_id),
+            'status': submission.status,
+            'submitted_code': submission.submitted_code,
+            'feedback': submission.feedback,
+            'created_at': submission.created_at.isoformat(),
+            'updated_at': submission.updated_at.isoformat()
+        } for submission in submissions]}).encode('utf-8')
+
+    def encode_json(self, submissions):
+        orjson, serializers.orjson = serializers.orjson, None
+        try:
+            return self.encode_orjson(submissions)
+        finally:
+            serializers.orjson = orjson
+
+    def encode_orjson(self, submissions):
+        return serializers.dumps({'submissions': [
+            serializers.submission_payload(submission) for submission in submissions
+        ]})
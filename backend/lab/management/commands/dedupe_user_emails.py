@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from lab.accounts import deduplicate_emails
+
+
+class Command(BaseCommand):
+    help = (
+        'Clear the email of accounts that share it (case-insensitively) with another account. '
+        'The most recently active account keeps the email.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only list the duplicates')
+
+    def handle(self, *args, **options):
+        duplicates = deduplicate_emails(get_user_model(), dry_run=options['dry_run'])
+        for email, users in duplicates.items():
+            kept, *cleared = users
+            self.stdout.write(
+                f"{email}: kept {kept.username}, cleared {', '.join(user.username for user in cleared)}"
+            )
+        action = 'Would clear' if options['dry_run'] else 'Cleared'
+        cleared_count = sum(len(users) - 1 for users in duplicates.values())
+        self.stdout.write(f"{action} {cleared_count} duplicate emails")
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from lab import grading_cache
+
+
+class Command(BaseCommand):
+    help = 'Show grading cache statistics and optionally evict expired or least recently used entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Evict entries past the TTL and above the size cap',
+        )
+        parser.add_argument(
+            '--reset-stats',
+            action='store_true',
+            help='Reset the hit and miss counters after printing them',
+        )
+
+    def handle(self, *args, **options):
+        if options['prune']:
+            deleted = grading_cache.prune()
+            self.stdout.write(f"Evicted {deleted} entries")
+
+        stats = grading_cache.stats()
+        self.stdout.write(f"Entries: {stats['entries']}")
+        self.stdout.write(f"Hits served from the table: {stats['stored_hits']}")
+        # A process-local backend only holds the counters of this process
+        self.stdout.write(f"Counters kept in: {settings.CACHES['default']['BACKEND']}")
+        self.stdout.write(f"Lookups: {stats['hits']} hits, {stats['misses']} misses")
+        self.stdout.write(f"Hit ratio: {stats['hit_ratio']:.1%}")
+
+        if options['reset_stats']:
+            grading_cache.reset_stats()
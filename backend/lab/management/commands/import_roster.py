@@ -0,0 +1,47 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lab.models import Classrooms
+from lab.roles import get_user_role
+from lab.roster import RosterError, import_roster, parse_roster
+
+
+class Command(BaseCommand):
+    help = (
+        'Enroll students from a CSV or JSON roster into a teacher\'s classroom, creating accounts '
+        'for unknown emails. Existing accounts are only enrolled with --enroll-existing.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('classroom', help='Slug of the classroom')
+        parser.add_argument('roster', help='Path to a .csv or .json roster')
+        parser.add_argument(
+            '--enroll-existing', action='store_true',
+            help='Also enroll emails that belong to existing accounts (after checking they are the right people)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            classroom = Classrooms.objects.get(slug=options['classroom'])
+        except Classrooms.DoesNotExist:
+            raise CommandError(f"Classroom {options['classroom']} not found")
+        if get_user_role(classroom.creator_user) != 'teacher':
+            raise CommandError(f"Classroom {options['classroom']} was not created by a teacher")
+
+        path = Path(options['roster'])
+        roster_format = 'json' if path.suffix.lower() == '.json' else 'csv'
+        try:
+            rows = parse_roster(path.read_text(encoding='utf-8-sig'), roster_format)
+            summary = import_roster(classroom, rows, enroll_existing=options['enroll_existing'])
+        except (OSError, RosterError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f"{summary['students']} students: {summary['created_users']} accounts created, "
+            f"{summary['enrolled']} newly enrolled"
+        )
+        for email in summary['invalid']:
+            self.stderr.write(f"Skipped invalid email: {email}")
+        for email in summary['needs_confirmation']:
+            self.stderr.write(f"Skipped existing account (use --enroll-existing to enroll): {email}")
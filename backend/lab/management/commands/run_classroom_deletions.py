@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from lab.deletion import run_deletion_job
+from lab.models import ClassroomDeletionJobs
+
+
+class Command(BaseCommand):
+    help = 'Runs queued classroom deletion jobs, e.g. after a server restart interrupted them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help="Also pick up 'running' jobs whose heartbeat expired, e.g. because their server stopped",
+        )
+
+    def handle(self, *args, **options):
+        statuses = ['queued', 'running'] if options['resume'] else ['queued']
+        job_ids = ClassroomDeletionJobs.objects.filter(status__in=statuses).order_by('created_at').values_list('id', flat=True)
+        for job_id in list(job_ids):
+            if run_deletion_job(job_id, resume=options['resume']):
+                job = ClassroomDeletionJobs.objects.get(id=job_id)
+                self.stdout.write(f"{job.classroom_slug}: {job.status} ({job.deleted_exercises}/{job.total_exercises} exercises)")
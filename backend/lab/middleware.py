@@ -0,0 +1,195 @@
+"""
+Compression of JSON API responses.
+
+Submission and exercise payloads carry whole source files, which compress
+well. CompressionMiddleware encodes JSON and NDJSON responses with brotli
+(when the brotli package is installed) or gzip, whichever the client prefers
+in Accept-Encoding, and leaves bodies under MIN_SIZE alone because the CPU
+cost isn't worth the few bytes saved. Streamed responses (the submissions
+export) are compressed as they go out, flushed every STREAM_FLUSH_SIZE bytes
+so the client keeps receiving data.
+
+HTML pages are not compressed: they carry CSRF tokens, which compression
+could leak (BREACH).
+
+The middleware runs natively under both WSGI and ASGI.
+"""
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULTS = {
+    'MIN_SIZE': 1024,  # Smaller bodies are sent uncompressed
+    'GZIP_LEVEL': 6,  # 1 (fastest) to 9 (smallest)
+    'BROTLI_QUALITY': 4,  # 0 (fastest) to 11 (smallest)
+    'STREAM_FLUSH_SIZE': 16 * 1024,  # Bytes of a streamed response compressed before sending them
+    'CONTENT_TYPES': ['application/json', 'application/x-ndjson'],
+}
+
+
+def compression_setting(name):
+    return getattr(settings, 'COMPRESSION', {}).get(name, DEFAULTS[name])
+
+
+def accepted_encodings(header):
+    """
+    Parses an Accept-Encoding header into {coding: q-value}.
+    """
+    encodings = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        encodings[coding] = quality
+    return encodings
+
+
+def choose_encoding(request):
+    """
+    The coding to compress the response to request with, or None.
+    Brotli wins ties since it compresses better at a similar speed.
+    """
+    accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    wildcard = accepted.get('*', 0.0)
+    supported = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best, best_quality = None, 0.0
+    for coding in supported:
+        quality = accepted.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class _Compressor:
+    """
+    Incremental compressor with the same interface for both codings.
+    """
+
+    def __init__(self, coding):
+        if coding == 'br':
+            self._brotli = brotli.Compressor(quality=compression_setting('BROTLI_QUALITY'))
+            self._zlib = None
+        else:
+            self._brotli = None
+            # wbits 16 + MAX_WBITS writes a gzip header and trailer
+            self._zlib = zlib.compressobj(compression_setting('GZIP_LEVEL'), zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self._brotli.process(data) if self._brotli else self._zlib.compress(data)
+
+    def flush(self):
+        return self._brotli.flush() if self._brotli else self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._brotli.finish() if self._brotli else self._zlib.flush()
+
+
+def compress(coding, content):
+    compressor = _Compressor(coding)
+    return compressor.compress(content) + compressor.finish()
+
+
+def compress_stream(coding, chunks):
+    compressor = _Compressor(coding)
+    flush_size = compression_setting('STREAM_FLUSH_SIZE')
+    pending = 0
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        pending += len(chunk)
+        if pending >= flush_size:
+            data += compressor.flush()
+            pending = 0
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def acompress_stream(coding, chunks):
+    compressor = _Compressor(coding)
+    flush_size = compression_setting('STREAM_FLUSH_SIZE')
+    pending = 0
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        pending += len(chunk)
+        if pending >= flush_size:
+            data += compressor.flush()
+            pending = 0
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    Compresses JSON responses; see the module docstring.
+    Place it above middleware that reads or changes the response body.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type not in compression_setting('CONTENT_TYPES'):
+            return response
+        if not response.streaming and len(response.content) < compression_setting('MIN_SIZE'):
+            return response
+
+        # The body depends on Accept-Encoding from here on
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        coding = choose_encoding(request)
+        if coding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_stream(coding, response.streaming_content)
+            else:
+                response.streaming_content = compress_stream(coding, response.streaming_content)
+            # The compressed length isn't known in advance
+            del response['Content-Length']
+        else:
+            compressed = compress(coding, response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # The compressed body is no longer byte-for-byte what a strong ETag promised
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+
+        response.headers['Content-Encoding'] = coding
+        return response
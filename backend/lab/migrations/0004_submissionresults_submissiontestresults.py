@@ -0,0 +1,47 @@
+# Generated by Django 5.0.6 on 2026-10-18 20:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0003_rename_test_feedback_tests_expected_output_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionResults',
+            fields=[
+                ('submission', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='result', serialize=False, to='lab.submissions')),
+                ('code_hash', models.CharField(max_length=64)),
+                ('output', models.TextField(blank=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Submission Result',
+                'verbose_name_plural': 'Submission Results',
+                'db_table': 'submission_results',
+            },
+        ),
+        migrations.CreateModel(
+            name='SubmissionTestResults',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('passed', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('submission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='test_results', to='lab.submissions')),
+                ('test', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='lab.tests')),
+            ],
+            options={
+                'verbose_name': 'Submission Test Result',
+                'verbose_name_plural': 'Submission Test Results',
+                'db_table': 'submission_test_results',
+                'unique_together': {('submission', 'test')},
+            },
+        ),
+    ]
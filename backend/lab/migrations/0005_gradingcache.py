@@ -0,0 +1,34 @@
+# Generated by Django 5.0.6 on 2026-10-18 20:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0004_submissionresults_submissiontestresults'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradingCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code_hash', models.CharField(max_length=64)),
+                ('suite_hash', models.CharField(max_length=64)),
+                ('output', models.TextField(blank=True)),
+                ('error', models.TextField(blank=True)),
+                ('results', models.JSONField(default=list)),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Grading Cache Entry',
+                'verbose_name_plural': 'Grading Cache Entries',
+                'db_table': 'grading_cache',
+                'unique_together': {('code_hash', 'suite_hash')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.6 on 2026-10-18 20:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0005_gradingcache'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='classroomexercises',
+            index=models.Index(fields=['classroom', 'created_at', 'id'], name='classroom_exercises_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='classrooms',
+            index=models.Index(fields=['created_at', 'id'], name='classrooms_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exercisetests',
+            index=models.Index(fields=['exercise', 'created_at', 'id'], name='exercise_tests_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submissions',
+            index=models.Index(fields=['exercise', 'created_at', 'id'], name='submissions_keyset_idx'),
+        ),
+    ]
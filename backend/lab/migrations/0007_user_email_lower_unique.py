@@ -0,0 +1,54 @@
+import logging
+
+from django.db import migrations
+from django.db.models import F
+from django.db.models.functions import Lower
+
+logger = logging.getLogger('lab.migrations')
+
+
+def deduplicate_user_emails(apps, schema_editor):
+    # A frozen copy of lab.accounts.deduplicate_emails(), so later changes to
+    # that module can't change what this migration does
+    User = apps.get_model('auth', 'User')
+    users = User.objects.exclude(email='').annotate(email_lower=Lower('email')).order_by(
+        # The account kept per email comes first: most recent login, then oldest account
+        'email_lower', F('last_login').desc(nulls_last=True), 'id'
+    ).values_list('id', 'email', 'email_lower')
+
+    cleared = []
+    kept_id = previous = None
+    for user_id, email, email_lower in users:
+        if email_lower == previous:
+            cleared.append(user_id)
+            # Clearing can't be undone, so every change is logged
+            logger.warning(
+                "Clearing email %r of user %s, a duplicate of user %s", email, user_id, kept_id
+            )
+        else:
+            kept_id = user_id
+        previous = email_lower
+    # Duplicates can still log in with their username
+    User.objects.filter(id__in=cleared).update(email='')
+    if cleared:
+        logger.warning("Cleared %s duplicate emails", len(cleared))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0006_keyset_pagination_indexes'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        # The unique index can't be built while duplicates exist. Cleared emails
+        # are not restored when migrating backwards: they are only in the log.
+        migrations.RunPython(deduplicate_user_emails, migrations.RunPython.noop),
+        # Case-insensitive email login (see lab/backends.py). Accounts without
+        # an email (e.g. created by createsuperuser) are left out of the index.
+        migrations.RunSQL(
+            sql="CREATE UNIQUE INDEX auth_user_email_lower_uniq ON auth_user (LOWER(email)) WHERE email <> ''",
+            reverse_sql="DROP INDEX auth_user_email_lower_uniq",
+        ),
+    ]
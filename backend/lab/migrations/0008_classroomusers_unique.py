@@ -0,0 +1,28 @@
+# Generated by Django 5.0.6 on 2026-10-18 20:14
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Min
+
+
+def delete_duplicate_memberships(apps, schema_editor):
+    # Keep the oldest membership per (classroom, user)
+    ClassroomUsers = apps.get_model('lab', 'ClassroomUsers')
+    kept = ClassroomUsers.objects.values('classroom', 'user').annotate(first_id=Min('id')).values('first_id')
+    ClassroomUsers.objects.exclude(id__in=kept).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0007_user_email_lower_unique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_memberships, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='classroomusers',
+            unique_together={('classroom', 'user')},
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-18 20:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0008_classroomusers_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='classroomexercises',
+            name='assigned',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='classroomexercises',
+            name='due_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.6 on 2026-10-18 20:17
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0009_classroomexercises_assigned'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassroomDeletionJobs',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('classroom_id', models.BigIntegerField(db_index=True)),
+                ('classroom_slug', models.SlugField(max_length=100)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('total_exercises', models.PositiveIntegerField(default=0)),
+                ('deleted_exercises', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('requested_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Classroom Deletion Job',
+                'verbose_name_plural': 'Classroom Deletion Jobs',
+                'db_table': 'classroom_deletion_jobs',
+            },
+        ),
+    ]
@@ -0,0 +1,109 @@
+# Generated by Django 5.0.6 on 2026-10-18 20:35
+
+import hashlib
+import zlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+# Rows moved per round-trip
+BATCH_SIZE = 1000
+
+# (model, text field, blob foreign key)
+CODE_COLUMNS = [
+    ('Submissions', 'submitted_code', 'submitted_code_blob'),
+    ('Exercises', 'code', 'code_blob'),
+]
+
+
+def _reference_count(model, field):
+    references = model.objects.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(count=Count('pk'))
+    return Coalesce(Subquery(references.values('count')), 0)
+
+
+def move_code_to_blobs(apps, schema_editor):
+    CodeBlobs = apps.get_model('lab', 'CodeBlobs')
+    for model_name, text_field, blob_field in CODE_COLUMNS:
+        model = apps.get_model('lab', model_name)
+        attname = model._meta.get_field(blob_field).attname
+        rows = model.objects.exclude(**{text_field: ''}).order_by('pk')
+        last_pk = None
+        while True:
+            batch = rows.filter(pk__gt=last_pk) if last_pk is not None else rows
+            batch = list(batch.values_list('pk', text_field)[:BATCH_SIZE])
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+
+            texts = {}
+            updated = []
+            for pk, text in batch:
+                encoded = text.encode('utf-8')
+                key = hashlib.sha256(encoded).hexdigest()
+                texts[key] = encoded
+                updated.append(model(pk=pk, **{attname: key}))
+            CodeBlobs.objects.bulk_create([
+                CodeBlobs(sha256=key, data=zlib.compress(encoded), size=len(encoded))
+                for key, encoded in texts.items()
+            ], ignore_conflicts=True)
+            model.objects.bulk_update(updated, [blob_field])
+
+    # Empty code points at no blob
+    CodeBlobs.objects.update(
+        refcount=_reference_count(apps.get_model('lab', 'Submissions'), 'submitted_code_blob')
+        + _reference_count(apps.get_model('lab', 'Exercises'), 'code_blob')
+    )
+
+
+def move_code_from_blobs(apps, schema_editor):
+    for model_name, text_field, blob_field in CODE_COLUMNS:
+        model = apps.get_model('lab', model_name)
+        rows = model.objects.exclude(**{blob_field: None}).order_by('pk')
+        last_pk = None
+        while True:
+            batch = rows.filter(pk__gt=last_pk) if last_pk is not None else rows
+            batch = list(batch.values_list('pk', f'{blob_field}__data')[:BATCH_SIZE])
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+            model.objects.bulk_update([
+                model(pk=pk, **{text_field: zlib.decompress(data).decode('utf-8')}) for pk, data in batch
+            ], [text_field])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0010_classroomdeletionjobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CodeBlobs',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField()),
+                ('refcount', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Code Blob',
+                'verbose_name_plural': 'Code Blobs',
+                'db_table': 'code_blobs',
+            },
+        ),
+        migrations.AddField(
+            model_name='exercises',
+            name='code_blob',
+            field=models.ForeignKey(db_column='code_sha256', editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='lab.codeblobs'),
+        ),
+        migrations.AddField(
+            model_name='submissions',
+            name='submitted_code_blob',
+            field=models.ForeignKey(db_column='submitted_code_sha256', editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='lab.codeblobs'),
+        ),
+        migrations.RunPython(move_code_to_blobs, move_code_from_blobs),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.6 on 2026-10-18 20:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Separate from 0011 so the backfill is committed before the columns are
+    # dropped (PostgreSQL can't alter a table with pending constraint checks)
+
+    dependencies = [
+        ('lab', '0011_codeblobs'),
+    ]
+
+    operations = [
+        # blank=True lets the column be re-added with '' when migrating backwards
+        migrations.AlterField(
+            model_name='exercises',
+            name='code',
+            field=models.TextField(blank=True),
+        ),
+        migrations.RemoveField(
+            model_name='exercises',
+            name='code',
+        ),
+        migrations.RemoveField(
+            model_name='submissions',
+            name='submitted_code',
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.0.6 on 2026-10-18 20:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0012_remove_code_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submissions',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='SubmissionVersions',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField()),
+                ('snapshot', models.BinaryField(null=True)),
+                ('delta', models.JSONField(null=True)),
+                ('code_sha256', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('submission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='lab.submissions')),
+            ],
+            options={
+                'verbose_name': 'Submission Version',
+                'verbose_name_plural': 'Submission Versions',
+                'db_table': 'submission_versions',
+                'indexes': [models.Index(fields=['submission', 'created_at', 'id'], name='submission_versions_keyset_idx')],
+                'unique_together': {('submission', 'version')},
+            },
+        ),
+    ]
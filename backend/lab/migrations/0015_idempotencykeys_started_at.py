@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-18 21:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0014_idempotencykeys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idempotencykeys',
+            name='started_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
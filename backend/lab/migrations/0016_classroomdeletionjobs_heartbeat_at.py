@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 22:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0015_idempotencykeys_started_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='classroomdeletionjobs',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
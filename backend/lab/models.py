@@ -1,7 +1,15 @@
 from django.db import models
+from django.utils import timezone
 from django.utils.text import slugify
 import uuid 
+import hashlib
+import zlib
+from collections import Counter, defaultdict
 from django.contrib.auth.models import User
+from django.db import IntegrityError, router, transaction
+from django.db.models import F
+from django.db.models.constants import OnConflict
+from django.utils.functional import cached_property
 
 # Create your models here.
 from django.db import models
@@ -25,6 +33,9 @@ class Classrooms(models.Model):
         db_table = 'classrooms'  # This overrides the default 'lab_classrooms' table name in the database
         verbose_name = 'Classroom'  # This overrides the default singular name 'Classrooms' for the model in Admin panel
         verbose_name_plural = 'Classrooms'  # This overrides the default plural name 'Classroomss' for the model in Admin panel
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='classrooms_keyset_idx'),  # Keyset pagination (see lab/pagination.py)
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -47,8 +58,158 @@ class ClassroomUsers(models.Model):
         db_table = 'classroom_users'  # This overrides the default 'lab_classroomusers' table name in the database
         verbose_name = 'Classroom User'  # This overrides the default singular name 'ClassroomUsers' for the model in Admin panel
         verbose_name_plural = 'Classroom Users'  # This overrides the default plural name 'ClassroomUserss' for the model in Admin panel
+        unique_together = ['classroom', 'user']
 
-class Exercises(models.Model):
+class CodeBlobs(models.Model):
+    # Source code shared by submissions and exercises, stored once per distinct
+    # text: identical code (e.g. unchanged starter code) is a single row
+    sha256 = models.CharField(max_length=64, primary_key=True)  # sha256 of the UTF-8 text
+    data = models.BinaryField()  # zlib-compressed UTF-8 text
+    size = models.PositiveIntegerField()  # Bytes before compression
+    refcount = models.IntegerField(default=0)  # Rows pointing at this blob; it is deleted at 0
+
+    # timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'code_blobs'  # This overrides the default 'lab_codeblobs' table name in the database
+        verbose_name = 'Code Blob'  # This overrides the default singular name 'CodeBlobs' for the model in Admin panel
+        verbose_name_plural = 'Code Blobs'  # This overrides the default plural name 'CodeBlobss' for the model in Admin panel
+
+    @staticmethod
+    def key(text):
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def decompress(data):
+        """
+        Text of a blob's data column, e.g. from .values(); None (no blob) is ''.
+        """
+        return zlib.decompress(data).decode('utf-8') if data is not None else ''
+
+    @cached_property
+    def text(self):
+        return self.decompress(self.data)
+
+    @classmethod
+    def retain(cls, text, using=None):
+        """
+        Adds a reference to the blob holding text, creating it if needed.
+        Returns its key.
+        """
+        key = cls.key(text)
+        blobs = cls.objects.using(using or router.db_for_write(cls))
+        if blobs.filter(sha256=key).update(refcount=F('refcount') + 1):
+            return key
+        encoded = text.encode('utf-8')
+        try:
+            with transaction.atomic(using=blobs.db):
+                blobs.create(sha256=key, data=zlib.compress(encoded), size=len(encoded), refcount=1)
+        except IntegrityError:
+            # Created concurrently
+            blobs.filter(sha256=key).update(refcount=F('refcount') + 1)
+        return key
+
+    @classmethod
+    def release(cls, counts, using=None):
+        """
+        Drops references, given as {key: number of references}, and deletes the
+        blobs nothing points at any more. Call after the referencing rows are
+        gone or repointed.
+        """
+        by_count = defaultdict(list)
+        for key, count in counts.items():
+            if key and count:
+                by_count[count].append(key)
+        if not by_count:
+            return
+        blobs = cls.objects.using(using or router.db_for_write(cls))
+        for count, keys in by_count.items():
+            blobs.filter(sha256__in=keys).update(refcount=F('refcount') - count)
+        unused = blobs.filter(sha256__in=[key for keys in by_count.values() for key in keys], refcount__lte=0)
+        # A plain DELETE: the collector would load the blobs to check for references first
+        unused._raw_delete(unused.db)
+
+
+def code_blob_property(name):
+    """
+    Text attribute backed by a CodeBlobs foreign key, declared in the model's
+    code_blob_fields. Reading it loads the blob (use select_related); the
+    text assigned to it is stored by save().
+    """
+    def get(self):
+        texts = self.__dict__.get('_code_texts', {})
+        if name in texts:
+            return texts[name][0]
+        blob = getattr(self, self.code_blob_fields[name])
+        return blob.text if blob is not None else ''
+
+    def set(self, text):
+        texts = self.__dict__.setdefault('_code_texts', {})
+        stored = texts[name][1] if name in texts else getattr(self, self._code_blob_attname(name))
+        texts[name] = (text or '', stored)
+
+    return property(get, set)
+
+
+class CodeBlobModel(models.Model):
+    # Maps each code_blob_property to its CodeBlobs foreign key
+    code_blob_fields = {}
+
+    class Meta:
+        abstract = True
+
+    def _code_blob_attname(self, name):
+        return self._meta.get_field(self.code_blob_fields[name]).attname
+
+    def save(self, *args, **kwargs):
+        texts = self.__dict__.get('_code_texts', {})
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            texts = {name: value for name, value in texts.items() if name in update_fields}
+            kwargs['update_fields'] = [self.code_blob_fields.get(field, field) for field in update_fields]
+        # Only text that changed since it was loaded or last saved moves references
+        changed = {
+            name: (text, stored) for name, (text, stored) in texts.items()
+            if (CodeBlobs.key(text) if text else None) != stored
+        }
+        if update_fields is None and not self._state.adding and not kwargs.get('force_insert'):
+            # The blob keys of an instance loaded a while ago may be stale, and
+            # writing them back would bypass retain/release: a full save only
+            # writes those whose text was changed through the property
+            skipped = {
+                self.code_blob_fields[name] for name in self.code_blob_fields if name not in changed
+            }
+            if skipped:
+                deferred = self.get_deferred_fields()
+                kwargs['update_fields'] = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key and field.name not in skipped and field.attname not in deferred
+                ]
+        if not changed:
+            return super().save(*args, **kwargs)
+
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            keys = {}
+            for name, (text, stored) in changed.items():
+                keys[name] = CodeBlobs.retain(text, using=using) if text else None
+                setattr(self, self._code_blob_attname(name), keys[name])
+            super().save(*args, **kwargs)
+            CodeBlobs.release(Counter(stored for _, stored in changed.values()), using=using)
+        for name, (text, _) in changed.items():
+            self._code_texts[name] = (text, keys[name])
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        # Text read or assigned before is stale now
+        texts = self.__dict__.get('_code_texts', {})
+        for name, blob_field in self.code_blob_fields.items():
+            if fields is None or blob_field in fields:
+                texts.pop(name, None)
+
+
+class Exercises(CodeBlobModel):
     id = models.UUIDField(
         primary_key=True,
         default=uuid.uuid4,
@@ -58,7 +219,12 @@ class Exercises(models.Model):
     slug = models.SlugField(max_length=100, blank=True)
     creator_user = models.ForeignKey(User, on_delete=models.CASCADE)
     instructions = models.TextField()
-    code = models.TextField()
+    code_blob = models.ForeignKey(
+        CodeBlobs, on_delete=models.PROTECT, null=True, editable=False, related_name='+',
+        db_column='code_sha256',
+    )  # Starter code, None when empty (see CodeBlobs)
+    code = code_blob_property('code')
+    code_blob_fields = {'code': 'code_blob'}
 
     # timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -106,6 +272,8 @@ class ClassroomExercises(models.Model):
         on_delete=models.CASCADE,
         to_field='id'  # Explicitly specify the UUID field
     )
+    assigned = models.BooleanField(default=False)  # Every member gets a submission (see lab/assignments.py)
+    due_date = models.DateTimeField(null=True, blank=True)
 
     # timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -115,6 +283,9 @@ class ClassroomExercises(models.Model):
         db_table = 'classroom_exercises'  # This overrides the default 'lab_classroomexercises' table name in the database
         verbose_name = 'Classroom Exercise' # This overrides the default singular name 'ClassroomExercises' for the model in Admin panel
         verbose_name_plural = 'Classroom Exercises' # This overrides the default plural name 'ClassroomExercisess' for the model in Admin panel
+        indexes = [
+            models.Index(fields=['classroom', 'created_at', 'id'], name='classroom_exercises_keyset_idx'),  # Keyset pagination (see lab/pagination.py)
+        ]
 
 class ExerciseTests(models.Model):
     exercise = models.ForeignKey(
@@ -132,8 +303,11 @@ class ExerciseTests(models.Model):
         db_table = 'exercise_tests'  # This overrides the default 'lab_exercisetests' table name in the database
         verbose_name = 'Exercise Test' # This overrides the default singular name 'ExerciseTests' for the model in Admin panel
         verbose_name_plural = 'Exercise Tests' # This overrides the default plural name 'ExerciseTestss' for the model in Admin panel
+        indexes = [
+            models.Index(fields=['exercise', 'created_at', 'id'], name='exercise_tests_keyset_idx'),  # Keyset pagination (see lab/pagination.py)
+        ]
 
-class Submissions(models.Model):
+class Submissions(CodeBlobModel):
     STATUS_CHOICES = [
         ('assigned_to_student', 'Assigned to Student'),
         ('submitted_by_student', 'Submitted by Student'),
@@ -146,7 +320,13 @@ class Submissions(models.Model):
     due_date = models.DateTimeField(null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='assigned_to_student')
     feedback = models.TextField(blank=True)
-    submitted_code = models.TextField(blank=True)
+    submitted_code_blob = models.ForeignKey(
+        CodeBlobs, on_delete=models.PROTECT, null=True, editable=False, related_name='+',
+        db_column='submitted_code_sha256',
+    )  # None when empty (see CodeBlobs)
+    submitted_code = code_blob_property('submitted_code')
+    code_blob_fields = {'submitted_code': 'submitted_code_blob'}
+    version = models.PositiveIntegerField(default=0)  # Bumped on every code change (see lab/history.py)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -155,6 +335,158 @@ class Submissions(models.Model):
         verbose_name = 'Submission' # This overrides the default singular name 'Submissions' for the model in Admin panel
         verbose_name_plural = 'Submissions' # This overrides the default plural name 'Submissionss' for the model in Admin panel
         unique_together = ['student', 'exercise']
+        indexes = [
+            models.Index(fields=['exercise', 'created_at', 'id'], name='submissions_keyset_idx'),  # Keyset pagination (see lab/pagination.py)
+        ]
 
     def __str__(self):
-        return f"{self.student.username} - {self.exercise.name}"
\ No newline at end of file
+        return f"{self.student.username} - {self.exercise.name}"
+
+    @classmethod
+    def upsert(cls, student, exercise_id, using=None):
+        """
+        Creates the student's submission for an exercise, or returns the one
+        that exists, in a single INSERT ... ON CONFLICT DO UPDATE ... RETURNING
+        statement. Returns (submission, created).
+        The caller checks that the exercise exists: on PostgreSQL the foreign
+        key is only enforced at commit.
+        """
+        using = using or router.db_for_write(cls)
+        fields = list(cls._meta.concrete_fields)
+        new = cls(student=student, exercise_id=exercise_id)
+        rows = cls._base_manager.using(using)._insert(
+            [new],
+            fields=fields,
+            returning_fields=fields,
+            on_conflict=OnConflict.UPDATE,
+            # Setting student to itself changes nothing, but unlike DO NOTHING
+            # makes RETURNING yield the existing row
+            update_fields=[cls._meta.get_field('student')],
+            unique_fields=[cls._meta.get_field('student'), cls._meta.get_field('exercise')],
+        )
+        submission = cls.from_db(using, [field.attname for field in fields], rows[0])
+        submission.student = student
+        return submission, submission.pk == new.pk
+
+class SubmissionResults(models.Model):
+    submission = models.OneToOneField(
+        Submissions,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='result'
+    )
+    code_hash = models.CharField(max_length=64)  # sha256 of the code that was graded
+    output = models.TextField(blank=True)
+    error = models.TextField(blank=True)  # Sandbox errors such as time or memory limits
+
+    # timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'submission_results'  # This overrides the default 'lab_submissionresults' table name in the database
+        verbose_name = 'Submission Result' # This overrides the default singular name 'SubmissionResults' for the model in Admin panel
+        verbose_name_plural = 'Submission Results' # This overrides the default plural name 'SubmissionResultss' for the model in Admin panel
+
+
+class SubmissionTestResults(models.Model):
+    submission = models.ForeignKey(Submissions, on_delete=models.CASCADE, related_name='test_results')
+    test = models.ForeignKey(Tests, on_delete=models.CASCADE)
+    passed = models.BooleanField(default=False)
+
+    # timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'submission_test_results'  # This overrides the default 'lab_submissiontestresults' table name in the database
+        verbose_name = 'Submission Test Result' # This overrides the default singular name 'SubmissionTestResults' for the model in Admin panel
+        verbose_name_plural = 'Submission Test Results' # This overrides the default plural name 'SubmissionTestResultss' for the model in Admin panel
+        unique_together = ['submission', 'test']
+
+
+
+class SubmissionVersions(models.Model):
+    submission = models.ForeignKey(Submissions, on_delete=models.CASCADE, related_name='versions')
+    version = models.PositiveIntegerField()
+    snapshot = models.BinaryField(null=True)  # zlib-compressed code, stored every few versions
+    delta = models.JSONField(null=True)  # [[start, end, text], ...] edits of the previous version otherwise
+    code_sha256 = models.CharField(max_length=64)  # sha256 of the code at this version
+
+    # timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'submission_versions'  # This overrides the default 'lab_submissionversions' table name in the database
+        verbose_name = 'Submission Version' # This overrides the default singular name 'SubmissionVersions' for the model in Admin panel
+        verbose_name_plural = 'Submission Versions' # This overrides the default plural name 'SubmissionVersionss' for the model in Admin panel
+        unique_together = ['submission', 'version']
+        indexes = [
+            models.Index(fields=['submission', 'created_at', 'id'], name='submission_versions_keyset_idx'),  # Keyset pagination (see lab/pagination.py)
+        ]
+
+
+class GradingCache(models.Model):
+    code_hash = models.CharField(max_length=64)  # sha256 of the submitted code
+    suite_hash = models.CharField(max_length=64)  # sha256 of the exercise's (test_type, expected_output) rows
+    output = models.TextField(blank=True)
+    error = models.TextField(blank=True)
+    results = models.JSONField(default=list)  # Pass/fail per test, in test id order
+    hits = models.PositiveIntegerField(default=0)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)  # Used for LRU/TTL eviction
+
+    # timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'grading_cache'  # This overrides the default 'lab_gradingcache' table name in the database
+        verbose_name = 'Grading Cache Entry' # This overrides the default singular name 'GradingCache' for the model in Admin panel
+        verbose_name_plural = 'Grading Cache Entries' # This overrides the default plural name 'GradingCaches' for the model in Admin panel
+        unique_together = ['code_hash', 'suite_hash']
+
+
+class ClassroomDeletionJobs(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # Plain columns instead of foreign keys: the rows they point to are removed by the job
+    classroom_id = models.BigIntegerField(db_index=True)
+    classroom_slug = models.SlugField(max_length=100)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    total_exercises = models.PositiveIntegerField(default=0)
+    deleted_exercises = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)  # Renewed by the runner after every batch
+
+    # timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'classroom_deletion_jobs'  # This overrides the default 'lab_classroomdeletionjobs' table name in the database
+        verbose_name = 'Classroom Deletion Job' # This overrides the default singular name 'ClassroomDeletionJobs' for the model in Admin panel
+        verbose_name_plural = 'Classroom Deletion Jobs' # This overrides the default plural name 'ClassroomDeletionJobss' for the model in Admin panel
+
+
+class IdempotencyKeys(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    key = models.CharField(max_length=255)  # The client's Idempotency-Key header
+    request_hash = models.CharField(max_length=64)  # sha256 of the method, path and body first sent with the key
+    status = models.PositiveSmallIntegerField(null=True)  # None while the first request is running
+    response = models.BinaryField(null=True)  # JSON body replayed to retries
+
+    # timestamps
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)  # Used for TTL eviction
+    started_at = models.DateTimeField(default=timezone.now)  # When the request running under the key started
+
+    class Meta:
+        db_table = 'idempotency_keys'  # This overrides the default 'lab_idempotencykeys' table name in the database
+        verbose_name = 'Idempotency Key' # This overrides the default singular name 'IdempotencyKeys' for the model in Admin panel
+        verbose_name_plural = 'Idempotency Keys' # This overrides the default plural name 'IdempotencyKeyss' for the model in Admin panel
+        unique_together = ['user', 'key']
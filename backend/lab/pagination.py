@@ -0,0 +1,123 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+Rows are ordered by (created_at, id) and a page starts right after the last row
+of the previous page, so every page costs the same index range scan no matter
+how deep it is (OFFSET has to walk past every skipped row). Cursors are opaque
+to clients: urlsafe base64 of the last row's key.
+
+Paging is opt-in: a request without ?limit= or ?cursor= gets every row, as
+before pagination existed, so callers that don't follow 'next' aren't cut off.
+"""
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+DEFAULTS = {
+    'DEFAULT_LIMIT': 100,  # Rows per page for a ?cursor= without ?limit=
+    'MAX_LIMIT': 500,
+}
+
+
+class InvalidPageRequest(ValueError):
+    pass
+
+
+def pagination_setting(name):
+    return getattr(settings, 'PAGINATION', {}).get(name, DEFAULTS[name])
+
+
+def encode_cursor(created_at, pk):
+    raw = json.dumps([created_at.isoformat(), str(pk)]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, pk = json.loads(base64.urlsafe_b64decode(padded))
+        created_at = parse_datetime(created_at)
+    except (binascii.Error, ValueError, TypeError):
+        raise InvalidPageRequest('Invalid cursor')
+    if created_at is None:
+        raise InvalidPageRequest('Invalid cursor')
+    return created_at, pk
+
+
+def get_limit(request):
+    """
+    Returns the page size, or None for an unpaged request.
+    """
+    limit = request.GET.get('limit')
+    if limit is None:
+        if 'cursor' not in request.GET:
+            return None
+        return pagination_setting('DEFAULT_LIMIT')
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise InvalidPageRequest('limit must be an integer')
+    return max(1, min(limit, pagination_setting('MAX_LIMIT')))
+
+
+def _row_key(row):
+    if isinstance(row, dict):
+        return row['created_at'], row['id']
+    return row.created_at, row.pk
+
+
+def paginate(request, queryset):
+    """
+    Returns one page of queryset as (rows, page_info).
+
+    The queryset is ordered by (created_at, id). Rows from .values() querysets
+    must include 'created_at' and 'id'. page_info has the opaque 'next_cursor'
+    and an absolute 'next' link, both None on the last page (and for unpaged
+    requests, which get every row).
+    Raises InvalidPageRequest for a malformed cursor or limit.
+    """
+    limit, queryset = _page_queryset(request, queryset)
+    return _page(request, list(queryset), limit)
+
+
+async def apaginate(request, queryset):
+    """
+    Async version of paginate() for async views.
+    """
+    limit, queryset = _page_queryset(request, queryset)
+    return _page(request, [row async for row in queryset], limit)
+
+
+def _page_queryset(request, queryset):
+    limit = get_limit(request)
+    queryset = queryset.order_by('created_at', 'pk')
+
+    cursor = request.GET.get('cursor')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk)
+        )
+
+    if limit is None:
+        return limit, queryset
+    # Fetch one extra row to know whether there is a next page
+    return limit, queryset[:limit + 1]
+
+
+def _page(request, rows, limit):
+    next_cursor = None
+    next_url = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(*_row_key(rows[-1]))
+        params = request.GET.copy()
+        params['cursor'] = next_cursor
+        params['limit'] = limit
+        next_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+    return rows, {'next': next_url, 'next_cursor': next_cursor}
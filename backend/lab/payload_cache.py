@@ -0,0 +1,164 @@
+"""
+Read-through cache of exercise and test payloads.
+
+get_exercise_details, get_exercise_list and get_tests_list are read on every
+page a student opens but change rarely, so their serialized payloads are kept
+in Django's cache (locmem unless CACHE_URL points to a shared backend).
+
+Each payload is stored with the version its @conditional decorator computed
+(see lab/conditional.py) and only served to requests computing the same
+version. Signals only reach the cache of the process that made the change, so
+without that check other processes using a local cache would keep serving the
+old payload, under the new ETag.
+
+Entries are also invalidated by the model signals in lab/signals.py:
+
+- an exercise's details are keyed by its id and deleted when it changes;
+- list pages vary by cursor, limit and fields, so their keys include a
+  generation token per classroom (exercise lists) or per exercise (test
+  lists). Changing anything in a list replaces the token, which orphans all
+  its pages at once; they then expire by TTL.
+
+Hit and miss counters live in the cache too, so with a shared backend they
+cover all server processes.
+"""
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import ClassroomExercises, ExerciseTests
+
+DEFAULTS = {
+    'TTL': 60 * 10,  # Seconds a payload stays cached
+}
+
+KEY_PREFIX = 'lab:payload'
+
+
+def payload_cache_setting(name):
+    return getattr(settings, 'PAYLOAD_CACHE', {}).get(name, DEFAULTS[name])
+
+
+def _generation_key(kind, owner_id):
+    return f'{KEY_PREFIX}:generation:{kind}:{owner_id}'
+
+
+async def _ageneration(kind, owner_id):
+    key = _generation_key(kind, owner_id)
+    generation = await cache.aget(key)
+    if generation is None:
+        await cache.aadd(key, uuid.uuid4().hex, None)
+        generation = await cache.aget(key)
+    return generation
+
+
+def exercise_key(exercise_id):
+    return f'{KEY_PREFIX}:exercise:{exercise_id}'
+
+
+async def aexercise_list_key(classroom_id, request):
+    return await _apage_key('exercise_list', classroom_id, request)
+
+
+async def atests_list_key(exercise_id, request):
+    return await _apage_key('tests_list', exercise_id, request)
+
+
+async def _apage_key(kind, owner_id, request):
+    # The absolute URI covers the query string and the host used in 'next' links
+    page = hashlib.sha256(request.build_absolute_uri().encode('utf-8')).hexdigest()[:32]
+    return f'{KEY_PREFIX}:{kind}:{owner_id}:{await _ageneration(kind, owner_id)}:{page}'
+
+
+async def _acount(name):
+    key = f'{KEY_PREFIX}:stats:{name}'
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        # Missing counter; add() loses no increment if another process won the race
+        if not await cache.aadd(key, 1, None):
+            await cache.aincr(key)
+
+
+def _version_tag(request):
+    # Set by @conditional before the view runs
+    version = getattr(request, 'conditional_version', None)
+    return hashlib.sha256(json.dumps(version, default=str).encode('utf-8')).hexdigest()[:16]
+
+
+async def aget_payload(key, request):
+    """
+    Returns the payload cached for key at the request's version, or None on a
+    miss.
+    """
+    entry = await cache.aget(key)
+    payload = entry[1] if entry is not None and entry[0] == _version_tag(request) else None
+    await _acount('hits' if payload is not None else 'misses')
+    return payload
+
+
+async def aset_payload(key, payload, request):
+    await cache.aset(key, (_version_tag(request), payload), payload_cache_setting('TTL'))
+
+
+def invalidate_exercise(exercise_id):
+    """
+    Drops an exercise's details and every list page showing it.
+    """
+    cache.delete(exercise_key(exercise_id))
+    invalidate_exercise_lists(
+        ClassroomExercises.objects.filter(exercise_id=exercise_id).values_list('classroom_id', flat=True)
+    )
+
+
+def invalidate_exercise_details(exercise_ids):
+    cache.delete_many([exercise_key(exercise_id) for exercise_id in exercise_ids])
+
+
+def invalidate_exercise_lists(classroom_ids):
+    cache.delete_many([_generation_key('exercise_list', classroom_id) for classroom_id in set(classroom_ids)])
+
+
+def invalidate_tests_lists(exercise_ids):
+    cache.delete_many([_generation_key('tests_list', exercise_id) for exercise_id in set(exercise_ids)])
+
+
+def invalidate_test(test_id):
+    """
+    Drops the test lists of every exercise using a test.
+    """
+    invalidate_tests_lists(
+        ExerciseTests.objects.filter(test_id=test_id).values_list('exercise_id', flat=True)
+    )
+
+
+def _cache_size():
+    # Only the local backends can count their entries cheaply
+    if hasattr(cache, '_cache') and isinstance(cache._cache, dict):
+        return len(cache._cache)
+    if hasattr(cache, '_list_cache_files'):
+        return len(cache._list_cache_files())
+    return None
+
+
+def stats():
+    """
+    Hit/miss counters and, for locmem and file backends, the number of entries
+    in the cache (payloads plus generation tokens and counters).
+    """
+    hits = cache.get(f'{KEY_PREFIX}:stats:hits', 0)
+    misses = cache.get(f'{KEY_PREFIX}:stats:misses', 0)
+    return {
+        'backend': settings.CACHES['default']['BACKEND'],
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / (hits + misses) if hits + misses else 0.0,
+        'entries': _cache_size(),
+    }
+
+
+def reset_stats():
+    cache.delete_many([f'{KEY_PREFIX}:stats:hits', f'{KEY_PREFIX}:stats:misses'])
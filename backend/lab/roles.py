@@ -0,0 +1,102 @@
+"""
+User role resolution.
+
+A user's role comes from their auth group ('Teachers' or 'Students'). It is
+loaded with one query the first time it is needed and then served from Django's
+cache, so hot paths don't touch auth_group at all. Group membership changes
+invalidate it once their transaction commits (see lab/signals.py).
+
+Invalidation only reaches other processes through a shared cache backend;
+with a process-local one roles are read from the database every time (see
+lab/shared_cache.py).
+"""
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from .shared_cache import cache_is_shared
+
+# Group name -> role, in order of precedence
+ROLE_GROUPS = [
+    ('Teachers', 'teacher'),
+    ('Students', 'student'),
+]
+
+# Name of the JWT claim holding the role (see add_role_claim)
+ROLE_CLAIM = 'role'
+
+# Cached value for users without a role (None can't be told apart from a miss)
+NO_ROLE = ''
+
+DEFAULTS = {
+    'CACHE_TTL': 60 * 60,  # Seconds a role stays in the shared cache
+    'TRUST_TOKEN_CLAIM': False,  # Use the role claim of the JWT on a cache miss
+}
+
+
+def roles_setting(name):
+    return getattr(settings, 'ROLES', {}).get(name, DEFAULTS[name])
+
+
+def _cache_key(user_id):
+    return f'lab:role:{user_id}'
+
+
+def load_user_role(user_id):
+    """
+    Reads a user's role from the database with a single query.
+    """
+    # Always from the primary, even inside @read_replica views: a role read
+    # from a lagging replica would stay cached for CACHE_TTL
+    names = set(Group.objects.using(DEFAULT_DB_ALIAS).filter(
+        user__id=user_id,
+        name__in=[name for name, _ in ROLE_GROUPS]
+    ).values_list('name', flat=True))
+    for name, role in ROLE_GROUPS:
+        if name in names:
+            return role
+    return None
+
+
+def get_user_role(user, token=None):
+    """
+    Returns user role based on group membership.
+    Returns 'teacher' if user is in Teachers group
+    Returns 'student' if user is in Students group
+    Returns None if user has no role
+    """
+    if user is None or not user.is_authenticated:
+        return None
+    if not cache_is_shared():
+        # Changes made through other processes would never invalidate it
+        return load_user_role(user.id)
+
+    role = cache.get(_cache_key(user.id))
+    if role is None:
+        if roles_setting('TRUST_TOKEN_CLAIM') and token is not None and ROLE_CLAIM in token:
+            role = token[ROLE_CLAIM] or NO_ROLE
+        else:
+            role = load_user_role(user.id) or NO_ROLE
+        cache.set(_cache_key(user.id), role, roles_setting('CACHE_TTL'))
+    return role or None
+
+
+def request_is_teacher(request):
+    return get_user_role(request.user, request.auth) == 'teacher'
+
+
+def invalidate_user_roles(user_ids):
+    """
+    Drops cached roles, e.g. after group membership changed.
+    """
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids])
+
+
+def add_role_claim(token, user):
+    """
+    Embeds the user's role in a JWT. Set it on the refresh token before
+    deriving the access token so both carry it.
+    """
+    token[ROLE_CLAIM] = get_user_role(user)
+    return token
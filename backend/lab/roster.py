@@ -0,0 +1,173 @@
+"""
+Bulk enrollment of students into a classroom from a CSV or JSON roster.
+
+The whole import runs in one transaction with a fixed number of statements:
+one lookup of existing accounts and of which of them are already enrolled, one
+username allocation query, and one bulk INSERT each for new users, their Students group membership, the
+classroom memberships and the submissions of already assigned exercises.
+Rows that already exist are skipped by the database (ON CONFLICT DO NOTHING).
+
+If a concurrent signup takes one of the new usernames or emails, the import
+is rolled back and run again, which then sees that account.
+
+Emails that belong to an existing account are only enrolled with
+enroll_existing; otherwise they are reported back for the teacher to confirm,
+so a roster can't pull in someone else's account by mistake.
+"""
+import csv
+import io
+import json
+
+from django.contrib.auth.models import Group, User
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
+
+from .accounts import allocate_usernames, normalize_email, username_base
+from .assignments import backfill_assignments
+from .models import ClassroomUsers
+
+# Largest roster accepted in one import
+ROSTER_MAX_ROWS = 5000
+
+ROSTER_FIELDS = ['email', 'first_name', 'last_name']
+
+BATCH_SIZE = 1000
+
+# Attempts at the import when a concurrent signup takes a new username or email
+IMPORT_RETRIES = 3
+
+
+class RosterError(ValueError):
+    pass
+
+
+def parse_roster(content, format):
+    """
+    Parses a roster into a list of {'email', 'first_name', 'last_name'} dicts.
+
+    CSV needs a header row with an 'email' column; 'first_name' and
+    'last_name' are optional. JSON can be a list of such objects, a list of
+    email strings, or an object with a 'students' list.
+    """
+    if format == 'csv':
+        reader = csv.DictReader(io.StringIO(content))
+        if not reader.fieldnames or 'email' not in [name.strip().lower() for name in reader.fieldnames]:
+            raise RosterError('CSV roster needs a header row with an "email" column')
+        rows = [{(key or '').strip().lower(): value for key, value in row.items()} for row in reader]
+    elif format == 'json':
+        try:
+            rows = json.loads(content) if isinstance(content, str) else content
+        except json.JSONDecodeError:
+            raise RosterError('Invalid JSON roster')
+        if isinstance(rows, dict):
+            rows = rows.get('students')
+        if not isinstance(rows, list):
+            raise RosterError('JSON roster must be a list of students')
+        rows = [{'email': row} if isinstance(row, str) else row for row in rows]
+        if not all(isinstance(row, dict) for row in rows):
+            raise RosterError('Each student must be an email or an object with an "email" field')
+    else:
+        raise RosterError(f'Unsupported roster format: {format}')
+
+    if len(rows) > ROSTER_MAX_ROWS:
+        raise RosterError(f'Roster has more than {ROSTER_MAX_ROWS} students')
+
+    return [{field: (row.get(field) or '').strip() for field in ROSTER_FIELDS} for row in rows]
+
+
+def import_roster(classroom, rows, enroll_existing=False):
+    """
+    Creates missing student accounts and enrolls them in the classroom, along
+    with existing accounts if enroll_existing is set.
+
+    Returns a summary with the number of valid rows, created accounts and new
+    memberships, the rows that were rejected as invalid and the emails of
+    existing accounts left out for confirmation.
+    """
+    # Validate and deduplicate by email (case-insensitive, like login)
+    students = {}
+    invalid = []
+    for row in rows:
+        email = normalize_email(row['email'])
+        try:
+            validate_email(email)
+        except ValidationError:
+            invalid.append(row['email'])
+            continue
+        students.setdefault(email, row)
+
+    for attempt in range(IMPORT_RETRIES):
+        try:
+            return {**_enroll(classroom, students, enroll_existing), 'invalid': invalid}
+        except IntegrityError:
+            # A concurrent signup took a new username or email, the next attempt sees it
+            if attempt == IMPORT_RETRIES - 1:
+                raise
+
+
+def _enroll(classroom, students, enroll_existing):
+    with transaction.atomic():
+        accounts = dict(
+            User.objects.annotate(email_lower=Lower('email'))
+            .filter(email_lower__in=list(students))
+            .values_list('email_lower', 'id')
+        )
+        existing = accounts
+        unconfirmed = []
+        if not enroll_existing:
+            members = set(ClassroomUsers.objects.filter(
+                classroom=classroom, user_id__in=list(accounts.values())
+            ).values_list('user_id', flat=True))
+            existing = {email: user_id for email, user_id in accounts.items() if user_id in members}
+            unconfirmed = [email for email in accounts if email not in existing]
+
+        new_emails = [email for email in students if email not in accounts]
+        usernames = allocate_usernames(User, [username_base(email) for email in new_emails])
+        # Students log in after a password reset; the hash is shared to avoid
+        # hashing once per row (it is unusable either way)
+        unusable_password = make_password(None)
+        new_users = User.objects.bulk_create(
+            [
+                User(
+                    username=username,
+                    email=email,
+                    first_name=students[email]['first_name'][:150],
+                    last_name=students[email]['last_name'][:150],
+                    password=unusable_password,
+                )
+                for email, username in zip(new_emails, usernames)
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        if new_users and new_users[0].pk is None:
+            # Backends that can't return ids from a bulk insert
+            new_users = list(User.objects.filter(username__in=usernames))
+
+        students_group = Group.objects.get(name='Students')
+        User.groups.through.objects.bulk_create(
+            [User.groups.through(user_id=user.pk, group_id=students_group.id) for user in new_users],
+            ignore_conflicts=True,
+            batch_size=BATCH_SIZE,
+        )
+
+        user_ids = list(existing.values()) + [user.pk for user in new_users]
+        members_before = ClassroomUsers.objects.filter(classroom=classroom).count()
+        ClassroomUsers.objects.bulk_create(
+            [ClassroomUsers(classroom=classroom, user_id=user_id) for user_id in user_ids],
+            ignore_conflicts=True,
+            batch_size=BATCH_SIZE,
+        )
+        members_after = ClassroomUsers.objects.filter(classroom=classroom).count()
+
+        # Submissions of exercises already assigned to the classroom
+        backfill_assignments(classroom.id, user_ids)
+
+    return {
+        'students': len(students),
+        'created_users': len(new_users),
+        'enrolled': members_after - members_before,
+        'needs_confirmation': unconfirmed,
+    }
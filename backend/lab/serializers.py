@@ -1,12 +1,145 @@
-from rest_framework import serializers
-from .models import Classrooms, Exercises
-
-class ClassroomSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Classrooms
-        fields = ['id', 'name', 'description', 'slug', 'created_at', 'updated_at']
-
-class ExerciseSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Exercises
-        fields = ['id', 'name', 'instructions', 'output_instructions', 'code', 'slug', 'created_at', 'updated_at'] 
\ No newline at end of file
+"""
+JSON serialization shared by the lab views.
+
+Payloads are built from precomputed field maps instead of formatting every
+field by hand: datetimes and UUIDs stay as they are and are encoded by dumps(),
+which uses orjson when it is installed (it handles both natively and is several
+times faster than the json module) and the standard library otherwise. Both
+produce the same output: datetimes as datetime.isoformat(), UUIDs as strings.
+
+`python manage.py bench_serialization` compares the encoders.
+"""
+import datetime
+import json
+import uuid
+from operator import attrgetter, itemgetter
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse
+
+from .models import CodeBlobs
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class LabJSONEncoder(DjangoJSONEncoder):
+    """
+    Standard library fallback matching orjson's output. Other types
+    (Decimal, lazy strings, ...) are encoded like JsonResponse does.
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.date, datetime.time)):
+            return o.isoformat()
+        if isinstance(o, uuid.UUID):
+            return str(o)
+        return super().default(o)
+
+
+_encoder = LabJSONEncoder()
+
+
+def dumps(data):
+    """
+    Encodes data as JSON bytes.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=_encoder.default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, cls=LabJSONEncoder, separators=(',', ':')).encode('utf-8')
+
+
+class FastJsonResponse(JsonResponse):
+    """
+    JsonResponse encoded with dumps(). Accepts the same data and safe
+    arguments; datetimes and UUIDs can be passed as they are.
+    """
+
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                'In order to allow non-dict objects to be serialized set the '
+                'safe parameter to False.'
+            )
+        kwargs.setdefault('content_type', 'application/json')
+        HttpResponse.__init__(self, content=dumps(data), **kwargs)
+
+
+class FieldMap:
+    """
+    Output keys and the model attributes they come from, resolved once.
+
+    Fields are attribute names, or (key, attribute) pairs to rename them.
+    object() reads a model instance; row() reads a .values() row whose
+    columns are named prefix + attribute (see columns).
+    """
+
+    def __init__(self, fields, prefix=''):
+        fields = [(field, field) if isinstance(field, str) else field for field in fields]
+        self.keys = tuple(key for key, _ in fields)
+        attributes = [attribute for _, attribute in fields]
+        self.columns = tuple(prefix + attribute for attribute in attributes)
+        # Both getters return a tuple as long as there are at least two fields
+        assert len(fields) > 1
+        self._from_object = attrgetter(*attributes)
+        self._from_row = itemgetter(*self.columns)
+
+    def object(self, obj):
+        return dict(zip(self.keys, self._from_object(obj)))
+
+    def row(self, row):
+        return dict(zip(self.keys, self._from_row(row)))
+
+
+CLASSROOM_FIELDS = FieldMap([
+    'id', 'name', 'description', ('createdAt', 'created_at'), ('updatedAt', 'updated_at'), 'slug',
+])
+
+EXERCISE_FIELDS = FieldMap(['id', 'name', 'slug', 'instructions', 'code', 'created_at', 'updated_at'])
+
+TEST_FIELDS = FieldMap(['id', 'name', 'test_type', 'expected_output', 'help_text', 'created_at', 'updated_at'])
+
+SUBMISSION_FIELDS = FieldMap([
+    'id', 'exercise_id', 'status', 'submitted_code', 'version', 'feedback', 'created_at', 'updated_at',
+])
+
+# Rows read the code's compressed blob (see CodeBlobs) instead of the property
+SUBMISSION_ROW_FIELDS = FieldMap([
+    'id', 'exercise_id', 'status', ('submitted_code', 'submitted_code_blob__data'), 'version', 'feedback',
+    'created_at', 'updated_at',
+])
+
+STUDENT_FIELDS = FieldMap(
+    ['id', 'username', 'first_name', 'last_name', 'email', 'date_joined', 'last_login'],
+    prefix='student__',
+)
+
+
+def _student(student):
+    student['full_name'] = f"{student.pop('first_name')} {student.pop('last_name')}".strip()
+    return student
+
+
+def submission_payload(submission):
+    """
+    A submission with its student's details;
+    select_related('student', 'submitted_code_blob') first.
+    """
+    payload = SUBMISSION_FIELDS.object(submission)
+    payload['student'] = _student(STUDENT_FIELDS.object(submission.student))
+    return payload
+
+
+def submission_row_payload(row):
+    """
+    submission_payload() for a .values(*SUBMISSION_ROW_COLUMNS) row.
+    """
+    payload = SUBMISSION_ROW_FIELDS.row(row)
+    payload['submitted_code'] = CodeBlobs.decompress(payload['submitted_code'])
+    payload['student'] = _student(STUDENT_FIELDS.row(row))
+    return payload
+
+
+SUBMISSION_ROW_COLUMNS = SUBMISSION_ROW_FIELDS.columns + STUDENT_FIELDS.columns
@@ -0,0 +1,31 @@
+"""
+Whether Django's cache is shared by all server processes.
+
+The role and user caches (lab/roles.py, lab/authentication.py) are kept
+correct by deleting entries when the data changes. A process-local backend
+(locmem, the default) only sees the deletions made by its own process, and a
+process can't reliably tell how many others serve the site (gunicorn -w,
+WEB_CONCURRENCY, uvicorn --workers...). So with a local backend those caches
+are bypassed rather than serving stale roles and users, and a warning is
+logged at startup; set CACHE_URL to a shared backend to use them.
+"""
+import logging
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+logger = logging.getLogger(__name__)
+
+
+def cache_is_shared():
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def warn_if_not_shared():
+    if not cache_is_shared():
+        logger.warning(
+            "The role and user caches are disabled: the %s cache backend is not shared "
+            "between server processes. Set CACHE_URL to a shared backend to enable them.",
+            type(caches['default']).__name__,
+        )
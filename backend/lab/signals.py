@@ -0,0 +1,128 @@
+"""
+Signal receivers of the lab app, connected in LabConfig.ready().
+"""
+from collections import Counter
+
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import payload_cache
+from .authentication import invalidate_cached_user
+from .models import ClassroomExercises, CodeBlobs, Exercises, ExerciseTests, Submissions, Tests
+from .roles import invalidate_user_roles
+
+
+def invalidate_roles_on_commit(user_ids):
+    # Before the commit, a concurrent request could cache the old role again
+    user_ids = list(user_ids)
+    transaction.on_commit(lambda: invalidate_user_roles(user_ids))
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_roles_on_membership_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        # user.groups.add(...) / remove(...) / clear()
+        invalidate_roles_on_commit([instance.pk])
+    elif pk_set is not None:
+        # group.user_set.add(...) / remove(...)
+        invalidate_roles_on_commit(pk_set)
+    else:
+        # group.user_set.clear()
+        invalidate_roles_on_commit(instance.user_set.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def invalidate_roles_on_group_change(sender, instance, **kwargs):
+    # A renamed or deleted group can change the role of all its members
+    invalidate_roles_on_commit(instance.user_set.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user_on_change(sender, instance, **kwargs):
+    # After the commit, as for roles
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_cached_user(user_id))
+
+
+# User fields shown in cached exercise details
+CREATOR_DISPLAY_FIELDS = ['username', 'first_name', 'last_name']
+
+
+def _creator_display(instance):
+    # Read from __dict__ so deferred fields aren't loaded
+    return tuple(instance.__dict__.get(field) for field in CREATOR_DISPLAY_FIELDS)
+
+
+@receiver(post_init, sender=User)
+def remember_creator_display(sender, instance, **kwargs):
+    instance._creator_display = _creator_display(instance)
+
+
+@receiver(post_save, sender=User)
+def invalidate_creator_payloads_on_change(sender, instance, created, **kwargs):
+    # Only a change of the displayed name matters, not logins or password changes
+    display = _creator_display(instance)
+    changed = not created and display != instance.__dict__.get('_creator_display')
+    instance._creator_display = display
+    if changed:
+        payload_cache.invalidate_exercise_details(
+            Exercises.objects.filter(creator_user=instance).values_list('id', flat=True)
+        )
+
+
+@receiver(post_save, sender=Exercises)
+@receiver(post_delete, sender=Exercises)
+def invalidate_exercise_payloads(sender, instance, **kwargs):
+    payload_cache.invalidate_exercise(instance.pk)
+
+
+@receiver(post_save, sender=Tests)
+@receiver(post_delete, sender=Tests)
+def invalidate_test_payloads(sender, instance, **kwargs):
+    payload_cache.invalidate_test(instance.pk)
+
+
+@receiver(post_save, sender=ExerciseTests)
+@receiver(post_delete, sender=ExerciseTests)
+def invalidate_tests_list_payloads(sender, instance, **kwargs):
+    payload_cache.invalidate_tests_lists([instance.exercise_id])
+
+
+@receiver(post_save, sender=ClassroomExercises)
+@receiver(post_delete, sender=ClassroomExercises)
+def invalidate_exercise_list_payloads(sender, instance, **kwargs):
+    payload_cache.invalidate_exercise_lists([instance.classroom_id])
+
+
+# Code blob references (see CodeBlobs). Deleting an exercise releases its
+# submissions' code in one go instead of once per cascaded submission.
+
+@receiver(pre_delete, sender=Exercises)
+def collect_exercise_code_blobs(sender, instance, origin=None, **kwargs):
+    released = Counter({instance.code_blob_id: 1})
+    if origin is instance:
+        released.update(dict(
+            Submissions.objects.filter(exercise=instance).exclude(submitted_code_blob=None)
+            .values_list('submitted_code_blob').annotate(count=Count('id')).order_by()
+        ))
+    instance._released_code_blobs = released
+
+
+@receiver(post_delete, sender=Exercises)
+def release_exercise_code_blobs(sender, instance, using, **kwargs):
+    CodeBlobs.release(instance.__dict__.pop('_released_code_blobs', {}), using=using)
+
+
+@receiver(post_delete, sender=Submissions)
+def release_submission_code_blob(sender, instance, using, origin=None, **kwargs):
+    if isinstance(origin, Exercises):
+        # Released with the exercise
+        return
+    CodeBlobs.release({instance.submitted_code_blob_id: 1}, using=using)
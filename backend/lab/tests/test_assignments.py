@@ -0,0 +1,46 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from lab.models import ClassroomUsers, Classrooms, Submissions
+from lab.tests.utils import create_user
+
+
+class AssignmentTests(TestCase):
+    def setUp(self):
+        self.teacher = create_user('teacher', 'Teachers')
+        self.classroom = Classrooms.objects.create(name='Python', description='', creator_user=self.teacher)
+        self.students = [create_user(f'student{i}', 'Students') for i in range(3)]
+        for student in self.students[:2]:
+            ClassroomUsers.objects.create(classroom=self.classroom, user=student)
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def create_exercise(self, **data):
+        return self.client.post(
+            f'/api/classrooms/{self.classroom.slug}/exercises/create/', {'name': 'Loops', **data}, format='json'
+        )
+
+    def test_assigning_creates_a_submission_per_member(self):
+        response = self.create_exercise(assign=True, due_date='2030-01-01T12:00:00Z')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['assigned_count'], 2)
+        submissions = Submissions.objects.filter(exercise_id=response.json()['id'])
+        self.assertEqual(
+            set(submissions.values_list('student_id', flat=True)), {self.students[0].id, self.students[1].id}
+        )
+        self.assertEqual({submission.status for submission in submissions}, {'assigned_to_student'})
+        self.assertEqual(submissions[0].due_date.year, 2030)
+
+        # Members joining later get it too
+        self.client.force_authenticate(self.students[2])
+        self.client.post(f'/api/classrooms/{self.classroom.slug}/join/')
+        self.assertEqual(submissions.all().count(), 3)
+
+    def test_unassigned_exercise_creates_nothing(self):
+        response = self.create_exercise()
+        self.assertEqual(response.json()['assigned_count'], 0)
+        self.assertFalse(Submissions.objects.exists())
+
+    def test_invalid_values_are_rejected(self):
+        self.assertEqual(self.create_exercise(assign='false').status_code, 400)
+        self.assertEqual(self.create_exercise(assign=True, due_date='tomorrow').status_code, 400)
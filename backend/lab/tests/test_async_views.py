@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.test import TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from lab.models import Classrooms
+from lab.tests.utils import create_user
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.teacher = create_user('teacher', 'Teachers')
+        self.classroom = Classrooms.objects.create(name='Python', description='', creator_user=self.teacher)
+
+    def log_in(self):
+        self.async_client.cookies[settings.SIMPLE_JWT['AUTH_COOKIE']] = str(AccessToken.for_user(self.teacher))
+
+    async def test_authenticated_request(self):
+        self.log_in()
+        response = await self.async_client.get(f'/api/classrooms/{self.classroom.slug}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['teacher'], 'teacher')
+
+    async def test_anonymous_request_is_rejected(self):
+        response = await self.async_client.get(f'/api/classrooms/{self.classroom.slug}/')
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('WWW-Authenticate', response)
+        self.assertIn('detail', response.json())
+
+    async def test_method_not_allowed(self):
+        self.log_in()
+        response = await self.async_client.post(f'/api/classrooms/{self.classroom.slug}/')
+        self.assertEqual(response.status_code, 405)
+        response = await self.async_client.head(f'/api/classrooms/{self.classroom.slug}/')
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.test import RequestFactory, TestCase
+from rest_framework.request import Request
+from rest_framework_simplejwt.tokens import AccessToken
+
+from lab.authentication import CookieJWTAuthentication
+from lab.tests.utils import create_user, use_shared_cache
+
+
+class UserCacheTests(TestCase):
+    def setUp(self):
+        use_shared_cache(self)
+        self.user = create_user('student', 'Students')
+        self.token = str(AccessToken.for_user(self.user))
+
+    def authenticate(self):
+        request = RequestFactory().get('/')
+        request.COOKIES[settings.SIMPLE_JWT['AUTH_COOKIE']] = self.token
+        return CookieJWTAuthentication().authenticate(Request(request))
+
+    def test_user_is_cached_without_password(self):
+        with self.assertNumQueries(1):
+            self.authenticate()
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate()
+        self.assertEqual(user.username, 'student')
+        self.assertIn('password', user.get_deferred_fields())
+
+    def test_saving_the_user_invalidates_on_commit(self):
+        self.authenticate()
+        self.user.first_name = 'Ada'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        user, _ = self.authenticate()
+        self.assertEqual(user.first_name, 'Ada')
+
+    def test_deactivated_user_is_rejected(self):
+        self.authenticate()
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        with self.assertLogs('lab.authentication', 'ERROR'):
+            self.assertIsNone(self.authenticate())
+
+    def test_invalid_token(self):
+        self.token = 'not-a-token'
+        with self.assertLogs('lab.authentication', 'ERROR'):
+            self.assertIsNone(self.authenticate())
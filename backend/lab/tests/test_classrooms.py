@@ -0,0 +1,42 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from lab.models import ClassroomExercises, ClassroomUsers, Classrooms, Exercises
+
+
+class ClassroomListTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher', 'teacher@example.com', 'password')
+        self.student = User.objects.create_user('student', 'student@example.com', 'password')
+        for i in range(3):
+            classroom = Classrooms.objects.create(
+                name=f'Class {i}', description='', creator_user=self.teacher
+            )
+            for user in [self.teacher, self.student][:i]:
+                ClassroomUsers.objects.create(classroom=classroom, user=user)
+            for j in range(i):
+                exercise = Exercises.objects.create(
+                    name=f'Exercise {i}.{j}', creator_user=self.teacher, instructions=''
+                )
+                ClassroomExercises.objects.create(classroom=classroom, exercise=exercise)
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def test_lists_counts_and_membership(self):
+        classrooms = {
+            classroom['name']: classroom
+            for classroom in self.client.get('/api/classrooms/').json()['classrooms']
+        }
+        self.assertEqual(len(classrooms), 3)
+        self.assertEqual(classrooms['Class 2']['member_count'], 2)
+        self.assertEqual(classrooms['Class 2']['exercise_count'], 2)
+        self.assertEqual(classrooms['Class 1']['member_count'], 1)
+        self.assertFalse(classrooms['Class 1']['is_member'])
+        self.assertTrue(classrooms['Class 2']['is_member'])
+        self.assertEqual(classrooms['Class 0']['teacher'], 'teacher')
+
+    def test_single_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/classrooms/')
+        self.assertEqual(response.status_code, 200)
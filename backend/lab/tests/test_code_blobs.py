@@ -0,0 +1,86 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from lab import history
+from lab.models import CodeBlobs, Exercises, Submissions
+
+
+class CodeBlobTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher', 'teacher@example.com', 'password')
+        self.student = User.objects.create_user('student', 'student@example.com', 'password')
+        self.other = User.objects.create_user('other', 'other@example.com', 'password')
+        self.exercise = Exercises.objects.create(
+            name='Loops', creator_user=self.teacher, instructions='', code='print(1)\n'
+        )
+
+    def assertRefcountsConsistent(self):
+        # Every blob is referenced exactly refcount times, and none is unused
+        references = {}
+        for exercise_key in Exercises.objects.exclude(code_blob=None).values_list('code_blob', flat=True):
+            references[exercise_key] = references.get(exercise_key, 0) + 1
+        for submission_key in Submissions.objects.exclude(submitted_code_blob=None).values_list(
+            'submitted_code_blob', flat=True
+        ):
+            references[submission_key] = references.get(submission_key, 0) + 1
+        self.assertEqual(dict(CodeBlobs.objects.values_list('sha256', 'refcount')), references)
+
+    def test_retain_and_release(self):
+        key = CodeBlobs.retain('x = 1\n')
+        self.assertEqual(CodeBlobs.retain('x = 1\n'), key)
+        self.assertEqual(CodeBlobs.objects.get(sha256=key).refcount, 2)
+        self.assertEqual(CodeBlobs.objects.get(sha256=key).text, 'x = 1\n')
+
+        CodeBlobs.release({key: 1})
+        self.assertEqual(CodeBlobs.objects.get(sha256=key).refcount, 1)
+        CodeBlobs.release({key: 1})
+        self.assertFalse(CodeBlobs.objects.filter(sha256=key).exists())
+
+    def test_identical_code_is_stored_once(self):
+        Submissions.objects.create(student=self.student, exercise=self.exercise, submitted_code='print(1)\n')
+        Submissions.objects.create(student=self.other, exercise=self.exercise, submitted_code='print(1)\n')
+        self.assertEqual(CodeBlobs.objects.count(), 1)
+        self.assertEqual(CodeBlobs.objects.get().refcount, 3)
+        self.assertRefcountsConsistent()
+
+    def test_empty_code_has_no_blob(self):
+        submission = Submissions.objects.create(student=self.student, exercise=self.exercise)
+        self.assertIsNone(submission.submitted_code_blob_id)
+        self.assertEqual(Submissions.objects.get(pk=submission.pk).submitted_code, '')
+
+    def test_changing_code_moves_references(self):
+        submission = Submissions.objects.create(
+            student=self.student, exercise=self.exercise, submitted_code='print(2)\n'
+        )
+        submission.submitted_code = 'print(3)\n'
+        submission.save()
+        self.assertEqual(Submissions.objects.get(pk=submission.pk).submitted_code, 'print(3)\n')
+        self.assertFalse(CodeBlobs.objects.filter(sha256=CodeBlobs.key('print(2)\n')).exists())
+        self.assertRefcountsConsistent()
+
+        submission.submitted_code = ''
+        submission.save(update_fields=['submitted_code'])
+        self.assertIsNone(Submissions.objects.get(pk=submission.pk).submitted_code_blob_id)
+        self.assertRefcountsConsistent()
+
+    def test_saving_a_stale_instance_keeps_newer_code(self):
+        submission = Submissions.objects.create(
+            student=self.student, exercise=self.exercise, submitted_code='print(2)\n'
+        )
+        stale = Submissions.objects.get(pk=submission.pk)
+        history.save_code(submission, 'print(3)\n')
+
+        stale.feedback = 'Good'
+        stale.save()
+        fresh = Submissions.objects.get(pk=submission.pk)
+        self.assertEqual(fresh.submitted_code, 'print(3)\n')
+        self.assertEqual(fresh.feedback, 'Good')
+        self.assertRefcountsConsistent()
+
+    def test_deleting_rows_releases_blobs(self):
+        Submissions.objects.create(student=self.student, exercise=self.exercise, submitted_code='print(4)\n')
+        Submissions.objects.create(student=self.other, exercise=self.exercise, submitted_code='print(4)\n')
+        self.student.delete()
+        self.assertRefcountsConsistent()
+        self.exercise.delete()
+        self.assertFalse(CodeBlobs.objects.exists())
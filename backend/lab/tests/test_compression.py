@@ -0,0 +1,89 @@
+import gzip
+import json
+
+import brotli
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from lab.middleware import CompressionMiddleware, accepted_encodings
+
+PAYLOAD = {'files': [{'name': f'main{i}.py', 'content': 'print("hello")\n' * 20} for i in range(10)]}
+
+
+def ndjson_lines():
+    for i in range(200):
+        yield (json.dumps({'id': i, 'content': 'x = 1\n' * 10}) + '\n').encode()
+
+
+async def ndjson_alines():
+    for line in ndjson_lines():
+        yield line
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def process(self, response, accept_encoding='gzip, br'):
+        request = self.factory.get('/api/exercises/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_accepted_encodings_parses_q_values(self):
+        self.assertEqual(accepted_encodings('gzip;q=0.5, BR, identity;q=x'),
+                         {'gzip': 0.5, 'br': 1.0, 'identity': 0.0})
+
+    def test_brotli_preferred_on_tie(self):
+        response = self.process(JsonResponse(PAYLOAD))
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(json.loads(brotli.decompress(response.content)), PAYLOAD)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_gzip_by_client_preference(self):
+        response = self.process(JsonResponse(PAYLOAD), 'gzip, br;q=0.5')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content)), PAYLOAD)
+
+    def test_no_accepted_encoding_is_uncompressed(self):
+        response = self.process(JsonResponse(PAYLOAD), 'identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(json.loads(response.content), PAYLOAD)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_small_body_is_uncompressed(self):
+        response = self.process(JsonResponse({'id': 1}))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertFalse(response.has_header('Vary'))
+
+    @override_settings(COMPRESSION={'MIN_SIZE': 1})
+    def test_min_size_setting(self):
+        response = self.process(JsonResponse({'name': 'a' * 100}))
+        self.assertEqual(response['Content-Encoding'], 'br')
+
+    def test_html_is_uncompressed(self):
+        response = self.process(HttpResponse('<p>hello</p>' * 500, content_type='text/html'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_strong_etag_weakened(self):
+        original = JsonResponse(PAYLOAD)
+        original['ETag'] = '"abc"'
+        response = self.process(original)
+        self.assertEqual(response['ETag'], 'W/"abc"')
+
+    def test_ndjson_stream_compressed(self):
+        original = StreamingHttpResponse(ndjson_lines(), content_type='application/x-ndjson')
+        response = self.process(original, 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b''.join(ndjson_lines()))
+
+    def test_async_ndjson_stream_compressed(self):
+        original = StreamingHttpResponse(ndjson_alines(), content_type='application/x-ndjson')
+        response = self.process(original, 'br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+
+        async def collect():
+            return b''.join([chunk async for chunk in response.streaming_content])
+
+        self.assertEqual(brotli.decompress(async_to_sync(collect)()), b''.join(ndjson_lines()))
@@ -0,0 +1,58 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from lab.models import ClassroomExercises, Classrooms, Exercises
+from lab.tests.utils import create_user
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = create_user('teacher', 'Teachers')
+        self.classroom = Classrooms.objects.create(name='Python', description='', creator_user=self.teacher)
+        self.exercise = Exercises.objects.create(name='Loops', creator_user=self.teacher, instructions='')
+        self.link = ClassroomExercises.objects.create(classroom=self.classroom, exercise=self.exercise)
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def revalidate(self, url, **headers):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+        return response, self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'], **headers)
+
+    def test_unchanged_detail_is_not_modified(self):
+        url = f'/api/exercises/{self.exercise.id}/'
+        response, revalidated = self.revalidate(url)
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.content, b'')
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_give_a_new_etag(self):
+        url = f'/api/exercises/{self.exercise.id}/'
+        response = self.client.get(url)
+        self.exercise.instructions = 'Print 1 to 10'
+        self.exercise.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['instructions'], 'Print 1 to 10')
+
+    def test_list_detects_removed_rows(self):
+        url = f'/api/classrooms/{self.classroom.slug}/exercises/'
+        response, revalidated = self.revalidate(url)
+        self.assertEqual(revalidated.status_code, 304)
+        self.link.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['exercises'], [])
+
+    def test_etag_depends_on_user_and_query(self):
+        url = f'/api/classrooms/{self.classroom.slug}/exercises/'
+        etag = self.client.get(url)['ETag']
+        self.assertNotEqual(self.client.get(url + '?fields=name')['ETag'], etag)
+        self.client.force_authenticate(create_user('student', 'Students'))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
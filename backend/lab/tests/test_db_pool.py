@@ -0,0 +1,51 @@
+import datetime
+from unittest import skipUnless
+
+from django.db import connection
+from django.db.backends.postgresql.base import TIMESTAMPTZ_OID
+from django.test import TransactionTestCase, override_settings
+from psycopg.pq import Format
+
+from lab.tests.utils import create_user
+
+POOLED = connection.settings_dict['ENGINE'] == 'lab.db.postgresql_pool' and bool(
+    connection.settings_dict['OPTIONS'].get('pool')
+)
+
+
+@skipUnless(POOLED, 'Needs the lab.db.postgresql_pool engine with OPTIONS["pool"]')
+class PooledConnectionTests(TransactionTestCase):
+    # Outside a test transaction, so closing the connection hands it back to
+    # the pool and the next query checks one out again
+
+    def round_trip(self, value):
+        user = create_user('student')
+        user.date_joined = value
+        user.save(update_fields=['date_joined'])
+        connection.close()
+        user.refresh_from_db()
+        return user.date_joined
+
+    def checked_out_timezone(self):
+        connection.close()
+        connection.ensure_connection()
+        return connection.connection.adapters.get_loader(TIMESTAMPTZ_OID, Format.TEXT).timezone
+
+    def test_use_tz(self):
+        value = datetime.datetime(2026, 3, 1, 12, 30, tzinfo=datetime.timezone.utc)
+        self.assertEqual(self.round_trip(value), value)
+        self.assertEqual(self.checked_out_timezone(), datetime.timezone.utc)
+
+    @override_settings(USE_TZ=False)
+    def test_naive_datetimes(self):
+        value = datetime.datetime(2026, 3, 1, 12, 30)
+        self.assertEqual(self.round_trip(value), value)
+        self.assertIsNone(self.checked_out_timezone())
+
+    @override_settings(TIME_ZONE='America/Chicago', USE_TZ=False)
+    def test_time_zone(self):
+        value = datetime.datetime(2026, 3, 1, 12, 30)
+        self.assertEqual(self.round_trip(value), value)
+        with connection.cursor() as cursor:
+            cursor.execute('SHOW TIME ZONE')
+            self.assertEqual(cursor.fetchone()[0], 'America/Chicago')
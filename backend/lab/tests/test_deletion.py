@@ -0,0 +1,122 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from lab import deletion
+from lab.models import (
+    ClassroomDeletionJobs, ClassroomExercises, ClassroomUsers, Classrooms, CodeBlobs, ExerciseTests, Exercises,
+    SubmissionResults, Submissions, Tests,
+)
+from lab.tests.utils import create_user
+
+
+class ClassroomDeletionTests(TestCase):
+    def setUp(self):
+        self.teacher = create_user('teacher', 'Teachers')
+        self.classroom = self.create_classroom('Python', exercises=3)
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def create_classroom(self, name, exercises):
+        classroom = Classrooms.objects.create(name=name, description='', creator_user=self.teacher)
+        student = create_user(f'{name.lower()}-student', 'Students')
+        ClassroomUsers.objects.create(classroom=classroom, user=student)
+        for i in range(exercises):
+            exercise = Exercises.objects.create(
+                name=f'{name} {i}', creator_user=self.teacher, instructions='', code=f'# {name} {i}\n'
+            )
+            ClassroomExercises.objects.create(classroom=classroom, exercise=exercise)
+            ExerciseTests.objects.create(exercise=exercise, test=Tests.objects.create(name=f'{name} {i}'))
+            submission = Submissions.objects.create(
+                student=student, exercise=exercise, submitted_code=f'print({i})\n'
+            )
+            SubmissionResults.objects.create(submission=submission, code_hash='x')
+        return classroom
+
+    def assertClassroomDeleted(self):
+        self.assertFalse(Classrooms.objects.filter(id=self.classroom.id).exists())
+        self.assertFalse(Exercises.objects.filter(name__startswith='Python').exists())
+        self.assertFalse(Tests.objects.filter(name__startswith='Python').exists())
+        self.assertEqual(Submissions.objects.count(), 1)
+        self.assertEqual(SubmissionResults.objects.count(), 1)
+        # Only the code of the other classroom is still referenced
+        self.assertEqual(CodeBlobs.objects.count(), 2)
+
+    def test_small_classroom_is_deleted_in_the_request(self):
+        self.create_classroom('Other', exercises=1)
+        response = self.client.delete(f'/api/classrooms/{self.classroom.slug}/delete/')
+        self.assertEqual(response.status_code, 200)
+        self.assertClassroomDeleted()
+
+    def test_only_the_creator_can_delete(self):
+        self.client.force_authenticate(create_user('other', 'Teachers'))
+        response = self.client.delete(f'/api/classrooms/{self.classroom.slug}/delete/')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(CLASSROOM_DELETION={'BACKGROUND_THRESHOLD': 1, 'BATCH_EXERCISES': 2})
+    def test_large_classroom_is_deleted_by_a_job(self):
+        self.create_classroom('Other', exercises=1)
+        response = self.client.delete(f'/api/classrooms/{self.classroom.slug}/delete/')
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()['job']['id']
+        self.assertEqual(response.json()['job']['status'], 'queued')
+        # Asking again returns the same job
+        response = self.client.delete(f'/api/classrooms/{self.classroom.slug}/delete/')
+        self.assertEqual(response.json()['job']['id'], job_id)
+
+        self.assertTrue(deletion.run_deletion_job(job_id))
+        self.assertClassroomDeleted()
+        job = self.client.get(f'/api/classrooms/deletions/{job_id}/').json()
+        self.assertEqual((job['status'], job['deleted_exercises'], job['progress']), ('done', 3, 1.0))
+
+        # A finished job is not run again
+        self.assertFalse(deletion.run_deletion_job(job_id, resume=True))
+
+
+class ResumeDeletionTests(TestCase):
+    def setUp(self):
+        teacher = create_user('teacher', 'Teachers')
+        self.classroom = Classrooms.objects.create(name='Python', description='', creator_user=teacher)
+        self.job = ClassroomDeletionJobs.objects.create(
+            classroom_id=self.classroom.id, classroom_slug=self.classroom.slug, status='running',
+        )
+
+    def set_heartbeat(self, age):
+        ClassroomDeletionJobs.objects.filter(id=self.job.id).update(heartbeat_at=timezone.now() - age)
+
+    def resume(self):
+        out = StringIO()
+        call_command('run_classroom_deletions', '--resume', stdout=out)
+        return out.getvalue()
+
+    def test_live_job_is_not_resumed(self):
+        self.set_heartbeat(timedelta(seconds=5))
+        self.assertEqual(self.resume(), '')
+        self.assertTrue(Classrooms.objects.filter(id=self.classroom.id).exists())
+
+    def test_expired_job_is_resumed(self):
+        self.set_heartbeat(timedelta(seconds=deletion.deletion_setting('LEASE_SECONDS') + 1))
+        self.assertIn('python: done', self.resume())
+        self.assertFalse(Classrooms.objects.filter(id=self.classroom.id).exists())
+
+    def test_claims(self):
+        ClassroomDeletionJobs.objects.filter(id=self.job.id).update(status='queued')
+        self.assertIsNotNone(deletion._claim_job(self.job.id, resume=False))
+        # Claimed jobs can't be claimed again while their heartbeat is fresh
+        self.assertIsNone(deletion._claim_job(self.job.id, resume=True))
+        # Jobs started before heartbeats existed count as expired
+        ClassroomDeletionJobs.objects.filter(id=self.job.id).update(heartbeat_at=None)
+        self.assertIsNotNone(deletion._claim_job(self.job.id, resume=True))
+
+    def test_runner_stops_after_a_takeover(self):
+        self.set_heartbeat(timedelta(0))
+        # Another runner renewed the heartbeat since this one claimed the job
+        with mock.patch.object(deletion, '_claim_job', return_value=timezone.now() - timedelta(hours=1)):
+            with self.assertLogs('lab.deletion', 'WARNING'):
+                deletion.run_deletion_job(self.job.id, resume=True)
+        self.assertTrue(Classrooms.objects.filter(id=self.classroom.id).exists())
@@ -0,0 +1,38 @@
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+
+from lab.accounts import deduplicate_emails, find_duplicate_emails
+from lab.tests.utils import create_user
+
+
+class EmailLoginTests(TestCase):
+    def setUp(self):
+        self.user = create_user('ada')
+
+    def test_login_by_email_ignores_case(self):
+        self.assertEqual(authenticate(username='  ADA@Example.com ', password='password'), self.user)
+
+    def test_login_by_username(self):
+        self.assertEqual(authenticate(username='ada', password='password'), self.user)
+
+    def test_wrong_password_or_unknown_email(self):
+        self.assertIsNone(authenticate(username='ada@example.com', password='wrong'))
+        self.assertIsNone(authenticate(username='bob@example.com', password='password'))
+
+    def test_inactive_user_cannot_log_in(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(authenticate(username='ada@example.com', password='password'))
+
+    def test_emails_are_unique_ignoring_case(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            User.objects.create_user('ada2', 'Ada@Example.com', 'password')
+        # Accounts without an email are not constrained
+        User.objects.create_user('nomail1', '', 'password')
+        User.objects.create_user('nomail2', '', 'password')
+
+    def test_no_duplicates_to_clear(self):
+        self.assertEqual(find_duplicate_emails(User), {})
+        self.assertEqual(deduplicate_emails(User), {})
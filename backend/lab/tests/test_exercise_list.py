@@ -0,0 +1,35 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from lab.models import ClassroomExercises, Classrooms, Exercises
+
+
+class ExerciseListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        teacher = User.objects.create_user('teacher', 'teacher@example.com', 'password')
+        self.classroom = Classrooms.objects.create(name='Python', description='', creator_user=teacher)
+        exercise = Exercises.objects.create(
+            name='Loops', creator_user=teacher, instructions='Print 1', code='print(1)\n'
+        )
+        ClassroomExercises.objects.create(classroom=self.classroom, exercise=exercise)
+        self.client = APIClient()
+        self.client.force_authenticate(teacher)
+
+    def get(self, query=''):
+        return self.client.get(f'/api/classrooms/{self.classroom.slug}/exercises/{query}')
+
+    def test_default_fields_are_lightweight(self):
+        exercise = self.get().json()['exercises'][0]
+        self.assertEqual(set(exercise), {'id', 'name', 'slug', 'created_at', 'updated_at'})
+
+    def test_requested_fields(self):
+        exercise = self.get('?fields=name,instructions,code').json()['exercises'][0]
+        self.assertEqual(exercise, {'name': 'Loops', 'instructions': 'Print 1', 'code': 'print(1)\n'})
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.get('?fields=name,password')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json()['error'])
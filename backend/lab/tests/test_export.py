@@ -0,0 +1,41 @@
+import json
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from lab.models import Exercises, Submissions
+from lab.tests.utils import create_user
+
+
+class ExportSubmissionsTests(TestCase):
+    def setUp(self):
+        self.teacher = create_user('teacher', 'Teachers')
+        self.exercise = Exercises.objects.create(name='Loops', creator_user=self.teacher, instructions='')
+        for i, status in enumerate(['draft', 'submitted_by_student', 'submitted_by_student']):
+            student = create_user(f'student{i}', 'Students', first_name='Ada', last_name=str(i))
+            Submissions.objects.create(
+                student=student, exercise=self.exercise, status=status, submitted_code=f'print({i})\n'
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def export(self, query=''):
+        return self.client.get(f'/api/exercises/{self.exercise.id}/submissions/export/{query}')
+
+    def lines(self, response):
+        return [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+    def test_streams_one_submission_per_line(self):
+        response = self.export()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = self.lines(response)
+        self.assertEqual([row['submitted_code'] for row in rows], ['print(0)\n', 'print(1)\n', 'print(2)\n'])
+        self.assertEqual(rows[0]['student']['full_name'], 'Ada 0')
+
+    def test_status_filter(self):
+        rows = self.lines(self.export('?status=submitted_by_student'))
+        self.assertEqual(len(rows), 2)
+
+    def test_students_cannot_export(self):
+        self.client.force_authenticate(create_user('student', 'Students'))
+        self.assertEqual(self.export().status_code, 403)
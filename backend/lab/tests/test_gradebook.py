@@ -0,0 +1,57 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from lab.models import ClassroomExercises, ClassroomUsers, Classrooms, Exercises, Submissions
+from lab.tests.utils import create_user
+
+
+class GradebookTests(TestCase):
+    def setUp(self):
+        self.teacher = create_user('teacher', 'Teachers')
+        self.classroom = Classrooms.objects.create(name='Python', description='', creator_user=self.teacher)
+        self.students = [create_user(f'student{i}', 'Students') for i in range(3)]
+        for student in self.students:
+            ClassroomUsers.objects.create(classroom=self.classroom, user=student)
+        self.exercises = [
+            Exercises.objects.create(name=f'Exercise {i}', creator_user=self.teacher, instructions='')
+            for i in range(2)
+        ]
+        for exercise in self.exercises:
+            ClassroomExercises.objects.create(classroom=self.classroom, exercise=exercise)
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def gradebook(self):
+        return self.client.get(f'/api/classrooms/{self.classroom.slug}/gradebook/')
+
+    def test_matrix_and_counts(self):
+        Submissions.objects.create(student=self.students[0], exercise=self.exercises[0], status='submitted_by_student')
+        Submissions.objects.create(student=self.students[1], exercise=self.exercises[0], status='assigned_to_student')
+        # Outside the classroom: not counted
+        outsider = create_user('outsider', 'Students')
+        Submissions.objects.create(student=outsider, exercise=self.exercises[0], status='assigned_to_student')
+
+        data = self.gradebook().json()
+        statuses = data['statuses']
+        self.assertEqual(statuses[0], 'not_started')
+        submitted, assigned = statuses.index('submitted_by_student'), statuses.index('assigned_to_student')
+        self.assertEqual(data['matrix'], [[submitted, 0], [assigned, 0], [0, 0]])
+        self.assertEqual([student['username'] for student in data['students']], ['student0', 'student1', 'student2'])
+
+        self.assertEqual(data['exercise_counts'][0][0], 1)
+        self.assertEqual(data['exercise_counts'][0][submitted], 1)
+        self.assertEqual(data['exercise_counts'][0][assigned], 1)
+        self.assertEqual(data['exercise_counts'][1][0], 3)
+        self.assertEqual(data['student_counts'][0][submitted], 1)
+        self.assertEqual(data['student_counts'][2][0], 2)
+
+    def test_query_count_does_not_grow_with_the_classroom(self):
+        for student in self.students:
+            for exercise in self.exercises:
+                Submissions.objects.create(student=student, exercise=exercise)
+        with self.assertNumQueries(6):
+            self.assertEqual(self.gradebook().status_code, 200)
+
+    def test_students_cannot_view(self):
+        self.client.force_authenticate(self.students[0])
+        self.assertEqual(self.gradebook().status_code, 403)
@@ -0,0 +1,122 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from lab import grading
+from lab.models import ExerciseTests, Exercises, GradingCache, SubmissionResults, Submissions, Tests
+
+
+class GradingSandboxTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        try:
+            cls.pool = grading.GradingPool(size=1)
+        except grading.GraderUnavailable as e:
+            cls.pool = None
+            cls.unavailable = str(e)
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.pool is not None:
+            cls.pool.close()
+        super().tearDownClass()
+
+    def setUp(self):
+        if self.pool is None:
+            self.skipTest(self.unavailable)
+
+    def run_code(self, code):
+        return self.pool.run(code)
+
+    def test_runs_code(self):
+        self.assertEqual(self.run_code('print(6 * 7)'), {'output': '42\n', 'error': '', 'finished': True})
+
+    def test_environment_is_empty(self):
+        output = self.run_code('import os\nprint(sorted(os.environ))')['output']
+        self.assertNotIn('SECRET_KEY', output)
+        self.assertNotIn('DB_PASSWORD', output)
+
+    def test_runs_unprivileged(self):
+        self.assertNotEqual(self.run_code('import os\nprint(os.getuid())')['output'].strip(), '0')
+
+    def test_project_files_are_hidden(self):
+        code = f'import os\nprint(os.listdir({str(settings.BASE_DIR)!r}))'
+        self.assertEqual(self.run_code(code)['output'].strip(), '[]')
+
+    def test_working_directory_is_read_only(self):
+        output = self.run_code("open('x', 'w')")['output']
+        self.assertIn('Error', output)
+
+    def test_no_network(self):
+        code = (
+            'import socket\n'
+            'try:\n'
+            "    socket.create_connection(('127.0.0.1', 5432), timeout=1)\n"
+            "    print('connected')\n"
+            'except OSError as e:\n'
+            "    print('refused')\n"
+        )
+        self.assertEqual(self.run_code(code)['output'].strip(), 'refused')
+
+    def test_limits(self):
+        self.assertEqual(self.run_code('while True: pass')['error'], 'CPU time limit exceeded')
+        self.assertIn('MemoryError', self.run_code("x = ' ' * (1 << 30)")['output'])
+
+    @override_settings(GRADING={'WALL_SECONDS': 1})
+    def test_wall_clock_timeout_is_not_finished(self):
+        run = self.run_code('import time\ntime.sleep(3)')
+        self.assertEqual(run['error'], 'Time limit exceeded')
+        self.assertFalse(run['finished'])
+
+
+class GradeSubmissionTests(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user('student', 'student@example.com', 'password')
+        exercise = Exercises.objects.create(name='Answer', creator_user=self.student, instructions='')
+        test = Tests.objects.create(name='Prints 42', expected_output='42')
+        ExerciseTests.objects.create(exercise=exercise, test=test)
+        self.submission = Submissions.objects.create(
+            student=self.student, exercise=exercise, submitted_code='print(42)'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def grade(self, pool):
+        with mock.patch.object(grading, 'get_pool', return_value=pool):
+            return self.client.post(f'/api/submissions/{self.submission.id}/grade/')
+
+    def test_finished_run_is_stored(self):
+        pool = mock.Mock()
+        pool.run.return_value = {'output': '42\n', 'error': '', 'finished': True}
+        response = self.grade(pool)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['passed'])
+        self.assertEqual(GradingCache.objects.count(), 1)
+        self.assertEqual(SubmissionResults.objects.get().output, '42\n')
+
+        # The same code is served from the cache
+        response = self.grade(pool)
+        self.assertTrue(response.json()['cached'])
+        self.assertEqual(pool.run.call_count, 1)
+
+    def test_unfinished_run_is_not_stored(self):
+        pool = mock.Mock()
+        pool.run.return_value = {'output': '', 'error': 'Time limit exceeded', 'finished': False}
+        response = self.grade(pool)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['error'], 'Time limit exceeded')
+        self.assertFalse(response.json()['passed'])
+        self.assertFalse(GradingCache.objects.exists())
+        self.assertFalse(SubmissionResults.objects.exists())
+
+    def test_unavailable_grader_is_503(self):
+        pool = mock.Mock()
+        pool.run.side_effect = grading.GraderUnavailable('Grading worker failed')
+        response = self.grade(pool)
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(GradingCache.objects.exists())
+        self.assertFalse(SubmissionResults.objects.exists())
@@ -0,0 +1,59 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from lab import grading_cache
+from lab.models import GradingCache
+
+
+class GradingCacheTests(TestCase):
+    def setUp(self):
+        grading_cache.reset_stats()
+        self.addCleanup(grading_cache.reset_stats)
+
+    def store(self, code_hash, suite='suite'):
+        grading_cache.store(code_hash, suite, {'output': '42\n', 'error': ''}, [True])
+
+    def test_lookup_counts_hits_and_misses(self):
+        self.assertIsNone(grading_cache.lookup('code', 'suite'))
+        self.store('code')
+        entry = grading_cache.lookup('code', 'suite')
+        self.assertEqual((entry.output, entry.results), ('42\n', [True]))
+        self.assertIsNone(grading_cache.lookup('code', 'other suite'))
+
+        stats = grading_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+        self.assertAlmostEqual(stats['hit_ratio'], 1 / 3)
+        self.assertEqual(stats['entries'], 1)
+        self.assertEqual(stats['stored_hits'], 1)
+
+    def test_storing_twice_keeps_one_entry(self):
+        self.store('code')
+        self.store('code')
+        self.assertEqual(GradingCache.objects.count(), 1)
+
+    @override_settings(GRADING={'CACHE_MAX_ENTRIES': 2, 'CACHE_TTL_DAYS': 30})
+    def test_prune_evicts_expired_then_least_recently_used(self):
+        now = timezone.now()
+        for i, age in enumerate([40, 3, 2, 1]):
+            self.store(f'code{i}')
+            GradingCache.objects.filter(code_hash=f'code{i}').update(last_used_at=now - timedelta(days=age))
+
+        self.assertEqual(grading_cache.prune(), 2)
+        self.assertEqual(
+            set(GradingCache.objects.values_list('code_hash', flat=True)), {'code2', 'code3'}
+        )
+
+    def test_command_prints_counters(self):
+        self.store('code')
+        grading_cache.lookup('code', 'suite')
+        grading_cache.lookup('other', 'suite')
+
+        out = StringIO()
+        call_command('grading_cache', '--reset-stats', stdout=out)
+        self.assertIn('Lookups: 1 hits, 1 misses', out.getvalue())
+        self.assertIn('Hit ratio: 50.0%', out.getvalue())
+        self.assertEqual(grading_cache.stats()['hits'], 0)
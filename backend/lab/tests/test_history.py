@@ -0,0 +1,91 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from lab import history
+from lab.models import Exercises, Submissions
+
+
+class HistoryTests(TestCase):
+    def setUp(self):
+        student = User.objects.create_user('student', 'student@example.com', 'password')
+        exercise = Exercises.objects.create(name='Loops', creator_user=student, instructions='')
+        self.submission = Submissions.objects.create(student=student, exercise=exercise)
+
+    def test_apply_delta(self):
+        self.assertEqual(history.apply_delta('abcdef', [[0, 1, 'X'], [3, 5, '']]), 'Xbcf')
+        self.assertEqual(history.apply_delta('abc', [[3, 3, 'd']]), 'abcd')
+        self.assertEqual(history.apply_delta('abc', []), 'abc')
+
+    def test_apply_delta_rejects_bad_deltas(self):
+        for delta in ([[2, 1, 'x']], [[0, 4, '']], [[2, 2, 'x'], [0, 1, '']], [[0, 1]], [['0', 1, '']], 'x'):
+            with self.subTest(delta=delta):
+                with self.assertRaises(history.DeltaError):
+                    history.apply_delta('abc', delta)
+
+    def test_diff_round_trips(self):
+        pairs = [
+            ('', 'print(1)\n'),
+            ('a\nb\nc\n', 'a\nB\nc\nd\n'),
+            ('a\nb\nc', 'c'),
+            ('héllo\nwörld\n', 'héllo\n\nwörld'),
+        ]
+        for old, new in pairs:
+            with self.subTest(old=old, new=new):
+                self.assertEqual(history.apply_delta(old, history.diff(old, new)), new)
+        self.assertEqual(history.diff('same\n', 'same\n'), [])
+
+    def test_code_at_rebuilds_every_version(self):
+        texts = {}
+        code = ''
+        for i in range(45):
+            code = code + f'print({i})\n' if i % 7 else f'# rewrite {i}\n'
+            version = history.save_code(self.submission, code)
+            texts[version] = code
+        self.assertEqual(self.submission.version, 45)
+        self.assertEqual(self.submission.submitted_code, code)
+        for version, text in texts.items():
+            self.assertEqual(history.code_at(self.submission.id, version)[0], text)
+        self.assertIsNone(history.code_at(self.submission.id, 46))
+
+    def test_save_code_by_delta(self):
+        version = history.save_code(self.submission, 'a\nb\n')
+        version = history.save_code(self.submission, delta=[[2, 3, 'c']], base_version=version)
+        self.assertEqual(self.submission.submitted_code, 'a\nc\n')
+        with self.assertRaises(history.VersionConflict):
+            history.save_code(self.submission, delta=[], base_version=version - 1)
+
+    def test_unchanged_code_keeps_the_version(self):
+        version = history.save_code(self.submission, 'a\n')
+        self.assertEqual(history.save_code(self.submission, 'a\n'), version)
+
+
+class AutosaveViewTests(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user('student', 'student@example.com', 'password')
+        exercise = Exercises.objects.create(name='Loops', creator_user=self.student, instructions='')
+        self.submission = Submissions.objects.create(student=self.student, exercise=exercise)
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def autosave(self, body):
+        return self.client.post(f'/api/submissions/{self.submission.id}/autosave/', body, format='json')
+
+    def test_autosave_by_delta(self):
+        version = self.autosave({'base_version': 0, 'code': 'a\nb\n'}).json()['version']
+        response = self.autosave({'base_version': version, 'delta': [[2, 3, 'c']]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Submissions.objects.get(pk=self.submission.pk).submitted_code, 'a\nc\n')
+
+        response = self.client.get(f'/api/submissions/{self.submission.id}/versions/{version}/')
+        self.assertEqual(response.json()['code'], 'a\nb\n')
+
+    def test_stale_base_version_conflicts(self):
+        self.autosave({'base_version': 0, 'code': 'a\n'})
+        response = self.autosave({'base_version': 0, 'delta': []})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['version'], 1)
+
+    def test_bad_delta_is_rejected(self):
+        response = self.autosave({'base_version': 0, 'delta': [[1, 0, 'x']]})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,61 @@
+import uuid
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from lab.models import Exercises, IdempotencyKeys, Submissions
+from lab.tests.utils import create_user
+
+
+class CreateSubmissionTests(TestCase):
+    def setUp(self):
+        self.teacher = create_user('teacher', 'Teachers')
+        self.student = create_user('student', 'Students')
+        self.exercise = Exercises.objects.create(name='Loops', creator_user=self.teacher, instructions='')
+        self.url = f'/api/exercises/{self.exercise.id}/submissions/create/'
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def post(self, data, key=None, url=None):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key is not None else {}
+        return self.client.post(url or self.url, data, format='json', **headers)
+
+    def test_create_then_existing(self):
+        first = self.post({'code': 'print(1)'})
+        self.assertEqual(first.status_code, 201)
+        second = self.post({})
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json()['id'], first.json()['id'])
+        self.assertEqual(second.json()['submitted_code'], 'print(1)')
+
+    def test_replay_returns_stored_response(self):
+        first = self.post({'code': 'print(1)'}, key='attempt-1')
+        self.assertEqual(first.status_code, 201)
+        replay = self.post({'code': 'print(1)'}, key='attempt-1')
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(Submissions.objects.get(student=self.student).version, 1)
+
+    def test_key_reused_for_different_body(self):
+        self.post({'code': 'print(1)'}, key='attempt-1')
+        response = self.post({'code': 'print(2)'}, key='attempt-1')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Submissions.objects.get(student=self.student).submitted_code, 'print(1)')
+
+    def test_key_in_flight(self):
+        self.post({'code': 'print(1)'}, key='attempt-1')
+        IdempotencyKeys.objects.update(status=None, response=None)
+        response = self.post({'code': 'print(1)'}, key='attempt-1')
+        self.assertEqual(response.status_code, 409)
+
+    def test_invalid_key(self):
+        response = self.post({}, key='x' * (IdempotencyKeys._meta.get_field('key').max_length + 1))
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_exercise(self):
+        # Inside the test's transaction PostgreSQL hasn't checked the foreign key yet
+        missing = uuid.uuid4()
+        response = self.post({'code': 'print(1)'}, url=f'/api/exercises/{missing}/submissions/create/')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Submissions.objects.filter(exercise_id=missing).exists())
@@ -0,0 +1,47 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from lab.models import Classrooms
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        teacher = User.objects.create_user('teacher', 'teacher@example.com', 'password')
+        for i in range(5):
+            Classrooms.objects.create(name=f'Class {i}', description='', creator_user=teacher)
+        self.client = APIClient()
+        self.client.force_authenticate(teacher)
+
+    def names(self, response):
+        return [classroom['name'] for classroom in response.json()['classrooms']]
+
+    def test_unpaged_without_limit_or_cursor(self):
+        response = self.client.get('/api/classrooms/')
+        self.assertEqual(len(self.names(response)), 5)
+        self.assertIsNone(response.json()['next'])
+        self.assertIsNone(response.json()['next_cursor'])
+
+    def test_follows_next_links(self):
+        # Rows with the same timestamp are ordered by id, none is skipped or repeated
+        Classrooms.objects.filter(name__in=['Class 1', 'Class 2', 'Class 3']).update(created_at=timezone.now())
+        names = []
+        url = '/api/classrooms/?limit=2'
+        while url:
+            response = self.client.get(url)
+            self.assertLessEqual(len(self.names(response)), 2)
+            names += self.names(response)
+            url = response.json()['next']
+        self.assertEqual(sorted(names), [f'Class {i}' for i in range(5)])
+
+    def test_cursor_without_limit_uses_default_limit(self):
+        first = self.client.get('/api/classrooms/?limit=1').json()
+        with override_settings(PAGINATION={'DEFAULT_LIMIT': 3}):
+            response = self.client.get(f"/api/classrooms/?cursor={first['next_cursor']}")
+        self.assertEqual(len(self.names(response)), 3)
+        self.assertNotIn(first['classrooms'][0]['name'], self.names(response))
+
+    def test_invalid_page_requests(self):
+        self.assertEqual(self.client.get('/api/classrooms/?cursor=nope').status_code, 400)
+        self.assertEqual(self.client.get('/api/classrooms/?limit=ten').status_code, 400)
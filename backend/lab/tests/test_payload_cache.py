@@ -0,0 +1,66 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from lab import payload_cache
+from lab.models import ExerciseTests, Exercises, Tests
+from lab.tests.utils import create_user
+
+
+class PayloadCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = create_user('teacher', 'Teachers', first_name='Ada')
+        self.exercise = Exercises.objects.create(name='Loops', creator_user=self.teacher, instructions='')
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def get_exercise(self):
+        return self.client.get(f'/api/exercises/{self.exercise.id}/').json()
+
+    def is_cached(self):
+        return cache.get(payload_cache.exercise_key(self.exercise.id)) is not None
+
+    def test_read_through(self):
+        self.get_exercise()
+        self.assertTrue(self.is_cached())
+        self.get_exercise()
+        stats = payload_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_changes_invalidate(self):
+        self.get_exercise()
+        self.exercise.instructions = 'Print 1 to 10'
+        self.exercise.save()
+        self.assertFalse(self.is_cached())
+        self.assertEqual(self.get_exercise()['instructions'], 'Print 1 to 10')
+
+    def test_tests_list_is_invalidated_by_test_changes(self):
+        test = Tests.objects.create(name='Prints 1')
+        ExerciseTests.objects.create(exercise=self.exercise, test=test)
+        url = f'/api/exercises/{self.exercise.id}/tests/'
+        self.assertEqual([t['name'] for t in self.client.get(url).json()['tests']], ['Prints 1'])
+        test.name = 'Prints 1 to 10'
+        test.save()
+        self.assertEqual([t['name'] for t in self.client.get(url).json()['tests']], ['Prints 1 to 10'])
+
+    def test_creator_rename_invalidates_details_in_bulk(self):
+        for i in range(5):
+            Exercises.objects.create(name=f'Exercise {i}', creator_user=self.teacher, instructions='')
+        self.get_exercise()
+        teacher = User.objects.get(pk=self.teacher.pk)
+        teacher.first_name = 'Grace'
+        # The save and one query for the exercise ids, however many there are
+        with self.assertNumQueries(2):
+            teacher.save()
+        self.assertFalse(self.is_cached())
+        self.assertEqual(self.get_exercise()['creator']['full_name'], 'Grace')
+
+    def test_other_user_changes_keep_the_cache(self):
+        self.get_exercise()
+        teacher = User.objects.get(pk=self.teacher.pk)
+        teacher.set_password('another password')
+        with self.assertNumQueries(1):
+            teacher.save()
+        self.assertTrue(self.is_cached())
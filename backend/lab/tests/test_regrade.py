@@ -0,0 +1,58 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from lab.models import (
+    ExerciseTests, Exercises, SubmissionResults, SubmissionTestResults, Submissions, Tests,
+)
+
+
+class RegradeTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher', 'teacher@example.com', 'password')
+        self.exercise = Exercises.objects.create(name='Answer', creator_user=self.teacher, instructions='')
+        self.old_test = Tests.objects.create(name='Runs', expected_output='')
+        ExerciseTests.objects.create(exercise=self.exercise, test=self.old_test)
+
+        self.right = self.graded_submission('right', '42\n')
+        self.wrong = self.graded_submission('wrong', '41\n')
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def graded_submission(self, username, output):
+        student = User.objects.create_user(username, f'{username}@example.com', 'password')
+        submission = Submissions.objects.create(student=student, exercise=self.exercise)
+        SubmissionResults.objects.create(submission=submission, code_hash='x', output=output, error='')
+        SubmissionTestResults.objects.create(submission=submission, test=self.old_test, passed=True)
+        return submission
+
+    def passed(self, submission, test_id):
+        return SubmissionTestResults.objects.get(submission=submission, test_id=test_id).passed
+
+    def test_new_test_is_checked_against_stored_output(self):
+        response = self.client.post(
+            f'/api/exercises/{self.exercise.id}/tests/create/',
+            {'name': 'Prints 42', 'test_type': 'exact', 'expected_output': '42'},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['regraded_submissions'], 2)
+        test_id = response.json()['id']
+        self.assertTrue(self.passed(self.right, test_id))
+        self.assertFalse(self.passed(self.wrong, test_id))
+
+    def test_changed_expectation_regrades_only_that_test(self):
+        test = Tests.objects.create(name='Prints 42', expected_output='42')
+        ExerciseTests.objects.create(exercise=self.exercise, test=test)
+        SubmissionTestResults.objects.create(submission=self.right, test=test, passed=True)
+
+        response = self.client.put(f'/api/tests/{test.id}/update/', {'expected_output': '41'}, format='json')
+        self.assertEqual(response.json()['regraded_submissions'], 2)
+        self.assertFalse(self.passed(self.right, test.id))
+        self.assertTrue(self.passed(self.wrong, test.id))
+        # The other tests' results are left alone
+        self.assertTrue(self.passed(self.wrong, self.old_test.id))
+
+    def test_renaming_a_test_regrades_nothing(self):
+        response = self.client.put(f'/api/tests/{self.old_test.id}/update/', {'name': 'Renamed'}, format='json')
+        self.assertEqual(response.json()['regraded_submissions'], 0)
@@ -0,0 +1,49 @@
+from django.contrib.auth.models import Group
+from django.test import TestCase, override_settings
+
+from lab import roles, shared_cache
+from lab.tests.utils import create_user, use_shared_cache
+
+
+class LocalCacheRoleTests(TestCase):
+    def test_roles_are_read_from_the_database(self):
+        user = create_user('teacher', 'Teachers')
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.assertEqual(roles.get_user_role(user), 'teacher')
+
+    def test_startup_warning(self):
+        with self.assertLogs('lab.shared_cache', 'WARNING') as logs:
+            shared_cache.warn_if_not_shared()
+        self.assertIn('CACHE_URL', logs.output[0])
+
+
+class SharedCacheRoleTests(TestCase):
+    def setUp(self):
+        use_shared_cache(self)
+
+    def test_roles_are_cached(self):
+        user = create_user('teacher', 'Teachers')
+        with self.assertNumQueries(1):
+            self.assertEqual(roles.get_user_role(user), 'teacher')
+        with self.assertNumQueries(0):
+            self.assertEqual(roles.get_user_role(user), 'teacher')
+
+    def test_users_without_a_role_are_cached(self):
+        user = create_user('nobody')
+        roles.get_user_role(user)
+        with self.assertNumQueries(0):
+            self.assertIsNone(roles.get_user_role(user))
+
+    def test_group_changes_invalidate_on_commit(self):
+        user = create_user('student', 'Students')
+        self.assertEqual(roles.get_user_role(user), 'student')
+        with self.captureOnCommitCallbacks(execute=True):
+            user.groups.add(Group.objects.get_or_create(name='Teachers')[0])
+        self.assertEqual(roles.get_user_role(user), 'teacher')
+
+    @override_settings(ROLES={'TRUST_TOKEN_CLAIM': True})
+    def test_token_claim_on_a_miss(self):
+        user = create_user('student', 'Students')
+        with self.assertNumQueries(0):
+            self.assertEqual(roles.get_user_role(user, {roles.ROLE_CLAIM: 'teacher'}), 'teacher')
@@ -0,0 +1,93 @@
+from unittest import mock
+
+from django.contrib.auth.models import Group, User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from lab import roster
+from lab.accounts import username_base
+from lab.models import ClassroomExercises, ClassroomUsers, Classrooms, Exercises, Submissions
+from lab.tests.utils import create_user
+
+
+class RosterImportTests(TestCase):
+    def setUp(self):
+        Group.objects.get_or_create(name='Students')
+        self.teacher = create_user('teacher', 'Teachers')
+        self.classroom = Classrooms.objects.create(name='Python', description='', creator_user=self.teacher)
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def post_csv(self, content, query=''):
+        return self.client.post(
+            f'/api/classrooms/{self.classroom.slug}/roster/{query}', content, content_type='text/csv'
+        )
+
+    def members(self):
+        return set(ClassroomUsers.objects.filter(classroom=self.classroom).values_list('user__email', flat=True))
+
+    def test_creates_and_enrolls_students(self):
+        exercise = Exercises.objects.create(name='Loops', creator_user=self.teacher, instructions='')
+        ClassroomExercises.objects.create(classroom=self.classroom, exercise=exercise, assigned=True)
+
+        response = self.post_csv(
+            'Email,First_Name,Last_Name\n'
+            'ada@example.com,Ada,Lovelace\n'
+            'ADA@example.com,Duplicate,Row\n'
+            'not-an-email,,\n'
+            'alan@example.com,Alan,Turing\n'
+        )
+        data = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((data['students'], data['created_users'], data['enrolled']), (2, 2, 2))
+        self.assertEqual(data['invalid'], ['not-an-email'])
+        self.assertEqual(self.members(), {'ada@example.com', 'alan@example.com'})
+
+        ada = User.objects.get(email='ada@example.com')
+        self.assertEqual((ada.username, ada.first_name), ('ada', 'Ada'))
+        self.assertFalse(ada.has_usable_password())
+        self.assertTrue(ada.groups.filter(name='Students').exists())
+        # Assigned exercises are materialized for the new members
+        self.assertEqual(Submissions.objects.filter(exercise=exercise).count(), 2)
+
+        # Importing again changes nothing
+        data = self.post_csv('email\nada@example.com\nalan@example.com\n').json()
+        self.assertEqual((data['created_users'], data['enrolled'], data['needs_confirmation']), (0, 0, []))
+
+    def test_existing_accounts_need_confirmation(self):
+        create_user('grace', 'Students')
+        data = self.post_csv('email\nGrace@example.com\n').json()
+        self.assertEqual(data['needs_confirmation'], ['grace@example.com'])
+        self.assertEqual(self.members(), set())
+
+        data = self.post_csv('email\ngrace@example.com\n', '?enroll_existing=true').json()
+        self.assertEqual((data['enrolled'], data['needs_confirmation']), (1, []))
+        self.assertEqual(self.members(), {'grace@example.com'})
+
+    def test_json_roster(self):
+        response = self.client.post(
+            f'/api/classrooms/{self.classroom.slug}/roster/',
+            {'students': ['ada@example.com', {'email': 'alan@example.com', 'first_name': 'Alan'}]},
+            format='json',
+        )
+        self.assertEqual(response.json()['created_users'], 2)
+
+    def test_rejected_requests(self):
+        self.assertEqual(self.post_csv('name\nada\n').status_code, 400)
+        self.assertEqual(self.post_csv('email\nada@example.com\n', '?enroll_existing=yes').status_code, 400)
+        self.client.force_authenticate(create_user('other', 'Teachers'))
+        self.assertEqual(self.post_csv('email\nada@example.com\n').status_code, 403)
+
+    def test_usernames_are_valid(self):
+        self.post_csv("email\no'brien!#@example.com\n" + 'x' * 200 + '@example.com\n')
+        usernames = set(User.objects.filter(groups__name='Students').values_list('username', flat=True))
+        self.assertEqual(usernames, {'obrien', 'x' * 140})
+        self.assertEqual(username_base('!#$@example.com'), 'user')
+
+    def test_retries_when_a_concurrent_signup_takes_a_username(self):
+        User.objects.create_user('ada', 'other@example.com', 'password')
+        # The first attempt is handed a username taken in the meantime
+        with mock.patch.object(roster, 'allocate_usernames', side_effect=[['ada'], ['ada1']]):
+            data = roster.import_roster(self.classroom, [{'email': 'ada@example.com', 'first_name': '', 'last_name': ''}])
+        self.assertEqual(data['created_users'], 1)
+        self.assertEqual(User.objects.get(email='ada@example.com').username, 'ada1')
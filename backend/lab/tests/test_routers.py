@@ -0,0 +1,95 @@
+from asgiref.sync import async_to_sync
+from django.db import DEFAULT_DB_ALIAS, router
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from lab.db.routers import ReplicaStickinessMiddleware, read_replica
+from lab.models import Exercises
+
+REPLICAS = {'ALIASES': ['replica1'], 'STICKY_SECONDS': 5}
+
+
+@read_replica
+def read_view(request):
+    return HttpResponse(router.db_for_read(Exercises))
+
+
+@read_replica
+def write_then_read_view(request):
+    router.db_for_write(Exercises)
+    return HttpResponse(router.db_for_read(Exercises))
+
+
+@read_replica
+def streaming_view(request):
+    return StreamingHttpResponse(router.db_for_read(Exercises) for _ in range(2))
+
+
+@read_replica
+async def async_view(request):
+    return HttpResponse(router.db_for_read(Exercises))
+
+
+def write_view(request):
+    router.db_for_write(Exercises)
+    return HttpResponse()
+
+
+@override_settings(READ_REPLICAS=REPLICAS)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def get(self, view, **cookies):
+        request = self.factory.get('/')
+        request.COOKIES.update(cookies)
+        return ReplicaStickinessMiddleware(view)(request)
+
+    def test_decorated_view_reads_from_replica(self):
+        self.assertEqual(self.get(read_view).content, b'replica1')
+
+    def test_undecorated_code_reads_from_primary(self):
+        self.assertEqual(router.db_for_read(Exercises), DEFAULT_DB_ALIAS)
+        self.assertEqual(router.db_for_write(Exercises), DEFAULT_DB_ALIAS)
+
+    def test_reads_after_write_go_to_primary(self):
+        response = self.get(write_then_read_view)
+        self.assertEqual(response.content.decode(), DEFAULT_DB_ALIAS)
+
+    def test_write_sets_sticky_cookie(self):
+        response = self.get(write_view)
+        cookie = response.cookies['read_primary_until']
+        self.assertEqual(cookie['max-age'], 5)
+        self.assertTrue(cookie['httponly'])
+
+        pinned = self.get(read_view, read_primary_until=cookie.value)
+        self.assertEqual(pinned.content.decode(), DEFAULT_DB_ALIAS)
+
+    def test_expired_or_invalid_cookie_ignored(self):
+        self.assertEqual(self.get(read_view, read_primary_until='1').content, b'replica1')
+        self.assertEqual(self.get(read_view, read_primary_until='soon').content, b'replica1')
+
+    def test_reads_without_writes_set_no_cookie(self):
+        self.assertNotIn('read_primary_until', self.get(read_view).cookies)
+
+    def test_streamed_response_reads_from_replica(self):
+        response = self.get(streaming_view)
+        self.assertEqual(b''.join(response.streaming_content), b'replica1replica1')
+
+    def test_async_view(self):
+        request = self.factory.get('/')
+        response = async_to_sync(ReplicaStickinessMiddleware(async_view))(request)
+        self.assertEqual(response.content, b'replica1')
+
+    @override_settings(READ_REPLICAS={})
+    def test_without_replicas(self):
+        self.assertEqual(self.get(read_view).content.decode(), DEFAULT_DB_ALIAS)
+        self.assertNotIn('read_primary_until', self.get(write_view).cookies)
+
+
+@override_settings(READ_REPLICAS=REPLICAS)
+class ReplicaRouterTransactionTests(TestCase):
+    def test_reads_in_transaction_go_to_primary(self):
+        # TestCase runs every test inside a transaction on the primary
+        response = ReplicaStickinessMiddleware(read_view)(RequestFactory().get('/'))
+        self.assertEqual(response.content.decode(), DEFAULT_DB_ALIAS)
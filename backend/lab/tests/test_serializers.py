@@ -0,0 +1,56 @@
+import datetime
+import json
+import uuid
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from lab import serializers
+from lab.serializers import FastJsonResponse, FieldMap, dumps
+
+
+class DumpsTests(SimpleTestCase):
+    data = {
+        'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'at': datetime.datetime(2026, 10, 18, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+        'day': datetime.date(2026, 10, 18),
+        'name': 'Zoë',
+        'count': 3,
+        'nested': [None, True, 1.5],
+        1: 'non-string key',
+    }
+
+    def test_encodes_like_the_standard_library_fallback(self):
+        encoded = dumps(self.data)
+        with mock.patch.object(serializers, 'orjson', None):
+            self.assertEqual(json.loads(dumps(self.data)), json.loads(encoded))
+        self.assertEqual(json.loads(encoded), {
+            'id': '12345678-1234-5678-1234-567812345678',
+            'at': '2026-10-18T12:30:15.123456+00:00',
+            'day': '2026-10-18',
+            'name': 'Zoë',
+            'count': 3,
+            'nested': [None, True, 1.5],
+            '1': 'non-string key',
+        })
+
+    def test_other_types_are_encoded_like_json_response(self):
+        self.assertEqual(json.loads(dumps({'price': Decimal('1.50')})), {'price': '1.50'})
+
+    def test_response_requires_a_dict_unless_unsafe(self):
+        with self.assertRaises(TypeError):
+            FastJsonResponse([1, 2])
+        response = FastJsonResponse([1, 2], safe=False, status=201)
+        self.assertEqual((response.status_code, response['Content-Type']), (201, 'application/json'))
+        self.assertEqual(json.loads(response.content), [1, 2])
+
+
+class FieldMapTests(SimpleTestCase):
+    def test_object_and_row(self):
+        fields = FieldMap(['id', ('createdAt', 'created_at')], prefix='student__')
+        self.assertEqual(fields.columns, ('student__id', 'student__created_at'))
+        self.assertEqual(fields.row({'student__id': 1, 'student__created_at': 'now'}), {'id': 1, 'createdAt': 'now'})
+        self.assertEqual(
+            fields.object(mock.Mock(id=1, created_at='now')), {'id': 1, 'createdAt': 'now'}
+        )
@@ -0,0 +1,50 @@
+from django.contrib.auth.models import Group, User
+from django.test import TestCase
+
+from lab.accounts import allocate_usernames, next_free_username
+from lab.forms import EmailSignUpForm
+
+
+class UsernameTests(TestCase):
+    def test_free_base_is_used_as_is(self):
+        self.assertEqual(next_free_username(User, 'john'), 'john')
+
+    def test_next_suffix_after_the_highest(self):
+        for username in ['john', 'john1', 'john5', 'johnny', 'john5x']:
+            User.objects.create_user(username)
+        with self.assertNumQueries(1):
+            self.assertEqual(next_free_username(User, 'john'), 'john6')
+
+    def test_regex_characters_are_escaped(self):
+        User.objects.create_user('axb')
+        self.assertEqual(next_free_username(User, 'a.b'), 'a.b')
+
+    def test_repeated_and_overlapping_bases(self):
+        User.objects.create_user('ann')
+        self.assertEqual(allocate_usernames(User, ['ann', 'ann', 'ann1']), ['ann1', 'ann2', 'ann11'])
+
+
+class SignUpTests(TestCase):
+    def setUp(self):
+        Group.objects.get_or_create(name='Students')
+
+    def signup(self, email, role='student'):
+        form = EmailSignUpForm(data={
+            'email': email, 'password1': 'a-long-passphrase', 'password2': 'a-long-passphrase', 'role': role,
+        })
+        self.assertTrue(form.is_valid(), form.errors)
+        return form.save()
+
+    def test_username_comes_from_the_email(self):
+        self.assertEqual(self.signup('john@example.com').username, 'john')
+        user = self.signup('john@example.org')
+        self.assertEqual(user.username, 'john1')
+        self.assertTrue(user.groups.filter(name='Students').exists())
+
+    def test_email_is_unique_ignoring_case(self):
+        self.signup('john@example.com')
+        form = EmailSignUpForm(data={
+            'email': 'JOHN@example.com', 'password1': 'a-long-passphrase', 'password2': 'a-long-passphrase',
+            'role': 'student',
+        })
+        self.assertIn('email', form.errors)
@@ -0,0 +1,34 @@
+import tempfile
+
+from django.contrib.auth.models import Group, User
+from django.test import override_settings
+
+from lab.roles import invalidate_user_roles
+
+
+def create_user(username, group=None, **fields):
+    """
+    Creates a user, optionally in the 'Teachers' or 'Students' group.
+    """
+    user = User.objects.create_user(username, f'{username}@example.com', 'password', **fields)
+    if group is not None:
+        user.groups.add(Group.objects.get_or_create(name=group)[0])
+    # Group changes invalidate cached roles on commit, which never comes in a
+    # TestCase, and ids of rolled back users are reused
+    invalidate_user_roles([user.id])
+    return user
+
+
+def use_shared_cache(test_case):
+    """
+    Switches a test to a cache backend shared between processes, which the
+    role and user caches require (see lab/shared_cache.py).
+    """
+    cache_dir = tempfile.TemporaryDirectory()
+    test_case.addCleanup(cache_dir.cleanup)
+    settings_override = override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': cache_dir.name,
+    }})
+    settings_override.enable()
+    test_case.addCleanup(settings_override.disable)
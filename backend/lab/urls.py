@@ -4,6 +4,8 @@ from .views import (
     home,create_new_classroom, get_classroom_details, 
     update_classroom_by_slug, delete_classroom_by_slug, 
     get_classrooms_list, create_new_exercise,
+    get_classroom_gradebook,
+    get_classroom_deletion_job,
     update_exercise_by_id, delete_exercise_by_id,
     get_exercise_list, get_exercise_details,
     signup, test_email,
@@ -16,11 +18,18 @@ from .views import (
     update_test_by_id,
     delete_test_by_id,
     join_classroom,
+    import_classroom_roster,
     leave_classroom,
     create_submission,
     update_submission,
+    autosave_submission,
+    get_submission_versions,
+    get_submission_version,
     get_submission_details,
     get_all_submissions,
+    export_submissions,
+    grade_submission,
+    get_payload_cache_stats,
 )
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from django.contrib.auth import views as auth_views
@@ -46,11 +55,14 @@ urlpatterns = [
     # Classrooms
     path('api/classrooms/', get_classrooms_list),
     path('api/classrooms/create/', create_new_classroom),
+    path('api/classrooms/deletions/<uuid:job_id>/', get_classroom_deletion_job),
     path('api/classrooms/<slug:slug>/', get_classroom_details),
     path('api/classrooms/<slug:slug>/update/', update_classroom_by_slug),
     path('api/classrooms/<slug:slug>/delete/', delete_classroom_by_slug),
     path('api/classrooms/<slug:slug>/join/', join_classroom),
     path('api/classrooms/<slug:slug>/leave/', leave_classroom),
+    path('api/classrooms/<slug:slug>/roster/', import_classroom_roster),
+    path('api/classrooms/<slug:slug>/gradebook/', get_classroom_gradebook),
     
     # Exercises (nested under classrooms)
     path('api/classrooms/<slug:classroom_slug>/exercises/', get_exercise_list),
@@ -68,9 +80,17 @@ urlpatterns = [
     
     # Submissions (nested under exercises)
     path('api/exercises/<uuid:exercise_id>/submissions/', get_all_submissions),
+    path('api/exercises/<uuid:exercise_id>/submissions/export/', export_submissions),
     path('api/exercises/<uuid:exercise_id>/submissions/create/', create_submission),
     path('api/exercises/<uuid:exercise_id>/submission/', get_submission_details),
     path('api/submissions/<uuid:submission_id>/update/', update_submission),
+    path('api/submissions/<uuid:submission_id>/autosave/', autosave_submission),
+    path('api/submissions/<uuid:submission_id>/versions/', get_submission_versions),
+    path('api/submissions/<uuid:submission_id>/versions/<int:version>/', get_submission_version),
+    path('api/submissions/<uuid:submission_id>/grade/', grade_submission),
+    
+    # Caching
+    path('api/cache/stats/', get_payload_cache_stats),
     
     # Development/Testing
     path('dev/email-test/', test_email),
@@ -5,8 +5,8 @@ import logging
 from django.utils.text import slugify
 
 # Django
-from django.shortcuts import get_object_or_404, render, redirect
-from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
+from django.shortcuts import get_object_or_404, aget_object_or_404, render, redirect
+from django.http import HttpResponse, HttpResponseRedirect, StreamingHttpResponse
 from django.urls import reverse
 
 # Settings
@@ -30,14 +30,19 @@ from rest_framework.decorators import (
     permission_classes,
     authentication_classes
 )
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.authentication import SessionAuthentication
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
+# Query expressions
+from django.db.models import Count, Exists, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db import IntegrityError
+
 # Models
-from .models import Classrooms, Exercises, ClassroomExercises, ExerciseTests, Tests, ClassroomUsers, Submissions
+from .models import Classrooms, Exercises, ClassroomExercises, ExerciseTests, Tests, ClassroomUsers, Submissions, CodeBlobs, SubmissionVersions
 from django.contrib.auth.models import User
 
 # Auth
@@ -55,6 +60,52 @@ from smtplib import SMTPAuthenticationError
 # Forms
 from .forms import EmailSignUpForm
 
+# Serialization
+from .serializers import (
+    FastJsonResponse, dumps, CLASSROOM_FIELDS, EXERCISE_FIELDS, TEST_FIELDS,
+    submission_payload, submission_row_payload, SUBMISSION_ROW_COLUMNS
+)
+
+# Grading
+from . import grading
+
+# Submission version history
+from . import history
+
+# Idempotency-Key support
+from .idempotency import idempotent
+
+# Read replicas
+from .db.routers import read_replica
+
+# Conditional GET
+from .conditional import (
+    conditional, classroom_version, exercise_version, test_version,
+    exercise_list_version, tests_list_version
+)
+
+# Payload cache
+from . import payload_cache
+
+# Pagination
+from .pagination import paginate, apaginate, InvalidPageRequest
+
+# Async views
+from .async_api import async_api_view
+
+# Assignments
+from .assignments import assign_exercise, backfill_assignments, parse_due_date
+
+# Classroom deletion
+from .deletion import delete_classroom, needs_background_deletion, start_deletion_job, job_payload
+from .models import ClassroomDeletionJobs
+
+# Roster import
+from .roster import parse_roster, import_roster, RosterError
+
+# Roles
+from .roles import get_user_role, request_is_teacher, add_role_claim
+
 # Examples of views
 
 # This is a DRF view - requires authentication by default
@@ -74,13 +125,24 @@ from .forms import EmailSignUpForm
 
 # Create your views here.
 
+def count_subquery(model, field):
+    """
+    Correlated COUNT(*) of model rows whose `field` points at the outer row.
+    Unlike Count() over joins, several of these can be combined without
+    multiplying rows.
+    """
+    counts = model.objects.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(
+        count=Count('*')
+    ).values('count')
+    return Coalesce(Subquery(counts), 0)
+
 def home(request):
     return render(request, 'home.html')
 
 @csrf_exempt
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def get_classrooms_list(request):
+@async_api_view(['GET'])
+@read_replica
+async def get_classrooms_list(request):
     """
     List all classrooms.
     
@@ -94,65 +156,115 @@ def get_classrooms_list(request):
         - updatedAt
         - slug
         - is_member (whether the current user is a member)
+        - member_count
+        - exercise_count
     """
     try:
-        classrooms = Classrooms.objects.all()
-        classrooms_data = []
-        
-        for classroom in classrooms:
-            is_member = ClassroomUsers.objects.filter(
-                classroom=classroom,
+        # Membership, teacher and counts are computed by the database in one query
+        classrooms = Classrooms.objects.annotate(
+            teacher=F('creator_user__username'),
+            is_member=Exists(ClassroomUsers.objects.filter(
+                classroom=OuterRef('pk'),
                 user=request.user
-            ).exists()
-            
-            classrooms_data.append({
-                'id': classroom.id,
-                'name': classroom.name,
-                'description': classroom.description,
-                'teacher': classroom.creator_user.username,
-                'createdAt': classroom.created_at.isoformat(),
-                'updatedAt': classroom.updated_at.isoformat(),
-                'slug': classroom.slug,
-                'is_member': is_member
-            })
-        
-        return JsonResponse({
-            'classrooms': classrooms_data
+            )),
+            member_count=count_subquery(ClassroomUsers, 'classroom'),
+            exercise_count=count_subquery(ClassroomExercises, 'classroom'),
+        ).values(
+            'id', 'name', 'description', 'teacher', 'created_at', 'updated_at',
+            'slug', 'is_member', 'member_count', 'exercise_count'
+        )
+        classrooms, page = await apaginate(request, classrooms)
+        
+        classrooms_data = [{
+            **CLASSROOM_FIELDS.row(classroom),
+            'teacher': classroom['teacher'],
+            'is_member': classroom['is_member'],
+            'member_count': classroom['member_count'],
+            'exercise_count': classroom['exercise_count'],
+        } for classroom in classrooms]
+        
+        return FastJsonResponse({
+            'classrooms': classrooms_data,
+            'next': page['next'],
+            'next_cursor': page['next_cursor']
         }, safe=False)
         
+    except InvalidPageRequest as e:
+        return FastJsonResponse({
+            'error': str(e)
+        }, status=400)
     except Exception as e:
-        return JsonResponse({
+        return FastJsonResponse({
             'error': str(e)
         }, status=500)
 
+# Fields that can be requested with ?fields= on the exercise list
+EXERCISE_LIST_FIELDS = ['id', 'name', 'slug', 'instructions', 'code', 'created_at', 'updated_at']
+EXERCISE_LIST_DEFAULT_FIELDS = ['id', 'name', 'slug', 'created_at', 'updated_at']
+# Code is read from its compressed blob (see CodeBlobs)
+EXERCISE_LIST_COLUMNS = {'code': 'exercise__code_blob__data'}
+
 @csrf_exempt
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def get_exercise_list(request, classroom_slug):
+@async_api_view(['GET'])
+@conditional(exercise_list_version)
+async def get_exercise_list(request, classroom_slug):
+    """
+    List the exercises of a classroom.
+    
+    Returns the lightweight fields by default (id, name, slug, created_at,
+    updated_at). Use ?fields=name,instructions,code,... to choose exactly which
+    fields are returned.
+    """
     try:
         # Get the classroom instance
-        classroom = get_object_or_404(Classrooms, slug=classroom_slug)
-        
-        # Get all exercises for this classroom through ClassroomExercises
-        classroom_exercises = ClassroomExercises.objects.filter(classroom=classroom)
+        classroom = await aget_object_or_404(Classrooms.objects.only('id'), slug=classroom_slug)
+        
+        # Validate the requested sparse fieldset
+        fields = [field for field in request.GET.get('fields', '').split(',') if field]
+        unknown_fields = set(fields) - set(EXERCISE_LIST_FIELDS)
+        if unknown_fields:
+            return FastJsonResponse({
+                'error': f"Unknown fields: {', '.join(sorted(unknown_fields))}. "
+                         f"Allowed fields: {', '.join(EXERCISE_LIST_FIELDS)}"
+            }, status=400)
+        fields = fields or EXERCISE_LIST_DEFAULT_FIELDS
+        
+        cache_key = await payload_cache.aexercise_list_key(classroom.id, request)
+        response_data = await payload_cache.aget_payload(cache_key, request)
+        if response_data is not None:
+            return FastJsonResponse(response_data)
+        
+        # Get the exercises for this classroom through ClassroomExercises,
+        # joined in one query and limited to the requested columns
+        columns = {field: EXERCISE_LIST_COLUMNS.get(field, f'exercise__{field}') for field in fields}
+        classroom_exercises = ClassroomExercises.objects.filter(classroom=classroom).values(
+            'id', 'created_at', *columns.values()
+        )
+        classroom_exercises, page = await apaginate(request, classroom_exercises)
         
         # Extract exercise data
         exercises_data = [{
-            'id': ce.exercise.id,
-            'name': ce.exercise.name,
-            'slug': ce.exercise.slug,
-            'instructions': ce.exercise.instructions,
-            'code': ce.exercise.code,
-            'created_at': ce.exercise.created_at.isoformat(),
-            'updated_at': ce.exercise.updated_at.isoformat(),
+            field: ce[column] for field, column in columns.items()
         } for ce in classroom_exercises]
+        if 'code' in columns:
+            for exercise in exercises_data:
+                exercise['code'] = CodeBlobs.decompress(exercise['code'])
         
-        return JsonResponse({
-            'exercises': exercises_data
-        })
+        response_data = {
+            'exercises': exercises_data,
+            'next': page['next'],
+            'next_cursor': page['next_cursor']
+        }
+        await payload_cache.aset_payload(cache_key, response_data, request)
+        
+        return FastJsonResponse(response_data)
         
+    except InvalidPageRequest as e:
+        return FastJsonResponse({
+            'error': str(e)
+        }, status=400)
     except Exception as e:
-        return JsonResponse({
+        return FastJsonResponse({
             'error': str(e)
         }, status=500)
 
@@ -169,7 +281,7 @@ def create_new_classroom(request):
         
         # Validate required fields
         if 'name' not in data:
-            return JsonResponse({
+            return FastJsonResponse({
                 'error': 'Name is required'
             }, status=400)
             
@@ -183,52 +295,47 @@ def create_new_classroom(request):
         classroom.save()
         
         # Return the created classroom data
-        return JsonResponse({
+        return FastJsonResponse({
             'id': classroom.id,
             'name': classroom.name,
             'slug': classroom.slug,
             'description': classroom.description,
-            'created_at': classroom.created_at.isoformat()
+            'created_at': classroom.created_at
         }, status=201)
         
     except Exception as e:
-        return JsonResponse({
+        return FastJsonResponse({
             'error': str(e)
         }, status=500)
 
 @csrf_exempt
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def get_classroom_details(request, slug):
+@async_api_view(['GET'])
+@conditional(classroom_version)
+async def get_classroom_details(request, slug):
     try:
-        classroom = get_object_or_404(Classrooms, slug=slug)
+        classroom = await aget_object_or_404(Classrooms.objects.select_related('creator_user'), slug=slug)
         
         # Check if user is a member (for UI purposes only)
-        is_member = ClassroomUsers.objects.filter(
+        is_member = await ClassroomUsers.objects.filter(
             classroom=classroom,
             user=request.user
-        ).exists()
+        ).aexists()
         
         # Return classroom details as JSON
         classroom_data = {
-            'id': classroom.id,
-            'name': classroom.name,
-            'description': classroom.description,
+            **CLASSROOM_FIELDS.object(classroom),
             'teacher': classroom.creator_user.username,
-            'createdAt': classroom.created_at.isoformat(),
-            'updatedAt': classroom.updated_at.isoformat(),
-            'slug': classroom.slug,
             'is_member': is_member
         }
         
-        return JsonResponse(classroom_data)
+        return FastJsonResponse(classroom_data)
         
     except Classrooms.DoesNotExist:
-        return JsonResponse({
+        return FastJsonResponse({
             'error': 'Classroom not found'
         }, status=404)
     except Exception as e:
-        return JsonResponse({
+        return FastJsonResponse({
             'error': str(e)
         }, status=500)
  
@@ -245,7 +352,7 @@ def update_classroom_by_slug(request, slug):
         
         # Check if user is the creator of the classroom
         if classroom.creator_user != request.user:
-            return JsonResponse({
+            return FastJsonResponse({
                 'error': 'You do not have permission to update this classroom'
             }, status=403)
         
@@ -255,7 +362,7 @@ def update_classroom_by_slug(request, slug):
         if 'name' in data:
             # Check if the name is already taken
             if Classrooms.objects.filter(name=data['name']).exclude(id=classroom.id).exists():
-                return JsonResponse({
+                return FastJsonResponse({
                     'error': 'A classroom with this name already exists'
                 }, status=400)
                 
@@ -267,25 +374,20 @@ def update_classroom_by_slug(request, slug):
             
         classroom.save()
         
-        return JsonResponse({
-            'id': classroom.id,
-            'name': classroom.name,
-            'description': classroom.description,
+        return FastJsonResponse({
+            **CLASSROOM_FIELDS.object(classroom),
             'teacher': classroom.creator_user.username,
-            'createdAt': classroom.created_at.isoformat(),
-            'updatedAt': classroom.updated_at.isoformat(),
-            'slug': classroom.slug,
         })
         
     except Classrooms.DoesNotExist:
-        return JsonResponse({
+        return FastJsonResponse({
             'error': 'Classroom not found'
         }, status=404)
     except Exception as e:
         # Enhanced error logging
         print(f"Error updating classroom {slug}. Error: {str(e)}")
         print(f"Request data: {request.data}")
-        return JsonResponse({
+        return FastJsonResponse({
             'error': str(e)
         }, status=500)
 
@@ -293,49 +395,162 @@ def update_classroom_by_slug(request, slug):
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 def delete_classroom_by_slug(request, slug):
+    """
+    Delete a classroom with all its exercises, tests and submissions.
+    Large classrooms are deleted by a background job: the response is a 202
+    with the job, whose progress can be polled at api/classrooms/deletions/<id>/.
+    """
     try:
         classroom = get_object_or_404(Classrooms, slug=slug)
         
         # Check if user is the creator of the classroom
         if classroom.creator_user != request.user:
-            return JsonResponse({
+            return FastJsonResponse({
                 'error': 'You do not have permission to delete this classroom'
             }, status=403)
 
-        # Get all exercises associated with this classroom
-        classroom_exercises = ClassroomExercises.objects.filter(classroom=classroom)
-        
-        # Delete all associated exercises
-        for ce in classroom_exercises:
-            # Delete the exercise itself
-            ce.exercise.delete()
-            # The classroom_exercise entry will be automatically deleted due to CASCADE
-        
-        # Delete the classroom (this will automatically delete classroom_exercises entries)
-        classroom.delete()
-        
-        return JsonResponse({
+        if needs_background_deletion(classroom.id):
+            job = start_deletion_job(classroom, request.user)
+            return FastJsonResponse({
+                'message': 'Classroom deletion started',
+                'slug': slug,
+                'job': job_payload(job)
+            }, status=202)
+        
+        # Delete the classroom and all associated exercises, tests and submissions
+        delete_classroom(classroom.id)
+        
+        return FastJsonResponse({
             'message': 'Classroom and all associated exercises deleted successfully',
             'slug': slug
         })
         
     except Classrooms.DoesNotExist:
-        return JsonResponse({
+        return FastJsonResponse({
             'error': 'Classroom not found'
         }, status=404)
     except Exception as e:
         # Log the error for debugging
         print(f"Error deleting classroom {slug}: {str(e)}")
-        return JsonResponse({
+        return FastJsonResponse({
             'error': 'An unexpected error occurred'
         }, status=500)
 
+@csrf_exempt
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_classroom_deletion_job(request, job_id):
+    """
+    Progress of a background classroom deletion.
+    Only the user who requested the deletion can see it.
+    """
+    job = get_object_or_404(ClassroomDeletionJobs, id=job_id)
+    if job.requested_by_id != request.user.id:
+        return FastJsonResponse({
+            'error': 'You do not have permission to view this job'
+        }, status=403)
+    return FastJsonResponse(job_payload(job))
+
+# Gradebook status for students without a submission
+GRADEBOOK_NOT_STARTED = 'not_started'
+
+@csrf_exempt
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@read_replica
+def get_classroom_gradebook(request, slug):
+    """
+    Students x exercises matrix of submission statuses for a classroom.
+    Only accessible by teachers.
+    
+    Returns index arrays instead of nested objects:
+        - statuses: status names; index 0 means no submission yet
+        - students / exercises: row and column headers
+        - matrix[i][j]: status index of students[i] on exercises[j]
+        - exercise_counts[j][k] / student_counts[i][k]: number of submissions with statuses[k]
+    """
+    try:
+        classroom = get_object_or_404(Classrooms.objects.only('id', 'creator_user_id'), slug=slug)
+        
+        # Check if user is a teacher
+        if classroom.creator_user_id != request.user.id and not request_is_teacher(request):
+            return FastJsonResponse({
+                'error': 'Only teachers can view the gradebook'
+            }, status=403)
+        
+        students = list(ClassroomUsers.objects.filter(classroom=classroom).order_by('created_at', 'id').values_list(
+            'user_id', 'user__username', 'user__first_name', 'user__last_name'
+        ))
+        exercises = list(ClassroomExercises.objects.filter(classroom=classroom).order_by('created_at', 'id').values_list(
+            'exercise_id', 'exercise__name', 'exercise__slug'
+        ))
+        
+        # Submissions of classroom members on classroom exercises
+        submissions = Submissions.objects.filter(
+            exercise__classroomexercises__classroom=classroom,
+            student__classroomusers__classroom=classroom
+        ).order_by()
+        
+        statuses = [GRADEBOOK_NOT_STARTED] + [status for status, _ in Submissions.STATUS_CHOICES]
+        status_index = {status: index for index, status in enumerate(statuses)}
+        student_index = {student[0]: index for index, student in enumerate(students)}
+        exercise_index = {exercise[0]: index for index, exercise in enumerate(exercises)}
+        
+        matrix = [[0] * len(exercises) for _ in students]
+        for student_id, exercise_id, status in submissions.values_list('student_id', 'exercise_id', 'status').distinct():
+            matrix[student_index[student_id]][exercise_index[exercise_id]] = status_index[status]
+        
+        # Per-exercise and per-student counts are aggregated by the database
+        exercise_counts = [[0] * len(statuses) for _ in exercises]
+        for exercise_id, status, count in submissions.values_list('exercise_id', 'status').annotate(
+            count=Count('id', distinct=True)
+        ):
+            exercise_counts[exercise_index[exercise_id]][status_index[status]] = count
+        for counts in exercise_counts:
+            counts[0] = len(students) - sum(counts)
+        
+        student_counts = [[0] * len(statuses) for _ in students]
+        for student_id, status, count in submissions.values_list('student_id', 'status').annotate(
+            count=Count('id', distinct=True)
+        ):
+            student_counts[student_index[student_id]][status_index[status]] = count
+        for counts in student_counts:
+            counts[0] = len(exercises) - sum(counts)
+        
+        return FastJsonResponse({
+            'statuses': statuses,
+            'students': [{
+                'id': user_id,
+                'username': username,
+                'full_name': f"{first_name} {last_name}".strip(),
+            } for user_id, username, first_name, last_name in students],
+            'exercises': [{
+                'id': exercise_id,
+                'name': name,
+                'slug': exercise_slug,
+            } for exercise_id, name, exercise_slug in exercises],
+            'matrix': matrix,
+            'exercise_counts': exercise_counts,
+            'student_counts': student_counts,
+        })
+        
+    except Exception as e:
+        logger.exception("Error in get_classroom_gradebook")
+        return FastJsonResponse({
+            'error': str(e)
+        }, status=500)
+
 # CRUD Exercise
 
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def create_new_exercise(request, classroom_slug):
+    """
+    Create an exercise in a classroom.
+    With "assign": true every member gets a submission right away (and new
+    members when they join), optionally with a "due_date".
+    """
     try:
         # Get the classroom instance
         classroom = get_object_or_404(Classrooms, slug=classroom_slug)
@@ -345,9 +560,21 @@ def create_new_exercise(request, classroom_slug):
         
         # Validate required fields
         if 'name' not in data:
-            return JsonResponse({
+            return FastJsonResponse({
                 'error': 'Name is required'
             }, status=400)
+        
+        assigned = data.get('assign', False)
+        if type(assigned) is not bool:
+            return FastJsonResponse({
+                'error': 'assign must be true or false'
+            }, status=400)
+        try:
+            due_date = parse_due_date(data.get('due_date'))
+        except ValueError as e:
+            return FastJsonResponse({
+                'error': str(e)
+            }, status=400)
             
         # Create exercise instance
         exercise = Exercises(
@@ -361,18 +588,26 @@ def create_new_exercise(request, classroom_slug):
         # Create the ClassroomExercises relationship
         classroom_exercise = ClassroomExercises.objects.create(
             classroom=classroom,
-            exercise=exercise
+            exercise=exercise,
+            assigned=assigned,
+            due_date=due_date
         )
         
+        # Materialize a submission for every member
+        assigned_count = assign_exercise(classroom_exercise) if assigned else 0
+        
         # Return the created exercise data
-        return JsonResponse({
-            'id': str(exercise.id),
+        return FastJsonResponse({
+            'id': exercise.id,
             'name': exercise.name,
             'slug': exercise.slug,
             'instructions': exercise.instructions,
             'code': exercise.code,
-            'created_at': exercise.created_at.isoformat(),
-            'classroom_slug': classroom_slug
+            'created_at': exercise.created_at,
+            'classroom_slug': classroom_slug,
+            'assigned': assigned,
+            'due_date': due_date,
+            'assigned_count': assigned_count
         }, status=201)
             
     except Exception as e:
@@ -380,7 +615,7 @@ def create_new_exercise(request, classroom_slug):
         if 'exercise' in locals():
             exercise.delete()
         print(f"Error in create_new_exercise: {str(e)}")
-        return JsonResponse({
+        return FastJsonResponse({
             'error': str(e)
         }, status=500)
 
@@ -404,29 +639,21 @@ def update_exercise_by_id(request, exercise_id):
             
         exercise.save()
         
-        response_data = {
-            'id': exercise.id,
-            'name': exercise.name,
-            'slug': exercise.slug,
-            'instructions': exercise.instructions,
-            'code': exercise.code,
-            'created_at': exercise.created_at.isoformat(),
-            'updated_at': exercise.updated_at.isoformat(),
-        }
+        response_data = EXERCISE_FIELDS.object(exercise)
         
-        return JsonResponse(response_data)
+        return FastJsonResponse(response_data)
         
     except Exercises.DoesNotExist:
-        return JsonResponse({
+        return FastJsonResponse({
             'error': 'Exercise not found'
         }, status=404)
     except json.JSONDecodeError:
-        return JsonResponse({
+        return FastJsonResponse({
             'error': 'Invalid JSON data'
         }, status=400)
     except Exception as e:
         print(f"Error in update_exercise: {str(e)}")
-        return JsonResponse({
+        return FastJsonResponse({
             'error': str(e)
         }, status=500)
 
@@ -440,25 +667,25 @@ def delete_exercise_by_id(request, exercise_id):
         # Delete the exercise
         exercise.delete()
         
-        return JsonResponse({
+        return FastJsonResponse({
             'message': 'Exercise deleted successfully',
             'id': exercise_id
         })
         
     except Exercises.DoesNotExist:
-        return JsonResponse({
+        return FastJsonResponse({
             'error': 'Exercise not found'
         }, status=404)
     except Exception as e:
         print(f"Error in delete_exercise: {str(e)}")
-        return JsonResponse({
+        return FastJsonResponse({
             'error': str(e)
         }, status=500)
 
 @csrf_exempt
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def get_exercise_details(request, exercise_id):
+@async_api_view(['GET'])
+@conditional(exercise_version)
+async def get_exercise_details(request, exercise_id):
     """
     Get details of a specific exercise by its UUID.
     
@@ -479,27 +706,29 @@ def get_exercise_details(request, exercise_id):
     """
         
     try:
-        exercise = get_object_or_404(Exercises, id=exercise_id)
+        cache_key = payload_cache.exercise_key(exercise_id)
+        response_data = await payload_cache.aget_payload(cache_key, request)
+        if response_data is not None:
+            return FastJsonResponse(response_data)
+        
+        exercise = await aget_object_or_404(
+            Exercises.objects.select_related('creator_user', 'code_blob'), id=exercise_id
+        )
         
         response_data = {
-            'id': str(exercise.id),
-            'name': exercise.name,
-            'slug': exercise.slug,
-            'instructions': exercise.instructions,
-            'code': exercise.code,
+            **EXERCISE_FIELDS.object(exercise),
             'creator': {
                 'id': exercise.creator_user.id,
                 'username': exercise.creator_user.username,
                 'full_name': f"{exercise.creator_user.first_name} {exercise.creator_user.last_name}".strip()
             },
-            'created_at': exercise.created_at.isoformat(),
-            'updated_at': exercise.updated_at.isoformat()
         }
+        await payload_cache.aset_payload(cache_key, response_data, request)
         
-        return JsonResponse(response_data)
+        return FastJsonResponse(response_data)
         
     except Exception as e:
-        return JsonResponse({
+        return FastJsonResponse({
             'error': str(e)
         }, status=500)
 
@@ -517,8 +746,8 @@ def signup(request):
             if authenticated_user:
                 login(request, authenticated_user, backend='django.contrib.auth.backends.ModelBackend')
                 
-                # Generate JWT tokens
-                refresh = RefreshToken.for_user(authenticated_user)
+                # Generate JWT tokens (with the role claim, see lab/roles.py)
+                refresh = add_role_claim(RefreshToken.for_user(authenticated_user), authenticated_user)
                 access_token = str(refresh.access_token)
                 
                 logger.info("Generated access token (first 20 chars): %s...", access_token[:20])
@@ -598,16 +827,16 @@ def test_email(request):
                       to=recipient_list,
                       from_email=from_email,
                       connection=connection).send()
-        return JsonResponse({"status": "ok"})
+        return FastJsonResponse({"status": "ok"})
     except SMTPAuthenticationError as e:
-        return JsonResponse({
+        return FastJsonResponse({
             "status": "error",
             "message": "SMTP Authentication failed. Please check your API key.",
             "details": str(e),
             "debug_info": debug_info
         }, status=401)
     except Exception as e:
-        return JsonResponse({
+        return FastJsonResponse({
             "status": "error",
             "message": str(e),
             "debug_info": debug_info
@@ -629,7 +858,7 @@ def get_user_details(request):
         'last_name': user.last_name,
         'is_staff': user.is_staff,
         'date_joined': user.date_joined,
-        'user_role': get_user_role(user)
+        'user_role': get_user_role(user, request.auth)
     })
 
 
@@ -641,7 +870,7 @@ def login_view(request):
             password = request.POST.get('password')
             
             if not username or not password:
-                return JsonResponse({
+                return FastJsonResponse({
                     'success': False,
                     'error': 'Username and password are required'
                 }, status=400)
@@ -651,10 +880,10 @@ def login_view(request):
             if user is not None:
                 login(request, user)
                 
-                # Generate JWT token
-                refresh = RefreshToken.for_user(user)
+                # Generate JWT token (with the role claim, see lab/roles.py)
+                refresh = add_role_claim(RefreshToken.for_user(user), user)
                 
-                response = JsonResponse({
+                response = FastJsonResponse({
                     'success': True,
                     'redirect_url': settings.LOGIN_REDIRECT_URL
                 })
@@ -681,13 +910,13 @@ def login_view(request):
                 
                 return response
             else:
-                return JsonResponse({
+                return FastJsonResponse({
                     'success': False,
                     'error': 'Invalid credentials'
                 }, status=401)
         except Exception as e:
             print(f"Login error: {str(e)}")
-            return JsonResponse({
+            return FastJsonResponse({
                 'success': False,
                 'error': 'An unexpected error occurred'
             }, status=500)
@@ -719,47 +948,41 @@ def logout_view(request):
         
     return render(request, 'registration/logout.html')
 
-def get_user_role(user):
-    """
-    Returns user role based on group membership.
-    Returns 'teacher' if user is in Teachers group
-    Returns 'student' if user is in Students group
-    Returns None if user has no role
-    """
-    if user.groups.filter(name='Teachers').exists():
-        return 'teacher'
-    elif user.groups.filter(name='Students').exists():
-        return 'student'
-    return None
-
 @csrf_exempt
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def get_tests_list(request, exercise_id):
+@async_api_view(['GET'])
+@conditional(tests_list_version)
+async def get_tests_list(request, exercise_id):
     """
     Get all tests for a specific exercise.
     """
     try:
+        cache_key = await payload_cache.atests_list_key(exercise_id, request)
+        response_data = await payload_cache.aget_payload(cache_key, request)
+        if response_data is not None:
+            return FastJsonResponse(response_data)
+        
         # Get all tests for this exercise through ExerciseTests
-        exercise_tests = ExerciseTests.objects.filter(exercise_id=exercise_id)
+        exercise_tests = ExerciseTests.objects.filter(exercise_id=exercise_id).select_related('test')
+        exercise_tests, page = await apaginate(request, exercise_tests)
         
         # Extract test data
-        tests_data = [{
-            'id': et.test.id,
-            'name': et.test.name,
-            'test_type': et.test.test_type,
-            'expected_output': et.test.expected_output,
-            'help_text': et.test.help_text,
-            'created_at': et.test.created_at.isoformat(),
-            'updated_at': et.test.updated_at.isoformat(),
-        } for et in exercise_tests]
-        
-        return JsonResponse({
-            'tests': tests_data
-        })
+        tests_data = [TEST_FIELDS.object(et.test) for et in exercise_tests]
+        
+        response_data = {
+            'tests': tests_data,
+            'next': page['next'],
+            'next_cursor': page['next_cursor']
+        }
+        await payload_cache.aset_payload(cache_key, response_data, request)
+        
+        return FastJsonResponse(response_data)
         
+    except InvalidPageRequest as e:
+        return FastJsonResponse({
+            'error': str(e)
+        }, status=400)
     except Exception as e:
-        return JsonResponse({
+        return FastJsonResponse({
             'error': str(e)
         }, status=500)
 
@@ -781,13 +1004,13 @@ def create_new_test(request, exercise_id):
         required_fields = ['name', 'test_type', 'expected_output']
         for field in required_fields:
             if field not in data:
-                return JsonResponse({
+                return FastJsonResponse({
                     'error': f'{field} is required'
                 }, status=400)
         
         # Validate test_type
         if data['test_type'] not in ['includes', 'exact']:
-            return JsonResponse({
+            return FastJsonResponse({
                 'error': 'test_type must be either "includes" or "exact"'
             }, status=400)
             
@@ -806,15 +1029,19 @@ def create_new_test(request, exercise_id):
             test=test
         )
         
+        # Check the new test against already graded submissions
+        regraded = grading.regrade_test(test)
+        
         # Return the created test data
-        return JsonResponse({
+        return FastJsonResponse({
             'id': test.id,
             'name': test.name,
             'test_type': test.test_type,
             'expected_output': test.expected_output,
             'help_text': test.help_text,
-            'created_at': test.created_at.isoformat(),
-            'exercise_id': str(exercise_id)
+            'created_at': test.created_at,
+            'exercise_id': exercise_id,
+            'regraded_submissions': regraded
         }, status=201)
             
     except Exception as e:
@@ -822,34 +1049,26 @@ def create_new_test(request, exercise_id):
         if 'test' in locals():
             test.delete()
         print(f"Error in create_new_test: {str(e)}")
-        return JsonResponse({
+        return FastJsonResponse({
             'error': str(e)
         }, status=500)
 
 @csrf_exempt
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def get_test_details(request, test_id):
+@async_api_view(['GET'])
+@conditional(test_version)
+async def get_test_details(request, test_id):
     """
     Get details of a specific test.
     """
     try:
-        test = get_object_or_404(Tests, id=test_id)
+        test = await aget_object_or_404(Tests, id=test_id)
         
-        response_data = {
-            'id': test.id,
-            'name': test.name,
-            'test_type': test.test_type,
-            'expected_output': test.expected_output,
-            'help_text': test.help_text,
-            'created_at': test.created_at.isoformat(),
-            'updated_at': test.updated_at.isoformat()
-        }
+        response_data = TEST_FIELDS.object(test)
         
-        return JsonResponse(response_data)
+        return FastJsonResponse(response_data)
         
     except Exception as e:
-        return JsonResponse({
+        return FastJsonResponse({
             'error': str(e)
         }, status=500)
 
@@ -863,13 +1082,14 @@ def update_test_by_id(request, test_id):
     try:
         test = get_object_or_404(Tests, id=test_id)
         data = request.data
+        previous_check = (test.test_type, test.expected_output)
         
         # Update fields
         if 'name' in data:
             test.name = data['name']
         if 'test_type' in data:
             if data['test_type'] not in ['includes', 'exact']:
-                return JsonResponse({
+                return FastJsonResponse({
                     'error': 'test_type must be either "includes" or "exact"'
                 }, status=400)
             test.test_type = data['test_type']
@@ -877,28 +1097,32 @@ def update_test_by_id(request, test_id):
             test.expected_output = data['expected_output']
         if 'help_text' in data:
             test.help_text = data['help_text']
+        
+        # Only the test type and expected output decide pass/fail
+        needs_regrade = (
+            test.test_type != previous_check[0] or
+            test.expected_output != previous_check[1]
+        )
             
         test.save()
         
+        # Re-check only this test for already graded submissions
+        regraded = grading.regrade_test(test) if needs_regrade else 0
+        
         response_data = {
-            'id': test.id,
-            'name': test.name,
-            'test_type': test.test_type,
-            'expected_output': test.expected_output,
-            'help_text': test.help_text,
-            'created_at': test.created_at.isoformat(),
-            'updated_at': test.updated_at.isoformat()
+            **TEST_FIELDS.object(test),
+            'regraded_submissions': regraded
         }
         
-        return JsonResponse(response_data)
+        return FastJsonResponse(response_data)
         
     except Tests.DoesNotExist:
-        return JsonResponse({
+        return FastJsonResponse({
             'error': 'Test not found'
         }, status=404)
     except Exception as e:
         print(f"Error in update_test: {str(e)}")
-        return JsonResponse({
+        return FastJsonResponse({
             'error': str(e)
         }, status=500)
 
@@ -912,21 +1136,22 @@ def delete_test_by_id(request, test_id):
     try:
         test = get_object_or_404(Tests, id=test_id)
         
-        # Delete the test
+        # Delete the test (its stored results are deleted with it,
+        # results of the remaining tests stay valid)
         test.delete()
         
-        return JsonResponse({
+        return FastJsonResponse({
             'message': 'Test deleted successfully',
             'id': test_id
         })
         
     except Tests.DoesNotExist:
-        return JsonResponse({
+        return FastJsonResponse({
             'error': 'Test not found'
         }, status=404)
     except Exception as e:
         print(f"Error in delete_test: {str(e)}")
-        return JsonResponse({
+        return FastJsonResponse({
             'error': str(e)
         }, status=500)
 
@@ -935,14 +1160,15 @@ def delete_test_by_id(request, test_id):
 @permission_classes([IsAuthenticated])
 def join_classroom(request, slug):
     """
-    Join a classroom. Creates an entry in ClassroomUsers.
+    Join a classroom. Creates an entry in ClassroomUsers and the submissions
+    of exercises already assigned to the classroom.
     """
     try:
         classroom = get_object_or_404(Classrooms, slug=slug)
         
         # Check if already a member
         if ClassroomUsers.objects.filter(classroom=classroom, user=request.user).exists():
-            return JsonResponse({
+            return FastJsonResponse({
                 'error': 'Already a member of this classroom'
             }, status=400)
             
@@ -951,8 +1177,9 @@ def join_classroom(request, slug):
             classroom=classroom,
             user=request.user
         )
+        backfill_assignments(classroom.id, [request.user.id])
         
-        return JsonResponse({
+        return FastJsonResponse({
             'message': 'Successfully joined classroom',
             'classroom': {
                 'id': classroom.id,
@@ -962,7 +1189,67 @@ def join_classroom(request, slug):
         })
         
     except Exception as e:
-        return JsonResponse({
+        return FastJsonResponse({
+            'error': str(e)
+        }, status=500)
+
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def import_classroom_roster(request, slug):
+    """
+    Bulk enroll students from a roster, creating accounts for unknown emails.
+    Only a teacher who created the classroom can import a roster.
+    
+    Accepts a text/csv body, a JSON body, or an uploaded 'file' (.csv or .json).
+    See lab/roster.py for the accepted columns.
+    
+    Emails of existing accounts are not enrolled but listed in
+    'needs_confirmation'; import again with ?enroll_existing=true to enroll them.
+    """
+    try:
+        classroom = get_object_or_404(Classrooms, slug=slug)
+        
+        # Check if user is a teacher and the creator of the classroom
+        if not request_is_teacher(request) or classroom.creator_user_id != request.user.id:
+            return FastJsonResponse({
+                'error': 'You do not have permission to import students into this classroom'
+            }, status=403)
+        
+        if request.content_type.startswith('text/csv'):
+            rows = parse_roster(request.body.decode('utf-8-sig'), 'csv')
+        elif 'file' in request.FILES:
+            upload = request.FILES['file']
+            roster_format = 'json' if upload.name.lower().endswith('.json') else 'csv'
+            rows = parse_roster(upload.read().decode('utf-8-sig'), roster_format)
+        else:
+            rows = parse_roster(request.data, 'json')
+        
+        enroll_existing = request.GET.get('enroll_existing', 'false')
+        if enroll_existing not in ('true', 'false'):
+            return FastJsonResponse({
+                'error': 'enroll_existing must be true or false'
+            }, status=400)
+        
+        summary = import_roster(classroom, rows, enroll_existing=enroll_existing == 'true')
+        
+        return FastJsonResponse({
+            'message': f"Enrolled {summary['enrolled']} students",
+            'classroom': {
+                'id': classroom.id,
+                'name': classroom.name,
+                'slug': classroom.slug
+            },
+            **summary
+        })
+        
+    except (RosterError, UnicodeDecodeError) as e:
+        return FastJsonResponse({
+            'error': str(e)
+        }, status=400)
+    except Exception as e:
+        logger.exception("Error in import_classroom_roster")
+        return FastJsonResponse({
             'error': str(e)
         }, status=500)
 
@@ -983,13 +1270,13 @@ def leave_classroom(request, slug):
         )
         
         if not membership.exists():
-            return JsonResponse({
+            return FastJsonResponse({
                 'error': 'Not a member of this classroom'
             }, status=400)
             
         membership.delete()
         
-        return JsonResponse({
+        return FastJsonResponse({
             'message': 'Successfully left classroom',
             'classroom': {
                 'id': classroom.id,
@@ -999,50 +1286,61 @@ def leave_classroom(request, slug):
         })
         
     except Exception as e:
-        return JsonResponse({
+        return FastJsonResponse({
             'error': str(e)
         }, status=500)
 
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def create_submission(request, exercise_id):
     """
     Create a new submission for an exercise.
+    A submission that already exists (materialized when the exercise was
+    assigned, or by an earlier attempt) is returned instead, so retries are
+    safe. Send an Idempotency-Key header to get the first attempt's response
+    back without the code being saved again.
     """
     try:
-        # Get the exercise instance
-        exercise = get_object_or_404(Exercises, id=exercise_id)
-        
-        # Parse the JSON data from request body
         data = request.data
-        
-        # Create submission instance
-        submission = Submissions(
-            student=request.user,
-            exercise=exercise,
-            submitted_code=data.get('code', ''),
-            status='assigned_to_student'
-        )
-        submission.save()
+
+        # Foreign keys are only checked at commit, which inside an enclosing
+        # transaction comes after the 201, so check the exercise up front
+        if not Exercises.objects.filter(pk=exercise_id).exists():
+            return FastJsonResponse({
+                'error': 'Exercise not found'
+            }, status=404)
+
+        # Insert or fetch in one statement
+        try:
+            submission, created = Submissions.upsert(request.user, exercise_id)
+        except IntegrityError:
+            return FastJsonResponse({
+                'error': 'Exercise not found'
+            }, status=404)
+        if 'code' in data:
+            history.save_code(submission, data['code'])
         
         # Return the created submission data
-        return JsonResponse({
-            'id': str(submission.id),
+        return FastJsonResponse({
+            'id': submission.id,
             'student': {
                 'id': submission.student.id,
                 'username': submission.student.username
             },
-            'exercise_id': str(exercise_id),
+            'exercise_id': exercise_id,
             'status': submission.status,
             'submitted_code': submission.submitted_code,
-            'created_at': submission.created_at.isoformat(),
-            'updated_at': submission.updated_at.isoformat()
-        }, status=201)
+            'version': submission.version,
+            'due_date': submission.due_date,
+            'created_at': submission.created_at,
+            'updated_at': submission.updated_at
+        }, status=201 if created else 200)
             
     except Exception as e:
         print(f"Error in create_submission: {str(e)}")
-        return JsonResponse({
+        return FastJsonResponse({
             'error': str(e)
         }, status=500)
 
@@ -1056,25 +1354,28 @@ def update_submission(request, submission_id):
     Teachers can update feedback and set status to reviewed_by_teacher.
     """
     try:
-        submission = get_object_or_404(Submissions, id=submission_id)
+        submission = get_object_or_404(
+            Submissions.objects.select_related('student', 'submitted_code_blob'), id=submission_id
+        )
         data = request.data
         
         # Check permissions
-        is_teacher = request.user.groups.filter(name='Teachers').exists()
+        is_teacher = request_is_teacher(request)
         is_owner = submission.student == request.user
         
         if not (is_teacher or is_owner):
-            return JsonResponse({
+            return FastJsonResponse({
                 'error': 'You do not have permission to update this submission'
             }, status=403)
         
         # Students can update code and toggle between assigned_to_student/submitted_by_student
+        code = None
         if is_owner and not is_teacher:
             if 'code' in data:
-                submission.submitted_code = data['code']
+                code = data['code']
             if 'status' in data:
                 if data['status'] not in ['assigned_to_student', 'submitted_by_student']:
-                    return JsonResponse({
+                    return FastJsonResponse({
                         'error': 'Students can only set status to assigned_to_student or submitted_by_student'
                     }, status=400)
                 submission.status = data['status']
@@ -1085,40 +1386,210 @@ def update_submission(request, submission_id):
                 submission.feedback = data['feedback']
             if 'status' in data:
                 if data['status'] not in ['reviewed_by_teacher']:
-                    return JsonResponse({
+                    return FastJsonResponse({
                         'error': 'Teachers can only set status to reviewed_by_teacher'
                     }, status=400)
                 submission.status = data['status']
             
-        submission.save()
-        
-        return JsonResponse({
-            'id': str(submission.id),
-            'student': {
-                'id': submission.student.id,
-                'username': submission.student.username,
-                'full_name': f"{submission.student.first_name} {submission.student.last_name}".strip(),
-                'email': submission.student.email,
-                'date_joined': submission.student.date_joined.isoformat(),
-                'last_login': submission.student.last_login.isoformat() if submission.student.last_login else None,
-            },
-            'exercise_id': str(submission.exercise.id),
-            'status': submission.status,
-            'submitted_code': submission.submitted_code,
-            'feedback': submission.feedback,
-            'created_at': submission.created_at.isoformat(),
-            'updated_at': submission.updated_at.isoformat()
+        # Only the fields set here: the code and version of the row read above
+        # may be stale by now, history.save_code updates them under a lock
+        submission.save(update_fields=['status', 'feedback', 'updated_at'])
+        if code is not None:
+            history.save_code(submission, code)
+        
+        # Grade the code as soon as the student hands it in
+        grading_result = None
+        if is_owner and not is_teacher and data.get('status') == 'submitted_by_student':
+            try:
+                grading_result = grading.grade_submission(submission)
+            except Exception as e:
+                logger.error("Grading failed for submission %s: %s", submission.id, str(e))
+        
+        return FastJsonResponse({
+            **submission_payload(submission),
+            'grading': grading_result,
         })
         
     except Exception as e:
         print(f"Error in update_submission: {str(e)}")
-        return JsonResponse({
+        return FastJsonResponse({
+            'error': str(e)
+        }, status=500)
+
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def autosave_submission(request, submission_id):
+    """
+    Autosave a student's code as a delta against the version their editor
+    last saw: {"base_version": 3, "delta": [[start, end, text], ...]}, or
+    {"base_version": 3, "code": "..."} to send the whole code.
+    
+    Returns the new version and the sha256 of the saved code, so the editor
+    can check it is in sync, or 409 with the current version if the code
+    changed in the meantime (the editor then reloads it).
+    """
+    try:
+        submission = get_object_or_404(Submissions.objects.only('id', 'student_id'), id=submission_id)
+        
+        if submission.student_id != request.user.id:
+            return FastJsonResponse({
+                'error': 'Only the student can autosave their submission'
+            }, status=403)
+        
+        data = request.data
+        base_version = data.get('base_version')
+        if type(base_version) is not int:
+            return FastJsonResponse({
+                'error': 'base_version must be an integer'
+            }, status=400)
+        if ('delta' in data) == ('code' in data):
+            return FastJsonResponse({
+                'error': 'Send either delta or code'
+            }, status=400)
+        if 'code' in data and not isinstance(data['code'], str):
+            return FastJsonResponse({
+                'error': 'code must be a string'
+            }, status=400)
+        
+        try:
+            version = history.save_code(
+                submission, code=data.get('code'), delta=data.get('delta'), base_version=base_version
+            )
+        except history.VersionConflict as e:
+            return FastJsonResponse({
+                'error': str(e),
+                'version': e.version
+            }, status=409)
+        
+        return FastJsonResponse({
+            'id': submission.id,
+            'version': version,
+            # The code's blob is keyed by its sha256; empty code has no blob
+            'code_sha256': submission.submitted_code_blob_id or CodeBlobs.key('')
+        })
+        
+    except history.DeltaError as e:
+        return FastJsonResponse({
+            'error': str(e)
+        }, status=400)
+    except Exception as e:
+        logger.exception("Error in autosave_submission")
+        return FastJsonResponse({
+            'error': str(e)
+        }, status=500)
+
+@csrf_exempt
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@read_replica
+def get_submission_versions(request, submission_id):
+    """
+    List the versions of a submission's code, oldest first, without the code.
+    Accessible by teachers and the submission's student.
+    """
+    try:
+        submission = get_object_or_404(Submissions.objects.only('id', 'student_id'), id=submission_id)
+        
+        if not (request_is_teacher(request) or submission.student_id == request.user.id):
+            return FastJsonResponse({
+                'error': 'You do not have permission to view this submission'
+            }, status=403)
+        
+        versions, page = paginate(request, SubmissionVersions.objects.filter(submission=submission).values(
+            'id', 'version', 'code_sha256', 'created_at'
+        ))
+        
+        return FastJsonResponse({
+            'versions': [{
+                'version': version['version'],
+                'code_sha256': version['code_sha256'],
+                'created_at': version['created_at']
+            } for version in versions],
+            'next': page['next'],
+            'next_cursor': page['next_cursor']
+        })
+        
+    except InvalidPageRequest as e:
+        return FastJsonResponse({
+            'error': str(e)
+        }, status=400)
+    except Exception as e:
+        logger.exception("Error in get_submission_versions")
+        return FastJsonResponse({
             'error': str(e)
         }, status=500)
 
 @csrf_exempt
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@read_replica
+def get_submission_version(request, submission_id, version):
+    """
+    Replay one version of a submission's code.
+    Accessible by teachers and the submission's student.
+    """
+    try:
+        submission = get_object_or_404(Submissions.objects.only('id', 'student_id'), id=submission_id)
+        
+        if not (request_is_teacher(request) or submission.student_id == request.user.id):
+            return FastJsonResponse({
+                'error': 'You do not have permission to view this submission'
+            }, status=403)
+        
+        replayed = history.code_at(submission.id, version)
+        if replayed is None:
+            return FastJsonResponse({
+                'error': 'Version not found'
+            }, status=404)
+        code, row = replayed
+        
+        return FastJsonResponse({
+            'version': row.version,
+            'code': code,
+            'code_sha256': row.code_sha256,
+            'created_at': row.created_at
+        })
+        
+    except Exception as e:
+        logger.exception("Error in get_submission_version")
+        return FastJsonResponse({
+            'error': str(e)
+        }, status=500)
+
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def grade_submission(request, submission_id):
+    """
+    Run a submission's code on the server and check it against the exercise's tests.
+    Students can grade their own submissions, teachers can grade any submission.
+    """
+    try:
+        submission = get_object_or_404(Submissions, id=submission_id)
+        
+        is_teacher = request_is_teacher(request)
+        if not (is_teacher or submission.student_id == request.user.id):
+            return FastJsonResponse({
+                'error': 'You do not have permission to grade this submission'
+            }, status=403)
+        
+        return FastJsonResponse(grading.grade_submission(submission))
+        
+    except grading.GraderUnavailable as e:
+        return FastJsonResponse({
+            'error': str(e)
+        }, status=503)
+    except Exception as e:
+        logger.exception("Error in grade_submission")
+        return FastJsonResponse({
+            'error': str(e)
+        }, status=500)
+
+@csrf_exempt
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@read_replica
 def get_submission_details(request, exercise_id):
     """
     Get details of a student's submission for a specific exercise.
@@ -1126,38 +1597,40 @@ def get_submission_details(request, exercise_id):
     try:
         # Get the submission for this exercise and student
         submission = get_object_or_404(
-            Submissions,
+            Submissions.objects.select_related('student', 'submitted_code_blob'),
             exercise_id=exercise_id,
             student=request.user
         )
         
-        return JsonResponse({
-            'id': str(submission.id),
+        return FastJsonResponse({
+            'id': submission.id,
             'student': {
                 'id': submission.student.id,
                 'username': submission.student.username
             },
-            'exercise_id': str(submission.exercise.id),
+            'exercise_id': submission.exercise_id,
             'status': submission.status,
             'submitted_code': submission.submitted_code,
+            'version': submission.version,
             'feedback': submission.feedback,
-            'created_at': submission.created_at.isoformat(),
-            'updated_at': submission.updated_at.isoformat()
+            'created_at': submission.created_at,
+            'updated_at': submission.updated_at
         })
         
     except Submissions.DoesNotExist:
-        return JsonResponse({
+        return FastJsonResponse({
             'error': 'No submission found'
         }, status=404)
     except Exception as e:
         print(f"Error in get_submission_details: {str(e)}")
-        return JsonResponse({
+        return FastJsonResponse({
             'error': str(e)
         }, status=500)
 
 @csrf_exempt
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@read_replica
 def get_all_submissions(request, exercise_id):
     """
     Get all submissions for a specific exercise.
@@ -1165,8 +1638,8 @@ def get_all_submissions(request, exercise_id):
     """
     try:
         # Check if user is a teacher
-        if not request.user.groups.filter(name='Teachers').exists():
-            return JsonResponse({
+        if not request_is_teacher(request):
+            return FastJsonResponse({
                 'error': 'Only teachers can view all submissions'
             }, status=403)
             
@@ -1174,39 +1647,92 @@ def get_all_submissions(request, exercise_id):
         status_filter = request.GET.get('status', '').split(',')
         
         # Base query for submissions
-        submissions_query = Submissions.objects.filter(exercise_id=exercise_id).select_related('student')
+        submissions_query = Submissions.objects.filter(exercise_id=exercise_id).select_related(
+            'student', 'submitted_code_blob'
+        )
         
         # Apply status filter if provided
         if status_filter and status_filter[0]:  # Check if status_filter is not empty
             submissions_query = submissions_query.filter(status__in=status_filter)
         
-        submissions = submissions_query.all()
+        submissions, page = paginate(request, submissions_query)
         
         # Extract submission data with detailed student info
-        submissions_data = [{
-            'id': str(submission.id),
-            'student': {
-                'id': submission.student.id,
-                'username': submission.student.username,
-                'full_name': f"{submission.student.first_name} {submission.student.last_name}".strip(),
-                'email': submission.student.email,
-                'date_joined': submission.student.date_joined.isoformat(),
-                'last_login': submission.student.last_login.isoformat() if submission.student.last_login else None,
-            },
-            'exercise_id': str(submission.exercise.id),
-            'status': submission.status,
-            'submitted_code': submission.submitted_code,
-            'feedback': submission.feedback,
-            'created_at': submission.created_at.isoformat(),
-            'updated_at': submission.updated_at.isoformat()
-        } for submission in submissions]
+        submissions_data = [submission_payload(submission) for submission in submissions]
         
-        return JsonResponse({
-            'submissions': submissions_data
+        return FastJsonResponse({
+            'submissions': submissions_data,
+            'next': page['next'],
+            'next_cursor': page['next_cursor']
         })
         
+    except InvalidPageRequest as e:
+        return FastJsonResponse({
+            'error': str(e)
+        }, status=400)
     except Exception as e:
         print(f"Error in get_all_submissions: {str(e)}")
-        return JsonResponse({
+        return FastJsonResponse({
+            'error': str(e)
+        }, status=500)
+
+# Rows fetched per round-trip when streaming an export
+EXPORT_CHUNK_SIZE = 500
+
+@csrf_exempt
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@read_replica
+def export_submissions(request, exercise_id):
+    """
+    Stream all submissions for a specific exercise as NDJSON (one JSON object per line).
+    Only accessible by teachers. Supports the same ?status= filter as get_all_submissions.
+    
+    Rows are read through a server-side cursor in chunks and encoded one at a
+    time, so memory stays flat and the first line is sent right away. Under
+    ASGI the lines come from an async generator: Django's ASGI handler reads a
+    sync iterator to the end before sending anything.
+    """
+    try:
+        # Check if user is a teacher
+        if not request_is_teacher(request):
+            return FastJsonResponse({
+                'error': 'Only teachers can view all submissions'
+            }, status=403)
+            
+        # Get status filter from query params
+        status_filter = request.GET.get('status', '').split(',')
+        
+        submissions_query = Submissions.objects.filter(exercise_id=exercise_id)
+        if status_filter and status_filter[0]:
+            submissions_query = submissions_query.filter(status__in=status_filter)
+        
+        rows = submissions_query.order_by('created_at', 'id').values(*SUBMISSION_ROW_COLUMNS)
+        
+        if settings.SERVER_INTERFACE == 'asgi':
+            async def lines():
+                async for row in rows.aiterator(chunk_size=EXPORT_CHUNK_SIZE):
+                    yield dumps(submission_row_payload(row)) + b'\n'
+        else:
+            def lines():
+                for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+                    yield dumps(submission_row_payload(row)) + b'\n'
+        
+        response = StreamingHttpResponse(lines(), content_type='application/x-ndjson')
+        response['Content-Disposition'] = f'attachment; filename="submissions-{exercise_id}.ndjson"'
+        return response
+        
+    except Exception as e:
+        logger.exception("Error in export_submissions")
+        return FastJsonResponse({
             'error': str(e)
-        }, status=500)
\ No newline at end of file
+        }, status=500)
+
+@csrf_exempt
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_payload_cache_stats(request):
+    """
+    Hit ratio and size of the exercise/test payload cache. Staff only.
+    """
+    return FastJsonResponse(payload_cache.stats())
@@ -5,12 +5,45 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
+
+Run it with gunicorn's uvicorn workers (see gunicorn.conf.py):
+
+    SERVER_INTERFACE=asgi gunicorn
+
+or directly with ``uvicorn moonbase.asgi:application``.
 """
 
 import os
 
+from asgiref.wsgi import WsgiToAsgi
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'moonbase.settings')
+# Tells the settings to leave out WhiteNoiseMiddleware, see below
+os.environ.setdefault('SERVER_INTERFACE', 'asgi')
+
+django_application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+from whitenoise import WhiteNoise  # noqa: E402
+
+
+def _not_found(environ, start_response):
+    start_response('404 Not Found', [('Content-Type', 'text/plain')])
+    return [b'Not Found']
+
+
+# WhiteNoiseMiddleware is sync only: in an async middleware stack it would
+# hold a thread for the whole request. Static files are served by WhiteNoise's
+# WSGI app in front of Django instead, so only static requests use a thread.
+_static = WhiteNoise(_not_found)
+if os.path.isdir(settings.STATIC_ROOT):
+    _static.add_files(settings.STATIC_ROOT, prefix=settings.STATIC_URL)
+static_application = WsgiToAsgi(_static)
+
 
-application = get_asgi_application()
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'].startswith('/' + settings.STATIC_URL.lstrip('/')):
+        await static_application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -101,7 +101,8 @@ CORS_ALLOW_CREDENTIALS = True  # Important for cookies
 CORS_EXPOSE_HEADERS = [
     'Content-Type', 
     'X-CSRFToken',
-    'Set-Cookie'  # Ensure Set-Cookie header is exposed
+    'Set-Cookie',  # Ensure Set-Cookie header is exposed
+    'Idempotent-Replayed',
 ]
 
 # Allow necessary headers
@@ -111,6 +112,7 @@ CORS_ALLOW_HEADERS = [
     'authorization',
     'content-type',
     'dnt',
+    'idempotency-key',
     'origin',
     'user-agent',
     'x-csrftoken',
@@ -157,6 +159,12 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Cursor pagination of list endpoints (see lab/pagination.py)
+PAGINATION = {
+    'DEFAULT_LIMIT': 100,  # Rows per page for ?cursor= without ?limit= (requests with neither aren't paged)
+    'MAX_LIMIT': 500,  # Upper bound for ?limit=
+}
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Lab API',
     'DESCRIPTION': 'API for managing classrooms and exercises',
@@ -166,6 +174,8 @@ SPECTACULAR_SETTINGS = {
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'lab.middleware.CompressionMiddleware',
+    'lab.db.routers.ReplicaStickinessMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -175,6 +185,13 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# 'asgi' when served by moonbase/asgi.py (see gunicorn.conf.py)
+SERVER_INTERFACE = os.getenv('SERVER_INTERFACE', 'wsgi')
+if SERVER_INTERFACE == 'asgi':
+    # WhiteNoiseMiddleware is sync only and would hold a thread for every
+    # request; moonbase/asgi.py serves static files in front of Django instead
+    MIDDLEWARE.remove('whitenoise.middleware.WhiteNoiseMiddleware')
+
 # Add this setting to determine if we're in development
 IS_DEVELOPMENT = ENV_TYPE == 'local'
 
@@ -198,6 +215,70 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
 }
 
+# Users resolved from access tokens are cached briefly (see lab/authentication.py)
+AUTH_USER_CACHE = {
+    'TTL': 60,  # Seconds a user stays cached
+    'LOG_SAMPLE_RATE': 0.01,  # Share of requests whose auth details are logged at DEBUG level
+}
+
+# Role caching (see lab/roles.py)
+ROLES = {
+    'CACHE_TTL': 60 * 60,  # Seconds a role stays in the shared cache
+    'TRUST_TOKEN_CLAIM': False,  # Use the 'role' claim of the access token on a cache miss
+}
+
+# Server-side grading (see lab/grading.py)
+GRADING = {
+    'POOL_SIZE': env.int('GRADING_POOL_SIZE', default=4),  # Sandbox workers per server process
+    'CPU_SECONDS': 2,  # CPU time per run
+    'WALL_SECONDS': 5,  # Wall-clock time per run
+    'MEMORY_MB': 256,  # Address space per run
+    'MAX_OUTPUT_BYTES': 64 * 1024,  # Output captured per run
+    'SANDBOX_USER': env('GRADING_SANDBOX_USER', default='nobody'),  # Unprivileged user runs execute as
+    # Replaced by empty read-only directories during runs; must not contain the Python installation
+    'HIDDEN_PATHS': [str(BASE_DIR), '/home', '/run', '/var/tmp', '/dev/shm'],
+    'CACHE_MAX_ENTRIES': 50000,  # Grading cache entries kept (least recently used are evicted first)
+    'CACHE_TTL_DAYS': 30,  # Grading cache entries unused for this long are evicted
+}
+
+CLASSROOM_DELETION = {
+    'BACKGROUND_THRESHOLD': 5000,  # Classrooms with more submissions than this are deleted by a background job
+    'BATCH_EXERCISES': 20,  # Exercises deleted per transaction by the background job
+    'LEASE_SECONDS': 10 * 60,  # A running job without a heartbeat for this long can be resumed
+}
+
+# Django's cache, used for roles, authenticated users and exercise/test payloads.
+# Local memory of each process by default; set CACHE_URL to share it between
+# processes, e.g. rediscache://host:6379/1 or filecache:///var/tmp/moonbase.
+# The role and user caches are only used with a shared backend (see
+# lab/shared_cache.py)
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://moonbase?max_entries=10000'),
+}
+
+# Exercise and test payload cache (see lab/payload_cache.py)
+PAYLOAD_CACHE = {
+    'TTL': 60 * 10,  # Seconds a payload stays cached
+}
+
+# Submission code history (see lab/history.py)
+SUBMISSION_HISTORY = {
+    'SNAPSHOT_INTERVAL': 20,  # A full copy of the code every this many versions, deltas in between
+}
+
+# Idempotency-Key header on create endpoints (see lab/idempotency.py)
+IDEMPOTENCY = {
+    'TTL': 24 * 60 * 60,  # Seconds a key and its response are kept for retries
+    'LEASE': 60,  # Seconds before a request still running under a key counts as abandoned (above gunicorn's timeout)
+}
+
+# gzip/brotli compression of JSON responses (see lab/middleware.py)
+COMPRESSION = {
+    'MIN_SIZE': env.int('COMPRESSION_MIN_SIZE', default=1024),  # Smaller bodies are sent uncompressed
+    'GZIP_LEVEL': env.int('COMPRESSION_GZIP_LEVEL', default=6),  # 1 (fastest) to 9 (smallest)
+    'BROTLI_QUALITY': env.int('COMPRESSION_BROTLI_QUALITY', default=4),  # 0 (fastest) to 11 (smallest)
+}
+
 
 ROOT_URLCONF = 'moonbase.urls'
 
@@ -225,15 +306,48 @@ TEMPLATES = [
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'lab.db.postgresql_pool',  # django.db.backends.postgresql, plus optional pooling
         'NAME': env('DB_NAME'),
         'USER': env('DB_USER'),
         'PASSWORD': env('DB_PASSWORD'),
         'HOST': env('DB_HOST'),
         'PORT': env('DB_PORT'),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Pooled connections with prepared statements (see lab/db/postgresql_pool/base.py).
+# Each server process keeps up to DB_POOL_MAX_SIZE connections open
+if env.bool('DB_POOL', default=False):
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': env.int('DB_POOL_MIN_SIZE', default=2),
+            'max_size': env.int('DB_POOL_MAX_SIZE', default=10),
+            'timeout': env.float('DB_POOL_TIMEOUT', default=10),  # Seconds a request waits for a free connection
+        },
+        # Parameters bound on the server, so psycopg can prepare repeated queries
+        'server_side_binding': True,
+        'prepare_threshold': env.int('DB_PREPARE_THRESHOLD', default=2),  # Runs on a connection before a query is prepared
+    }
+
+# Read replicas of the default database, as comma-separated host or host:port
+# entries. Views decorated with @read_replica read from them (see lab/db/routers.py)
+for number, replica in enumerate(env.list('DB_REPLICA_HOSTS', default=[]), start=1):
+    host, _, port = replica.partition(':')
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'OPTIONS': dict(DATABASES['default'].get('OPTIONS', {})),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['lab.db.routers.ReplicaRouter']
+READ_REPLICAS = {
+    'ALIASES': [alias for alias in DATABASES if alias != 'default'],
+    'STICKY_SECONDS': env.int('DB_REPLICA_STICKY_SECONDS', default=5),  # Seconds a client reads from the primary after writing
+}
+
 
 # If prod, use DATABASE_URL from Railway
 # if ENV_TYPE == 'prod':
@@ -93,7 +93,7 @@ function ExerciseListWrapper({
     try {
       setIsLoading(true);
       const response = await fetchFromDjangoClient(
-        `api/classrooms/${classroomSlug}/exercises/`
+        `api/classrooms/${classroomSlug}/exercises/?fields=id,name,slug,instructions,created_at,updated_at`
       );
 
       if (!response.ok) {
@@ -68,7 +68,7 @@ function ExerciseListWrapper({
   const fetchExercises = useCallback(async () => {
     try {
       const response = await fetchFromDjangoClient(
-        `api/classrooms/${classroomSlug}/exercises/`
+        `api/classrooms/${classroomSlug}/exercises/?fields=id,name,slug,instructions,created_at,updated_at`
       );
 
       if (!response.ok) {